@@ -1,13 +1,13 @@
 from datetime import datetime, timedelta
+
+import click
 from flask import Flask
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_moment import Moment
 
 # Initialize Flask extensions
 from app.models import db
 
-migrate = Migrate()
 login_manager = LoginManager()
 
 
@@ -22,6 +22,17 @@ def register_filters(app):
         return value.strftime('%Y-%m-%d')
 
 
+def init_migrations(app):
+    """
+    Flask-Migrate only serves the `flask db` commands and imports all of alembic, so it is
+    only set up when the app is loaded by the flask command, not in web workers.
+    """
+    if click.get_current_context(silent=True) is None:
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+
 def create_app(config_class=None):
     app = Flask(__name__, static_url_path='/static',
                 static_folder='static')
@@ -32,33 +43,54 @@ def create_app(config_class=None):
         config_class = Config
     app.config.from_object(config_class)
 
+    # Pool and connection settings of the database's engine profile; explicit options win
+    from app.models.engine import configure_engine, engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**engine_options(app.config),
+                                               **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_migrations(app)
     login_manager.init_app(app)
     moment = Moment(app)
 
-    app.app_context().push()
-
     # Setup Flask-Login
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
 
     with app.app_context():
+        configure_engine(db.engine, app.config)
+
+        if app.config.get('COMPACT_IDS'):
+            # Before the engine runs any statement, since column types are resolved once per engine
+            from app.models.ids import use_compact_ids
+            use_compact_ids(db.engine)
+
         # Import filters and models after db is initialized
         from app.utils.filters import init_filters
         init_filters(app)
         register_filters(app)
 
+        from app.commands import register_commands
+        register_commands(app)
+
         from app.models import User, Account, Category, Transaction, Budget
         from .models.category import Category
 
+        from app.utils.pagination import page_url
+        from app.utils.accounts import forget_user_accounts
+
+        app.teardown_request(forget_user_accounts)
+
+        from app.utils.instrumentation import init_instrumentation
+        from app.utils.metrics import init_metrics
+        init_instrumentation(app, db.engine)
+        init_metrics(app, db.engine)
+
         @app.context_processor
         def utility_processor():
-            return {'Category': Category}
-
-        db.create_all()
+            return {'Category': Category, 'page_url': page_url}
 
         # Register blueprints
         from .routes.auth import auth
@@ -67,6 +99,7 @@ def create_app(config_class=None):
         from .routes.transactions import transactions
         from .routes.budgets import budgets
         from .routes.reports import bp as reports_bp
+        from .routes.jobs import jobs
 
         app.register_blueprint(auth, url_prefix='/auth')
         app.register_blueprint(main)
@@ -74,9 +107,12 @@ def create_app(config_class=None):
         app.register_blueprint(transactions, url_prefix='/transactions')
         app.register_blueprint(budgets, url_prefix='/budgets')
         app.register_blueprint(reports_bp)
+        app.register_blueprint(jobs)
+
+        from app.utils.user_cache import UserCache
 
         @login_manager.user_loader
-        def load_user(user_id):
-            return User.get_by_id(user_id)
+        def load_user(session_id):
+            return UserCache.from_app().load(session_id)
 
     return app
@@ -0,0 +1,119 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.models import db
+from app.models.account import Account
+from app.models.balance_snapshot import AccountBalanceSnapshot
+from app.models.daily_rollup import DailyRollup
+from app.models.ids import convert_ids
+from app.models.search import get_search_backend
+from app.utils.jobs import work, purge_jobs
+
+rollups_cli = AppGroup('rollups', help='Maintain the daily transaction rollups.')
+balances_cli = AppGroup('balances', help='Maintain account balances and their daily snapshots.')
+jobs_cli = AppGroup('jobs', help='Run and maintain background jobs.')
+search_cli = AppGroup('search', help='Maintain the transaction full-text search index.')
+ids_cli = AppGroup('ids', help='Change how record ids are stored.')
+schema_cli = AppGroup('schema', help='Create the database schema.')
+
+
+@rollups_cli.command('rebuild')
+@click.option('--user-id', default=None, help='Only rebuild the rollups of this user.')
+def rebuild_rollups(user_id):
+    """Backfill or rebuild daily rollups from the transactions table"""
+    count = DailyRollup.rebuild(user_id)
+    click.echo(f'Rebuilt {count} daily rollup rows.')
+
+
+@balances_cli.command('rebuild-snapshots')
+@click.option('--account-id', default=None, help='Only rebuild the snapshots of this account.')
+def rebuild_balance_snapshots(account_id):
+    """Rebuild end-of-day balance snapshots from the daily rollups"""
+    count = AccountBalanceSnapshot.rebuild(account_id)
+    click.echo(f'Rebuilt balance snapshots of {count} accounts.')
+
+
+@balances_cli.command('reconcile')
+@click.option('--dry-run', is_flag=True, help='Only report drifted balances.')
+def reconcile_balances(dry_run):
+    """Recompute account balances from the transaction ledger and report drift"""
+    drift = Account.reconcile_balances(dry_run=dry_run)
+    for account_id, stored, ledger in drift:
+        click.echo(f'{account_id}: stored {stored}, ledger {ledger}, drift {stored - ledger}')
+    action = 'Found' if dry_run else 'Corrected'
+    click.echo(f'{action} {len(drift)} drifted balances.')
+
+
+@jobs_cli.command('work')
+@click.option('--interval', default=2.0, show_default=True, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit once the queue is empty.')
+def run_worker(interval, once):
+    """Run queued imports and report exports"""
+    count = work(interval=interval, once=once)
+    click.echo(f'Ran {count} jobs.')
+
+
+@jobs_cli.command('purge')
+@click.option('--days', default=7, show_default=True, help='Age of finished jobs to delete.')
+def purge_finished_jobs(days):
+    """Delete old finished jobs and their files"""
+    count = purge_jobs(days)
+    click.echo(f'Purged {count} jobs.')
+
+
+@search_cli.command('rebuild')
+def rebuild_search_index():
+    """Create the search index if missing and repopulate it from the transactions table"""
+    with db.engine.begin() as connection:
+        backend = get_search_backend(connection)
+        backend.install(connection)
+        backend.rebuild(connection)
+    click.echo(f'Rebuilt the {connection.dialect.name} search index.')
+
+
+@ids_cli.command('convert')
+@click.argument('storage', type=click.Choice(['compact', 'string']))
+def convert_id_storage(storage):
+    """Rewrite every id column as native uuid / 16-byte values (compact) or 36-character strings"""
+    db.session.remove()
+    with db.engine.begin() as connection:
+        convert_ids(connection, db.metadata, compact=storage == 'compact')
+    setting = 'COMPACT_IDS=1' if storage == 'compact' else 'COMPACT_IDS unset'
+    click.echo(f'Converted ids to {storage} storage; run the app with {setting}.')
+
+
+@schema_cli.command('create')
+def create_schema():
+    """Create missing tables; a new database is also marked as at the latest migration"""
+    with db.engine.begin() as connection:
+        new_database = not db.inspect(connection).get_table_names()
+        db.metadata.create_all(connection)
+        if new_database:
+            stamp_latest_migration(connection)
+
+    if new_database:
+        click.echo('Created the database schema at the latest migration.')
+    else:
+        click.echo('Created any missing tables; run `flask db upgrade` to apply pending migrations.')
+
+
+def stamp_latest_migration(connection):
+    """Record the head revision in alembic_version, as `flask db stamp head` does"""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory(os.path.join(os.path.dirname(current_app.root_path), 'migrations'))
+    MigrationContext.configure(connection).stamp(script, 'head')
+
+
+def register_commands(app):
+    """Register the application's CLI command groups"""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(balances_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(ids_cli)
+    app.cli.add_command(schema_cli)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -30,6 +31,61 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     PERMANENT_SESSION_LIFETIME = timedelta(minutes=60)
 
+    # Engine profile: 'auto' tunes the pool (PostgreSQL) or pragmas (SQLite) for the
+    # database URI's backend; 'none' keeps SQLAlchemy's defaults
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE') or 'auto'
+    # Request threads per web worker process; sizes each process's connection pool
+    WEB_THREADS = int(os.environ.get('WEB_THREADS') or 1)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 0)  # 0: one connection per web thread
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 2)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    # PostgreSQL cancels statements running longer than this; 0 disables it. Migrations run
+    # without it; set 0 for long maintenance commands such as `flask rollups rebuild`.
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 30000)
+    DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME') or 'moneyminder'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 15000)
+    SQLITE_CACHE_SIZE = -64 * 1024  # negative: KiB, so 64 MiB of page cache per connection
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+    # Time each request's SQL statements, template rendering and report generation:
+    # SERVER_TIMING adds a Server-Timing response header, REQUEST_LOG logs one JSON line per request
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true')
+    REQUEST_LOG = os.environ.get('REQUEST_LOG', '').lower() in ('1', 'true')
+    # Serve Prometheus metrics at /metrics; scrapers must send "Authorization: Bearer
+    # <METRICS_TOKEN>", which only debug and testing may leave unset.
+    # gunicorn.conf.py combines the workers' numbers.
+    METRICS = os.environ.get('METRICS', '').lower() in ('1', 'true')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Transaction list page size; ?per_page= may ask for up to the maximum
+    TRANSACTIONS_PER_PAGE = int(os.environ.get('TRANSACTIONS_PER_PAGE') or 50)
+    MAX_TRANSACTIONS_PER_PAGE = 200
+
+    # Longest balance history ?days= may ask for: five years of daily points
+    MAX_BALANCE_HISTORY_DAYS = 5 * 365
+
+    # Store ids as native uuid on PostgreSQL and 16-byte blobs on SQLite instead of 36-character
+    # strings. Convert an existing database first with `flask ids convert compact`.
+    COMPACT_IDS = os.environ.get('COMPACT_IDS', '').lower() in ('1', 'true')
+
+    # Logged in users are cached per process for this many seconds; 0 disables the cache
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 60)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 1024)
+
+    # Rows per bulk insert when importing transactions from CSV
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE') or 1000)
+
+    # A running job whose worker has not reported for this many seconds is taken over by
+    # another worker, such as after a deploy stopped the old one
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS') or 300)
+
+    # Uploads and generated reports for background jobs; defaults to <instance>/jobs
+    JOBS_DIR = os.environ.get('JOBS_DIR')
+
+    # Generated reports are cached on disk until this many bytes; 0 disables the cache
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES') or 256 * 1024 * 1024)
+
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -43,4 +99,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_walletapp.db'
     WTF_CSRF_ENABLED = False  # Disable CSRF in testing
+    # Keep generated files out of the instance folder
+    JOBS_DIR = os.path.join(tempfile.gettempdir(), 'moneyminder-tests', 'jobs')
+    REPORT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'moneyminder-tests', 'report_cache')
 
@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import DateField, SelectField
 from wtforms.validators import DataRequired
+from app.utils.accounts import account_choices
 
 
 class NoCSRFForm(FlaskForm):
@@ -34,7 +35,5 @@ class ReportFilterForm(NoCSRFForm):
     def __init__(self, user, *args, **kwargs):
         super(ReportFilterForm, self).__init__(*args, **kwargs)
         # Populate account choices with currency info
-        self.account_id.choices = [('', 'Select Account')] + [
-            (str(a.id), f"{a.name} ({a.currency})")
-            for a in user.accounts
-        ]
+        self.account_id.choices = [('', 'Select Account')] + account_choices(
+            user.id, lambda a: f"{a.name} ({a.currency})")
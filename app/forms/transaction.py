@@ -4,6 +4,7 @@ from wtforms import StringField, DecimalField, SelectField, TextAreaField, DateF
 from wtforms.validators import DataRequired, Length, Optional, NumberRange
 from datetime import datetime
 from app.models.category import Category
+from app.utils.accounts import account_choices
 
 
 class NoCSRFForm(FlaskForm):
@@ -63,10 +64,7 @@ class TransactionForm(NoCSRFForm):
 
     def __init__(self, user, *args, **kwargs):
         super(TransactionForm, self).__init__(*args, **kwargs)
-        self.account_id.choices = [
-            (str(account.id), account.name)
-            for account in user.accounts
-        ]
+        self.account_id.choices = account_choices(user.id)
         self.category.choices = [('', 'Select Category')] + [
             (cat, cat) for cat in Category.PRESET_CATEGORIES.keys()
         ]
@@ -116,10 +114,7 @@ class TransactionFilterForm(NoCSRFForm):
 
     def __init__(self, user, *args, **kwargs):
         super(TransactionFilterForm, self).__init__(*args, **kwargs)
-        self.account_filter.choices = [('', 'All Accounts')] + [
-            (str(account.id), account.name)
-            for account in user.accounts
-        ]
+        self.account_filter.choices = [('', 'All Accounts')] + account_choices(user.id)
         self.category_filter.choices = [('', 'All Categories')] + [
             (cat, cat) for cat in Category.PRESET_CATEGORIES.keys()
         ]
@@ -150,7 +145,4 @@ class BulkTransactionForm(NoCSRFForm):
 
     def __init__(self, user, *args, **kwargs):
         super(BulkTransactionForm, self).__init__(*args, **kwargs)
-        self.account_id.choices = [
-            (str(account.id), account.name)
-            for account in user.accounts
-        ]
+        self.account_id.choices = account_choices(user.id)
@@ -1,15 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
-import uuid
 
 db = SQLAlchemy()
 
+from .ids import IdType, uuid7  # noqa: E402  (needs db)
+
 
 def generate_id():
-    return str(uuid.uuid4())
+    return str(uuid7())
 
 
 class BaseModel:
-    id = db.Column(db.String(36), primary_key=True, default=generate_id)
+    id = db.Column(IdType(), primary_key=True, default=generate_id)
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(),
                            onupdate=db.func.current_timestamp())
@@ -43,8 +44,13 @@ class BaseModel:
 from .user import User
 from .account import Account
 from .category import Category
+from .lookup import CategoryName, TagName
 from .transaction import Transaction
 from .budget import Budget
+from .daily_rollup import DailyRollup
+from .balance_snapshot import AccountBalanceSnapshot
+from .job import Job
+from . import search  # registers the full-text index DDL on the transactions table
 
-__all__ = ['BaseModel', 'db', 'User', 'Account', 'Category', 'Transaction', 'Budget']
+__all__ = ['BaseModel', 'db', 'User', 'Account', 'Category', 'CategoryName', 'TagName', 'Transaction', 'Budget', 'DailyRollup', 'AccountBalanceSnapshot', 'Job']
 
@@ -1,5 +1,22 @@
-from app.models import db, BaseModel
+from app.models import db, BaseModel, IdType
+from app.models.money import Money, MoneyType
 from decimal import Decimal
+from sqlalchemy import event
+
+
+def balance_effect(amount, transaction_type):
+    """Signed change a transaction makes to its account balance, as Money"""
+    amount = Money.of(amount)
+    if transaction_type.lower() == 'income':
+        return amount
+    if transaction_type.lower() == 'expense':
+        return -amount
+    return Money()
+
+
+def _opening_balance_default(context):
+    """Accounts open with the balance they were created with"""
+    return context.get_current_parameters().get('balance') or 0
 
 
 class Account(db.Model, BaseModel):
@@ -8,9 +25,15 @@ class Account(db.Model, BaseModel):
     name = db.Column(db.String(100), nullable=False)
     account_type = db.Column(db.String(50), nullable=False)  # bank, cash, mobile_money
     currency = db.Column(db.String(3), nullable=False, default='USD')
-    balance = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+    balance = db.Column(MoneyType(), nullable=False, default=0)
+    # Balance before any transaction; the base of the daily balance snapshots
+    opening_balance = db.Column(MoneyType(), nullable=False, default=_opening_balance_default,
+                                server_default='0')
     description = db.Column(db.Text)
-    user_id = db.Column(db.String(50), db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(IdType(), db.ForeignKey('users.id'), nullable=False)
+
+    # Increased whenever the account's transactions change; part of cached report keys
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     transactions = db.relationship('Transaction', back_populates='account', lazy='dynamic', cascade='all, delete-orphan')
@@ -20,13 +43,132 @@ class Account(db.Model, BaseModel):
 
     def update_balance(self, amount: Decimal, transaction_type: str):
         """
-        Update account balance based on transaction type
+        Apply a transaction amount to the balance as an SQL delta,
+        inside the caller's database transaction
+        """
+        Account.adjust_balances({self.id: balance_effect(amount, transaction_type)})
+
+    @staticmethod
+    def adjust_balances(deltas):
+        """
+        Add each delta to its account's balance with UPDATE ... SET balance = balance + delta.
+        The database applies the increment, so concurrent writers never overwrite each other;
+        nothing is committed here.
+        """
+        for account_id, delta in deltas.items():
+            if account_id and delta:
+                Account.query.filter(Account.id == account_id).update(
+                    {Account.balance: Account.balance + delta},
+                    synchronize_session='fetch'
+                )
+
+    @staticmethod
+    def reconcile_balances(dry_run=False):
+        """
+        Recompute every balance from the opening balance and the transaction ledger
+        with one grouped query. Returns (account_id, stored, ledger) for each account
+        that drifted, and corrects them unless dry_run is set.
+        """
+        from app.models.transaction import Transaction
+
+        # Amounts are signed integer minor units, so the ledger is a plain sum and the comparison exact
+        ledger = db.type_coerce(Account.opening_balance + db.func.coalesce(
+            db.func.sum(Transaction.signed_amount), 0), MoneyType())
+        rows = db.session.query(Account.id, Account.balance, ledger) \
+            .outerjoin(Transaction, Transaction.account_id == Account.id) \
+            .group_by(Account.id, Account.balance, Account.opening_balance) \
+            .all()
+
+        drift = [(account_id, stored, expected) for account_id, stored, expected in rows if stored != expected]
+
+        if drift and not dry_run:
+            try:
+                # Recomputed in the UPDATE itself so writes since the read above are included
+                ledger_of_row = db.select(db.func.coalesce(db.func.sum(Transaction.signed_amount), 0)) \
+                    .where(Transaction.account_id == Account.id) \
+                    .scalar_subquery()
+                db.session.execute(
+                    db.update(Account)
+                    .where(Account.id.in_([account_id for account_id, _, _ in drift]))
+                    .values(balance=Account.opening_balance + ledger_of_row)
+                    .execution_options(synchronize_session='fetch')
+                )
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
+
+        return drift
+
+    def balance_at(self, day):
+        """Get the account balance at the end of a date"""
+        from app.models.balance_snapshot import AccountBalanceSnapshot
+        return AccountBalanceSnapshot.balance_at(self.id, day)
+
+    @staticmethod
+    def bump_data_version(*account_ids):
+        """Mark the accounts' data as changed, inside the caller's database transaction"""
+        account_ids = {account_id for account_id in account_ids if account_id}
+        if account_ids:
+            db.session.execute(
+                db.update(Account)
+                .where(Account.id.in_(account_ids))
+                .values(data_version=Account.data_version + 1)
+            )
+
+    @staticmethod
+    def get_data_version(user_id, account_id=None):
+        """
+        Get the data version of one account, or a version of all the user's accounts.
+        The latter lists every account with its version, since a sum could come back
+        to an earlier value once an account is deleted; each account's version only
+        grows and deleted ids never return, so the list never repeats.
+        """
+        query = db.session.query(Account.id, Account.data_version).filter(Account.user_id == user_id)
+        if account_id:
+            row = query.filter(Account.id == account_id).first()
+            return row.data_version if row else 0
+        return ','.join(f'{id}:{version}' for id, version in query.order_by(Account.id))
+
+    @staticmethod
+    def get_statistics(user_id, account_ids, start_date):
+        """
+        Get income, expenses and transaction count per account since start_date
+        using a single grouped query
         """
-        if transaction_type.lower() == 'income':
-            self.balance += amount
-        elif transaction_type.lower() == 'expense':
-            self.balance -= amount
-        self.update()
+        from app.models.transaction import Transaction
+
+        stats = {account_id: {
+            'monthly_income': 0.0,
+            'monthly_expenses': 0.0,
+            'transaction_count': 0
+        } for account_id in account_ids}
+
+        if not stats:
+            return stats
+
+        rows = db.session.query(
+            Transaction.account_id,
+            Transaction.transaction_type,
+            db.func.sum(Transaction.signed_amount),
+            db.func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.account_id.in_(stats.keys()),
+            Transaction.date >= start_date
+        ).group_by(
+            Transaction.account_id,
+            Transaction.transaction_type
+        ).all()
+
+        for account_id, transaction_type, total, count in rows:
+            if transaction_type == 'income':
+                stats[account_id]['monthly_income'] = float(total)
+            elif transaction_type == 'expense':
+                stats[account_id]['monthly_expenses'] = -float(total)
+            stats[account_id]['transaction_count'] += count
+
+        return stats
 
     def to_dict(self):
         return {
@@ -39,3 +181,11 @@ class Account(db.Model, BaseModel):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+
+
+@event.listens_for(Account, 'before_update')
+def bump_version_on_detail_change(mapper, connection, target):
+    """Reports show the account's details, so editing them also invalidates cached reports"""
+    state = db.inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ('name', 'account_type', 'currency')):
+        target.data_version = Account.data_version + 1
@@ -0,0 +1,159 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.models import db, IdType
+from app.models.daily_rollup import DailyRollup
+from app.models.money import Money, MoneyType
+
+
+class AccountBalanceSnapshot(db.Model):
+    """
+    End-of-day account balance on every day the account had transactions.
+    Derived from the daily rollups and moved alongside every transaction write,
+    so the balance on any date is a single index lookup.
+    """
+    __tablename__ = 'account_balance_snapshots'
+
+    account_id = db.Column(IdType(), db.ForeignKey('accounts.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    balance = db.Column(MoneyType(), nullable=False)
+
+    def __repr__(self):
+        return f'<AccountBalanceSnapshot {self.account_id} {self.day} {self.balance}>'
+
+    @classmethod
+    def apply(cls, user_id, account_id, changes):
+        """
+        Apply a write's net balance changes, given as (date, amount) pairs, to an account's snapshots.
+        Later snapshots move with one UPDATE; only the days written are inserted or removed.
+        Runs inside the caller's database transaction, after its rollups were updated.
+        """
+        totals = defaultdict(Money)
+        for day, amount in changes:
+            totals[_as_day(day)] += Money.of(amount)
+        days = sorted(totals)
+
+        # A day keeps a snapshot while it has transactions
+        counts = dict(db.session.query(DailyRollup.day, db.func.sum(DailyRollup.transaction_count)).filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.account_id == account_id,
+            DailyRollup.day.in_(days)
+        ).group_by(DailyRollup.day).all())
+        existing = set(db.session.scalars(
+            db.select(cls.day).where(cls.account_id == account_id, cls.day.in_(days))))
+        added = [day for day in days if counts.get(day) and day not in existing]
+        removed = [day for day in days if not counts.get(day) and day in existing]
+
+        # Balances of the new days as they were before this write, read before anything moves
+        before = {day: cls._balance_before(account_id, day) for day in added}
+
+        # Every snapshot moves by the changes on or before its day
+        steps, running = [], Money()
+        for day in days:
+            if totals[day]:
+                running += totals[day]
+                steps.append((day, running))
+        if steps:
+            shift = db.case(*[(cls.day >= day, db.literal(total, MoneyType())) for day, total in reversed(steps)])
+            db.session.execute(db.update(cls).where(cls.account_id == account_id, cls.day >= steps[0][0])
+                               .values(balance=cls.balance + shift))
+
+        if added:
+            db.session.execute(db.insert(cls), [
+                {'account_id': account_id, 'day': day, 'balance': before[day] + _change_through(steps, day)}
+                for day in added
+            ])
+        if removed:
+            db.session.execute(db.delete(cls).where(cls.account_id == account_id, cls.day.in_(removed)))
+
+    @classmethod
+    def refresh(cls, user_id, account_id, since):
+        """
+        Recompute an account's snapshots from the day of since onwards; see rebuild.
+        Runs inside the caller's database transaction, after its rollups were updated.
+        """
+        since = _as_day(since)
+        balance = cls._balance_before(account_id, since)
+
+        # Rollup totals are signed, so each day's net change is their plain sum
+        rows = db.session.query(DailyRollup.day, db.func.sum(DailyRollup.total_amount)).filter(
+            DailyRollup.user_id == user_id,
+            DailyRollup.account_id == account_id,
+            DailyRollup.day >= since
+        ).group_by(DailyRollup.day) \
+            .having(db.func.sum(DailyRollup.transaction_count) > 0) \
+            .order_by(DailyRollup.day).all()
+
+        snapshots = []
+        for day, change in rows:
+            balance += change or 0
+            snapshots.append({'account_id': account_id, 'day': day, 'balance': balance})
+
+        db.session.execute(db.delete(cls).where(cls.account_id == account_id, cls.day >= since))
+        if snapshots:
+            db.session.execute(db.insert(cls), snapshots)
+
+    @classmethod
+    def rebuild(cls, account_id=None):
+        """Recompute snapshots for one account or all accounts; returns the number of accounts"""
+        from app.models.account import Account
+
+        query = db.session.query(Account.id, Account.user_id)
+        if account_id:
+            query = query.filter(Account.id == account_id)
+
+        try:
+            accounts = query.all()
+            for account in accounts:
+                cls.refresh(account.user_id, account.id, datetime.min)
+            db.session.commit()
+            return len(accounts)
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @classmethod
+    def balance_at(cls, account_id, day):
+        """Balance at the end of day: the latest snapshot up to it, or the opening balance"""
+        return cls._balance_before(account_id, _as_day(day) + timedelta(days=1))
+
+    @classmethod
+    def daily_balances(cls, account_id, start_date, end_date):
+        """End-of-day balances for every day from start_date to end_date, as (day, balance) pairs"""
+        start_date, end_date = _as_day(start_date), _as_day(end_date)
+        balance = cls._balance_before(account_id, start_date)
+
+        changes = dict(db.session.query(cls.day, cls.balance).filter(
+            cls.account_id == account_id,
+            cls.day >= start_date,
+            cls.day <= end_date
+        ).all())
+
+        balances = []
+        day = start_date
+        while day <= end_date:
+            balance = changes.get(day, balance)
+            balances.append((day, Money.of(balance)))
+            day += timedelta(days=1)
+        return balances
+
+    @classmethod
+    def _balance_before(cls, account_id, day):
+        """Balance at the start of day, as Money"""
+        from app.models.account import Account
+
+        balance = db.session.query(cls.balance) \
+            .filter(cls.account_id == account_id, cls.day < day) \
+            .order_by(cls.day.desc()).limit(1).scalar()
+        if balance is None:
+            balance = db.session.query(Account.opening_balance).filter(Account.id == account_id).scalar()
+        return Money.of(balance)
+
+
+def _change_through(steps, day):
+    """The running change of the last step on or before day"""
+    return next((total for step, total in reversed(steps) if step <= day), Money())
+
+
+def _as_day(value):
+    return value.date() if isinstance(value, datetime) else value
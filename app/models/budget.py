@@ -1,7 +1,11 @@
-from app.models import db, BaseModel
+from app.models import db, BaseModel, IdType
 from datetime import datetime
 from decimal import Decimal
+from sqlalchemy import event
+from sqlalchemy.orm import validates
 from app.models.category import Category
+from app.models.lookup import CategoryName, LookupName, TagName, ensure_names
+from app.models.money import Money, MoneyType
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,17 +14,20 @@ logger = logging.getLogger(__name__)
 class Budget(db.Model, BaseModel):
     """Budget Model for setting spending limits per category"""
     __tablename__ = 'budgets'
+    __table_args__ = (
+        db.Index('ix_budgets_user_period', 'user_id', 'start_date', 'end_date'),
+    )
 
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    amount = db.Column(MoneyType(), nullable=False)
     start_date = db.Column(db.DateTime, nullable=False)
     end_date = db.Column(db.DateTime, nullable=False)
     notification_threshold = db.Column(db.Integer, default=80)
-    category = db.Column(db.String(100), nullable=False)
-    tag = db.Column(db.String(100), nullable=True)
-    user_id = db.Column(db.String(50), db.ForeignKey('users.id'), nullable=False)
+    category = db.Column('category_id', LookupName(CategoryName), db.ForeignKey('categories.id'), nullable=False)
+    tag = db.Column('tag_id', LookupName(TagName), db.ForeignKey('tags.id'), nullable=True)
+    user_id = db.Column(IdType(), db.ForeignKey('users.id'), nullable=False)
 
     def __init__(self, amount, category, user_id, start_date, end_date, tag=None, notification_threshold=80):
-        self.amount = Decimal(str(amount))
+        self.amount = amount
         self.category = category
         self.tag = tag
         self.user_id = user_id
@@ -28,6 +35,11 @@ class Budget(db.Model, BaseModel):
         self.end_date = end_date
         self.notification_threshold = notification_threshold
 
+    @validates('amount')
+    def _coerce_amount(self, key, amount):
+        """Routes assign form floats; the rest of the model works on Money"""
+        return Money.of(amount)
+
     def __repr__(self):
         base_repr = f'<Budget {self.category} {self.amount}'
         if self.tag:
@@ -35,11 +47,16 @@ class Budget(db.Model, BaseModel):
         return f'{base_repr}>'
 
     def get_spent_amount(self):
-        """Calculate how much has been spent in this budget period"""
+        """Calculate how much has been spent in this budget period, as Money"""
         from app.models.transaction import Transaction
 
+        # Reuse the amount from evaluate_many() or an earlier call until the budget is expired
+        spent = getattr(self, '_spent_amount', None)
+        if spent is not None:
+            return spent
+
         try:
-            query = db.session.query(db.func.sum(Transaction.amount)).filter(
+            query = db.session.query(db.func.sum(Transaction.signed_amount)).filter(
                 Transaction.user_id == self.user_id,
                 Transaction.category == self.category,
                 Transaction.date >= self.start_date,
@@ -53,12 +70,13 @@ class Budget(db.Model, BaseModel):
             # Log query for debugging
             logger.debug(f"Budget query for {self.category}: {str(query)}")
 
-            spent = query.scalar() or Decimal('0')
-            return Decimal(str(spent))
+            # Expenses are stored negative
+            self._spent_amount = -Money.of(query.scalar())
+            return self._spent_amount
 
         except Exception as e:
             logger.error(f"Error calculating spent amount for budget {self.id}: {str(e)}")
-            return Decimal('0')
+            return Money()
 
     def get_remaining_amount(self):
         """Calculate remaining budget"""
@@ -68,11 +86,12 @@ class Budget(db.Model, BaseModel):
 
     def get_spending_percentage(self):
         """Calculate what percentage of budget has been spent"""
-        if self.amount <= 0:
+        amount = Money.of(self.amount)
+        if amount <= 0:
             return Decimal('0')
 
-        spent = self.get_spent_amount()
-        percentage = (spent / self.amount * 100)
+        spent = Money.of(self.get_spent_amount())
+        percentage = Decimal(spent.minor) / Decimal(amount.minor) * 100
         return percentage.quantize(Decimal('0.01'))
 
     def is_exceeded(self):
@@ -117,6 +136,48 @@ class Budget(db.Model, BaseModel):
             logger.error(f"Error converting budget {self.id} to dict: {str(e)}")
             raise
 
+    @staticmethod
+    def evaluate_many(budgets):
+        """Calculate spent amounts for several budgets with a single query
+
+        Each budget becomes one conditional SUM over its (category, tag, period),
+        so a page showing every active budget costs one round trip instead of
+        several queries per budget. Results are memoized on each budget.
+        """
+        from app.models.transaction import Transaction
+
+        if not budgets:
+            return budgets
+
+        columns = []
+        for budget in budgets:
+            condition = db.and_(
+                Transaction.user_id == budget.user_id,
+                Transaction.category == budget.category,
+                Transaction.date >= budget.start_date,
+                Transaction.date <= budget.end_date
+            )
+            if budget.tag:
+                condition = db.and_(condition, Transaction.tag == budget.tag)
+            columns.append(db.func.sum(db.case((condition, Transaction.signed_amount), else_=0)))
+
+        try:
+            row = db.session.query(*columns).filter(
+                Transaction.user_id.in_({budget.user_id for budget in budgets}),
+                Transaction.category.in_({budget.category for budget in budgets}),
+                Transaction.date >= min(budget.start_date for budget in budgets),
+                Transaction.date <= max(budget.end_date for budget in budgets),
+                Transaction.transaction_type == 'expense'
+            ).one()
+
+            for budget, spent in zip(budgets, row):
+                budget._spent_amount = -Money.of(spent)
+
+        except Exception as e:
+            logger.error(f"Error evaluating {len(budgets)} budgets: {str(e)}")
+
+        return budgets
+
     @staticmethod
     def get_active_budgets(user_id, date=None):
         """Get all active budgets for a specific date"""
@@ -164,3 +225,15 @@ class Budget(db.Model, BaseModel):
         db.session.add(budget)
         db.session.commit()
         return budget
+
+
+@event.listens_for(Budget, 'expire')
+def _clear_spent_amount(budget, attrs):
+    """Drop the memoized spent amount whenever the budget is expired, e.g. after a commit"""
+    budget.__dict__.pop('_spent_amount', None)
+
+
+@event.listens_for(Budget, 'before_insert')
+@event.listens_for(Budget, 'before_update')
+def add_lookup_names(mapper, connection, target):
+    ensure_names(connection, [target.category], [target.tag])
@@ -0,0 +1,162 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models import db, IdType
+from app.models.money import Money, MoneyType
+
+
+class DailyRollup(db.Model):
+    """
+    Per-day transaction totals, maintained alongside every transaction write
+    so aggregate views scale with days x categories instead of transaction count
+    """
+    __tablename__ = 'daily_rollups'
+
+    user_id = db.Column(IdType(), db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    account_id = db.Column(IdType(), db.ForeignKey('accounts.id'), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True)
+    transaction_type = db.Column(db.String(20), primary_key=True)
+
+    # Signed like Transaction.signed_amount: expense totals are negative
+    total_amount = db.Column(MoneyType(), nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    KEY_COLUMNS = ('user_id', 'day', 'account_id', 'category', 'tag', 'transaction_type')
+
+    def __repr__(self):
+        return f'<DailyRollup {self.day} {self.category} {self.transaction_type} {self.total_amount}>'
+
+    @staticmethod
+    def key_for(transaction):
+        """Get the rollup key a transaction contributes to"""
+        return {
+            'user_id': transaction.user_id,
+            'day': _as_day(transaction.date),
+            'account_id': transaction.account_id,
+            'category': transaction.category,
+            'tag': transaction.tag,
+            'transaction_type': transaction.transaction_type
+        }
+
+    @classmethod
+    def apply(cls, key, amount, count):
+        """
+        Add amount and count to the rollup row for key, creating it if needed.
+        Runs inside the caller's database transaction.
+        """
+        amount = Money.of(amount)
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(cls).values(total_amount=amount, transaction_count=count, **key)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(cls.KEY_COLUMNS),
+                set_={
+                    'total_amount': cls.total_amount + statement.excluded.total_amount,
+                    'transaction_count': cls.transaction_count + statement.excluded.transaction_count
+                }
+            )
+            db.session.execute(statement)
+            return
+
+        rollup = db.session.get(cls, tuple(key[column] for column in cls.KEY_COLUMNS))
+        if rollup is None:
+            db.session.add(cls(total_amount=amount, transaction_count=count, **key))
+        else:
+            rollup.total_amount += amount
+            rollup.transaction_count += count
+
+    @classmethod
+    def add_transaction(cls, transaction):
+        cls.apply(cls.key_for(transaction), transaction.signed_amount, 1)
+
+    @classmethod
+    def remove_transaction(cls, transaction):
+        cls.apply(cls.key_for(transaction), -Money.of(transaction.signed_amount), -1)
+
+    @classmethod
+    def add_rows(cls, rows):
+        """Apply many new transactions given as column dicts, with one upsert per rollup key"""
+        totals = {}
+        for row in rows:
+            key = (row['user_id'], _as_day(row['date']), row['account_id'],
+                   row['category'], row['tag'], row['transaction_type'])
+            amount, count = totals.get(key, (Money(), 0))
+            totals[key] = (amount + row['signed_amount'], count + 1)
+
+        for key, (amount, count) in totals.items():
+            cls.apply(dict(zip(cls.KEY_COLUMNS, key)), amount, count)
+
+    @classmethod
+    def rebuild(cls, user_id=None):
+        """Recompute rollups from the transactions table; returns the number of rows written"""
+        from app.models.lookup import CategoryName, TagName
+        from app.models.transaction import Transaction
+
+        # Ids are only swapped for names when rows reach Python, so join the lookup tables here
+        delete = cls.query
+        source = db.session.query(
+            Transaction.user_id,
+            db.func.date(Transaction.date),
+            Transaction.account_id,
+            CategoryName.name,
+            TagName.name,
+            Transaction.transaction_type,
+            db.func.sum(Transaction.signed_amount),
+            db.func.count(Transaction.id)
+        ).join(CategoryName, CategoryName.id == Transaction.__table__.c.category_id) \
+            .join(TagName, TagName.id == Transaction.__table__.c.tag_id)
+        if user_id:
+            delete = delete.filter(cls.user_id == user_id)
+            source = source.filter(Transaction.user_id == user_id)
+        source = source.group_by(
+            Transaction.user_id,
+            db.func.date(Transaction.date),
+            Transaction.account_id,
+            CategoryName.name,
+            TagName.name,
+            Transaction.transaction_type
+        )
+
+        try:
+            delete.delete(synchronize_session=False)
+            result = db.session.execute(
+                db.insert(cls).from_select(list(cls.KEY_COLUMNS) + ['total_amount', 'transaction_count'], source)
+            )
+            db.session.commit()
+            return result.rowcount
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @classmethod
+    def summarize(cls, user_id, *group_by, start_date=None, end_date=None, **filters):
+        """
+        Sum rollups for a user grouped by the given column names or SQL expressions.
+        Returns rows of (*group values, total_amount, transaction_count); total_amount is
+        signed, so grouping by transaction_type gives negative expense totals.
+        Dates are inclusive and compared by day.
+        """
+        columns = [getattr(cls, name) if isinstance(name, str) else name for name in group_by]
+        query = db.session.query(
+            *columns,
+            db.func.sum(cls.total_amount),
+            db.func.sum(cls.transaction_count)
+        ).filter(cls.user_id == user_id)
+
+        if start_date:
+            query = query.filter(cls.day >= _as_day(start_date))
+        if end_date:
+            query = query.filter(cls.day <= _as_day(end_date))
+        for name, value in filters.items():
+            query = query.filter(getattr(cls, name) == value)
+
+        return query.group_by(*columns).having(db.func.sum(cls.transaction_count) > 0).all()
+
+
+def _as_day(value):
+    return value.date() if isinstance(value, datetime) else value
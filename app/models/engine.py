@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_profile(config):
+    """Name of the engine profile: DATABASE_PROFILE, or 'auto' for the database URI's backend"""
+    profile = config.get('DATABASE_PROFILE', 'auto')
+    if profile == 'auto':
+        profile = make_url(config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+    return profile if profile in ('postgresql', 'sqlite') else 'none'
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS of the configured profile; set before db.init_app"""
+    profile = engine_profile(config)
+    if profile == 'postgresql':
+        return {
+            # One connection per request thread of a worker process, with a little headroom
+            'pool_size': config['DB_POOL_SIZE'] or config['WEB_THREADS'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_pre_ping': True,
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'connect_args': {
+                'application_name': config['DB_APPLICATION_NAME'],
+                'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}",
+            },
+        }
+    return {}
+
+
+def configure_engine(engine, config):
+    """Add the profile's per-connection setup; must run before the engine connects"""
+    if engine_profile(config) != 'sqlite' or engine.dialect.name != 'sqlite':
+        return
+
+    # WAL lets readers run alongside the single writer, and writers wait busy_timeout ms
+    # for the lock instead of failing with "database is locked"
+    pragmas = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'cache_size': config['SQLITE_CACHE_SIZE'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+    }
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import db
+
+
+def uuid7():
+    """
+    Time-ordered UUID (version 7): a 48-bit Unix millisecond timestamp followed by random bits.
+    New ids sort after older ones, so primary key inserts append to the right edge of the index.
+    """
+    value = (time.time_ns() // 1_000_000 & (1 << 48) - 1) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 9562 variant
+    return uuid.UUID(int=value)
+
+
+def use_compact_ids(engine, enabled=True):
+    """
+    Store ids on this engine's database as native uuid (PostgreSQL) or 16-byte blobs (SQLite).
+    Must be called before the engine runs any statement; see the COMPACT_IDS setting.
+    """
+    engine.dialect.compact_ids = enabled
+
+
+def compact_ids(dialect):
+    return getattr(dialect, 'compact_ids', False)
+
+
+class IdType(db.TypeDecorator):
+    """
+    Primary and foreign key id column. Python code always sees the canonical UUID string.
+    Stored as VARCHAR(36) by default, or as 16 bytes on engines set up with use_compact_ids.
+    """
+    impl = db.String(36)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if not compact_ids(dialect):
+            return dialect.type_descriptor(db.String(36))
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
+        return dialect.type_descriptor(db.LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not compact_ids(dialect):
+            return value
+        try:
+            value = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+        except ValueError:
+            # Not an id any row can have; binding NULL makes the lookup match nothing
+            return None
+        return value if dialect.name == 'postgresql' else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or not compact_ids(dialect):
+            return value
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(bytes=value))
+
+
+def id_columns(metadata):
+    """Every (table, column) stored as an IdType"""
+    return [(table, column) for table in metadata.sorted_tables
+            for column in table.columns if isinstance(column.type, IdType)]
+
+
+def convert_ids(connection, metadata, compact):
+    """
+    Rewrite every id column of an existing database between the string and compact storage.
+    Runs in the caller's transaction; any value that is not a UUID aborts the conversion.
+    """
+    columns = id_columns(metadata)
+    if connection.dialect.name == 'postgresql':
+        _convert_postgresql(connection, columns, compact)
+    elif connection.dialect.name == 'sqlite':
+        _convert_sqlite(connection, columns, compact)
+    else:
+        raise ValueError(f'Converting ids is not supported on {connection.dialect.name}')
+
+
+def _convert_postgresql(connection, columns, compact):
+    # Foreign keys must be dropped while the referenced and referencing columns change type
+    inspector = db.inspect(connection)
+    names = {(table.name, column.name) for table, column in columns}
+    foreign_keys = [(table, key) for table in {table.name for table, _ in columns}
+                    for key in inspector.get_foreign_keys(table)
+                    if all((table, column) in names for column in key['constrained_columns'])]
+
+    for table, key in foreign_keys:
+        connection.execute(db.text(f'ALTER TABLE {table} DROP CONSTRAINT {key["name"]}'))
+    for table, column in columns:
+        target = 'uuid' if compact else 'varchar(36)'
+        connection.execute(db.text(
+            f'ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE {target} USING {column.name}::{target}'
+        ))
+    for table, key in foreign_keys:
+        connection.execute(db.text(
+            f'ALTER TABLE {table} ADD CONSTRAINT {key["name"]} FOREIGN KEY ({", ".join(key["constrained_columns"])}) '
+            f'REFERENCES {key["referred_table"]} ({", ".join(key["referred_columns"])})'
+        ))
+
+
+def _convert_sqlite(connection, columns, compact):
+    # Column affinity leaves blobs untouched, so values are rewritten in place without a table rebuild
+    def to_bytes(value):
+        return value if value is None or isinstance(value, bytes) else uuid.UUID(value).bytes
+
+    def to_text(value):
+        return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+    connection.connection.driver_connection.create_function('convert_id', 1, to_bytes if compact else to_text)
+    # Keys reference each other, so foreign keys are only checked once every column is rewritten
+    connection.execute(db.text('PRAGMA defer_foreign_keys = ON'))
+    for table, column in columns:
+        connection.execute(db.text(f'UPDATE {table.name} SET {column.name} = convert_id({column.name})'))
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from app.models import db, BaseModel, IdType
+
+
+class Job(db.Model, BaseModel):
+    """
+    Background job queued by a web request and run by `flask jobs work`
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Workers poll for the oldest queued job
+        db.Index('ix_jobs_status_created', 'status', 'created_at'),
+    )
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    kind = db.Column(db.String(20), nullable=False)  # 'import' or 'export'
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # percent complete
+    message = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    result_path = db.Column(db.String(500))
+    result_name = db.Column(db.String(255))
+    result_mimetype = db.Column(db.String(100))
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Refreshed by the worker while the job runs; a running job whose heartbeat stopped
+    # lost its worker and is claimed again
+    heartbeat_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Time an export spent generating its report; empty for imports and cached reports
+    render_ms = db.Column(db.Integer)
+
+    user_id = db.Column(IdType(), db.ForeignKey('users.id'), nullable=False)
+
+    def __repr__(self):
+        return f'<Job {self.kind} {self.status}>'
+
+    @classmethod
+    def enqueue(cls, user_id, kind, **params):
+        """Queue a job for the worker"""
+        job = cls(user_id=user_id, kind=kind, status=cls.QUEUED, params=params, progress=0)
+        job.save()
+        return job
+
+    @classmethod
+    def claimable(cls, stale_after):
+        """Queued jobs, and running jobs without a heartbeat for stale_after seconds"""
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+        # Jobs claimed before heartbeats were recorded only have started_at
+        stale = db.and_(cls.status == cls.RUNNING, db.func.coalesce(cls.heartbeat_at, cls.started_at) < cutoff)
+        return db.or_(cls.status == cls.QUEUED, stale)
+
+    @classmethod
+    def claim_next(cls, stale_after=300):
+        """
+        Mark the oldest claimable job as running and return it, or None if there is none.
+        The conditional UPDATE makes sure concurrent workers never claim the same job.
+        """
+        while True:
+            job_id = db.session.query(cls.id).filter(cls.claimable(stale_after)) \
+                .order_by(cls.created_at, cls.id).limit(1).scalar()
+            if job_id is None:
+                db.session.rollback()
+                return None
+
+            now = datetime.utcnow()
+            claimed = cls.query.filter(cls.id == job_id, cls.claimable(stale_after)).update(
+                {cls.status: cls.RUNNING, cls.started_at: now, cls.heartbeat_at: now,
+                 cls.attempts: cls.attempts + 1},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if claimed:
+                return db.session.get(cls, job_id)
+
+    @classmethod
+    def get_for_user(cls, job_id, user_id):
+        return cls.query.filter_by(id=job_id, user_id=user_id).first_or_404()
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    @classmethod
+    def beat(cls, connection, job_id):
+        """Record that the job's worker is alive, on a connection of the heartbeat thread"""
+        connection.execute(db.update(cls).where(cls.id == job_id).values(heartbeat_at=datetime.utcnow()))
+
+    def update_progress(self, done, total, message=None):
+        """Record how far along the job is"""
+        if total:
+            self.progress = min(99, int(done * 100 / total))
+        if message:
+            self.message = message
+        db.session.commit()
+
+    def succeed(self, message=None, result_path=None, result_name=None, result_mimetype=None, render_ms=None):
+        self.status = self.SUCCEEDED
+        self.progress = 100
+        self.message = message
+        self.result_path = result_path
+        self.result_name = result_name
+        self.result_mimetype = result_mimetype
+        self.render_ms = render_ms
+        self.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def fail(self, error):
+        self.status = self.FAILED
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'has_result': bool(self.result_path) and self.status == self.SUCCEEDED,
+            'render_ms': self.render_ms,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,159 @@
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import operators
+
+from app.models import db
+from app.models.category import Category
+
+
+class LookupTable:
+    """
+    Dictionary of names referenced by integer ids.
+    Transactions and budgets store the id, so each category and tag string is stored once.
+    Names are never renamed or deleted, so each process keeps a map of the ids it has read.
+    """
+    # Integer, so the Postgres sequence has room for values skipped by rolled back inserts
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    # Seeded when the table is created, so writes using them never need an insert
+    PRESET_NAMES = ()
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id} {self.name}>'
+
+    @classmethod
+    def ensure(cls, connection, names):
+        """
+        Add any of names not in the table yet.
+        Runs on the caller's connection, inside its database transaction.
+        """
+        # Sorted, so concurrent writers adding the same new names lock them in one order
+        cls._insert_missing(connection, sorted({name for name in names if name is not None} - set(cls.PRESET_NAMES)))
+
+    @classmethod
+    def name_of(cls, id, dialect):
+        """The name an id refers to, from the map kept on the engine's dialect"""
+        names = getattr(dialect, 'lookup_names', None)
+        if names is None:
+            names = dialect.lookup_names = {}
+        table = names.get(cls.__tablename__)
+        if table is None or id not in table:
+            # A missing id was added since the map was loaded. Reload on the session's
+            # connection, which also sees names its own database transaction added.
+            rows = db.session.connection().execute(db.select(cls.id, cls.name))
+            table = names[cls.__tablename__] = dict(rows.all())
+        return table.get(id)
+
+    @classmethod
+    def seed(cls, connection):
+        cls._insert_missing(connection, cls.PRESET_NAMES)
+
+    @classmethod
+    def _insert_missing(cls, connection, names):
+        if not names:
+            return
+
+        # Postgres draws an id for every row offered to an insert, conflicting or not,
+        # so only names missing from the table are offered
+        existing = set(connection.execute(db.select(cls.name).where(cls.name.in_(names))).scalars())
+        rows = [{'name': name} for name in names if name not in existing]
+        if not rows:
+            return
+
+        # A concurrent writer may add the same names between the select and the insert
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            statement = insert(cls.__table__).on_conflict_do_nothing(index_elements=['name'])
+        else:
+            statement = db.insert(cls.__table__)
+        connection.execute(statement, rows)
+        # The ids may be reused if this database transaction rolls back; see forget_added_names
+        connection.info['lookup_names_added'] = True
+
+
+class CategoryName(db.Model, LookupTable):
+    __tablename__ = 'categories'
+
+    PRESET_NAMES = tuple(Category.PRESET_CATEGORIES)
+
+
+class TagName(db.Model, LookupTable):
+    __tablename__ = 'tags'
+
+    # Several categories share tag names, e.g. Books and Furniture
+    PRESET_NAMES = tuple(dict.fromkeys(
+        tag for tags in Category.CATEGORY_TAGS.values() for tag in tags['Subcategories']
+    ))
+
+
+class LookupName(db.TypeDecorator):
+    """
+    Id column of a lookup table that reads, writes and compares as the name it refers to.
+    Bound names become a subquery on the lookup table and selected ids are swapped for their
+    name in Python (see LookupTable.name_of), so Transaction.category == 'Food' filters and
+    groups on the integer column and selecting it adds no per-row work to the query.
+    Names must exist in the lookup table before they are written; see LookupTable.ensure.
+    """
+    impl = db.Integer
+    cache_ok = True
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    class comparator_factory(db.TypeDecorator.Comparator):
+        def operate(self, op, *other, **kwargs):
+            # Expanding IN parameters cannot be wrapped by bind_expression; match the ids instead
+            if op in (operators.in_op, operators.not_in_op) and isinstance(other[0], (list, tuple, set, frozenset)):
+                model = self.type.model
+                other = (db.select(model.id).where(model.name.in_(list(other[0]))),) + other[1:]
+            return super().operate(op, *other, **kwargs)
+
+    def bind_expression(self, bindvalue):
+        model = self.model
+        return db.select(model.id).where(model.name == db.type_coerce(bindvalue, db.String)).scalar_subquery()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.model.name_of(value, dialect)
+
+
+def ensure_names(connection, categories=(), tags=()):
+    """Add new category and tag names to their lookup tables before rows using them are written"""
+    CategoryName.ensure(connection, categories)
+    TagName.ensure(connection, tags)
+
+
+def forget_names(dialect):
+    dialect.lookup_names = {}
+
+
+@event.listens_for(Engine, 'rollback')
+def forget_added_names(connection):
+    """
+    Names added in a database transaction that rolls back may get other names' ids later.
+    Runs before the rollback, so no other thread can be handed a rolled back id while it is still mapped.
+    """
+    if connection.info.pop('lookup_names_added', False):
+        forget_names(connection.dialect)
+
+
+@event.listens_for(Engine, 'commit')
+def keep_added_names(connection):
+    connection.info.pop('lookup_names_added', None)
+
+
+@event.listens_for(CategoryName.__table__, 'after_create')
+def seed_categories(target, connection, **kw):
+    forget_names(connection.dialect)
+    CategoryName.seed(connection)
+
+
+@event.listens_for(TagName.__table__, 'after_create')
+def seed_tags(target, connection, **kw):
+    forget_names(connection.dialect)
+    TagName.seed(connection)
@@ -0,0 +1,102 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from app.models import db
+
+CENT = Decimal('0.01')
+
+
+class Money:
+    """
+    An amount held as integer minor units (cents).
+    Adding and subtracting amounts is integer math, so totals never drift.
+    """
+    __slots__ = ('minor',)
+
+    def __init__(self, minor=0):
+        self.minor = int(minor)
+
+    @classmethod
+    def of(cls, value):
+        """Convert a Money, Decimal, int, float or numeric string, rounding half up to the cent"""
+        if isinstance(value, Money):
+            return value
+        if value is None:
+            return cls(0)
+        amount = Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+        return cls(amount.scaleb(2))
+
+    def to_decimal(self):
+        return Decimal(self.minor).scaleb(-2).quantize(CENT)
+
+    def __add__(self, other):
+        return Money(self.minor + Money.of(other).minor)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Money(self.minor - Money.of(other).minor)
+
+    def __rsub__(self, other):
+        return Money(Money.of(other).minor - self.minor)
+
+    def __neg__(self):
+        return Money(-self.minor)
+
+    def __abs__(self):
+        return Money(abs(self.minor))
+
+    def __eq__(self, other):
+        try:
+            return self.minor == Money.of(other).minor
+        except (TypeError, ArithmeticError, ValueError):
+            return NotImplemented
+
+    def __lt__(self, other):
+        return self.minor < Money.of(other).minor
+
+    def __le__(self, other):
+        return self.minor <= Money.of(other).minor
+
+    def __gt__(self, other):
+        return self.minor > Money.of(other).minor
+
+    def __ge__(self, other):
+        return self.minor >= Money.of(other).minor
+
+    def __hash__(self):
+        return hash(self.minor)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __float__(self):
+        return self.minor / 100
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __format__(self, format_spec):
+        return format(self.to_decimal(), format_spec)
+
+    def __repr__(self):
+        return f'Money({self.to_decimal()})'
+
+
+class MoneyType(db.TypeDecorator):
+    """
+    Amount column stored as BIGINT minor units and loaded as Money.
+    Sums and comparisons run on integers in the database; bound values of any
+    numeric type are converted to cents.
+    """
+    impl = db.BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return Money.of(value).minor
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Money(Decimal(str(value)).to_integral_value(rounding=ROUND_HALF_UP))
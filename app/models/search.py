@@ -0,0 +1,188 @@
+import re
+
+from sqlalchemy import event
+
+from app.models import db
+from app.models.ids import IdType
+from app.models.transaction import Transaction
+
+# Search terms are reduced to word tokens, each matched as a prefix
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(term):
+    return TOKEN.findall(term or '')
+
+
+class SearchBackend:
+    """
+    Full-text search over transaction descriptions.
+    Each dialect keeps its own index in step with the transactions table;
+    this base class falls back to an unindexed LIKE scan.
+    """
+    dialect = None
+
+    def install(self, connection):
+        """Create the search index; safe to run more than once"""
+
+    def uninstall(self, connection):
+        """Drop the search index"""
+
+    def rebuild(self, connection):
+        """Repopulate the search index from the transactions table"""
+
+    def filter(self, query, term):
+        """Restrict a transaction query to rows whose description matches every word of term"""
+        return query.filter(Transaction.description.ilike(f'%{term}%'))
+
+    def ranked(self, query, term):
+        """Filter a transaction query by term and order it best match first"""
+        return self.filter(query, term).order_by(Transaction.date.desc())
+
+
+class SqliteSearch(SearchBackend):
+    """
+    FTS5 index kept in sync by triggers and keyed by transaction id. VACUUM and table
+    rebuilds may renumber the transactions rowid, so the indexed descriptions live in
+    transactions_fts_source under an INTEGER PRIMARY KEY next to the id they belong to,
+    and searches join back to transactions on that id.
+    """
+    dialect = 'sqlite'
+
+    fts = db.Table(
+        'transactions_fts', db.MetaData(),
+        db.Column('transaction_id', IdType()),
+        db.Column('description', db.Text),
+        db.Column('rank', db.Float)
+    )
+
+    # Moves the indexed row of old.id out of the index and out of the source table
+    _DELETE_OLD = """
+               INSERT INTO transactions_fts (transactions_fts, rowid, transaction_id, description)
+               SELECT 'delete', id, transaction_id, description FROM transactions_fts_source
+               WHERE transaction_id = old.id;
+               DELETE FROM transactions_fts_source WHERE transaction_id = old.id;"""
+    _INSERT_NEW = """
+               INSERT INTO transactions_fts_source (transaction_id, description) VALUES (new.id, new.description);
+               INSERT INTO transactions_fts (rowid, transaction_id, description)
+               SELECT id, transaction_id, description FROM transactions_fts_source WHERE transaction_id = new.id;"""
+
+    DDL = [
+        """CREATE TABLE IF NOT EXISTS transactions_fts_source (
+               id INTEGER PRIMARY KEY, transaction_id UNIQUE NOT NULL, description TEXT)""",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+               transaction_id UNINDEXED, description,
+               content='transactions_fts_source', content_rowid='id', prefix='2 3')""",
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN{_INSERT_NEW}
+           END""",
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN{_DELETE_OLD}
+           END""",
+        # Also follows id rewrites, such as `flask ids convert`
+        f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF id, description ON transactions
+           BEGIN{_DELETE_OLD}{_INSERT_NEW}
+           END""",
+    ]
+
+    def install(self, connection):
+        for statement in self.DDL:
+            connection.exec_driver_sql(statement)
+
+    def uninstall(self, connection):
+        for trigger in ('insert', 'delete', 'update'):
+            connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS transactions_fts_{trigger}')
+        connection.exec_driver_sql('DROP TABLE IF EXISTS transactions_fts')
+        connection.exec_driver_sql('DROP TABLE IF EXISTS transactions_fts_source')
+
+    def rebuild(self, connection):
+        connection.exec_driver_sql('DELETE FROM transactions_fts_source')
+        connection.exec_driver_sql('INSERT INTO transactions_fts_source (transaction_id, description) '
+                                   'SELECT id, description FROM transactions')
+        connection.exec_driver_sql("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+    @staticmethod
+    def match_expression(tokens):
+        # Quote every token so FTS5 query syntax in user input is taken literally
+        return ' '.join('"%s"*' % token.replace('"', '""') for token in tokens)
+
+    def _match(self, tokens):
+        return db.literal_column('transactions_fts').op('MATCH')(self.match_expression(tokens))
+
+    def filter(self, query, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return super().filter(query, term)
+        matches = db.select(self.fts.c.transaction_id).where(self._match(tokens))
+        return query.filter(Transaction.id.in_(matches))
+
+    def ranked(self, query, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return super().ranked(query, term)
+        return query.join(self.fts, self.fts.c.transaction_id == Transaction.id) \
+            .filter(self._match(tokens)) \
+            .order_by(self.fts.c.rank, Transaction.date.desc())
+
+
+class PostgresSearch(SearchBackend):
+    """
+    GIN index over to_tsvector('simple', description). Being an expression index it
+    is maintained by Postgres itself; queries repeat the exact expression to use it.
+    """
+    dialect = 'postgresql'
+
+    INDEX = 'ix_transactions_description_fts'
+
+    document = db.func.to_tsvector(
+        db.literal_column("'simple'"),
+        db.func.coalesce(Transaction.description, db.literal_column("''"))
+    )
+
+    def install(self, connection):
+        connection.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {self.INDEX} ON transactions "
+            f"USING gin (to_tsvector('simple', coalesce(description, '')))"
+        )
+
+    def uninstall(self, connection):
+        connection.exec_driver_sql(f'DROP INDEX IF EXISTS {self.INDEX}')
+
+    def rebuild(self, connection):
+        connection.exec_driver_sql(f'REINDEX INDEX {self.INDEX}')
+
+    @staticmethod
+    def tsquery(tokens):
+        return db.func.to_tsquery(db.literal_column("'simple'"),
+                                  ' & '.join(f'{token}:*' for token in tokens))
+
+    def filter(self, query, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return super().filter(query, term)
+        return query.filter(self.document.op('@@')(self.tsquery(tokens)))
+
+    def ranked(self, query, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return super().ranked(query, term)
+        tsquery = self.tsquery(tokens)
+        return query.filter(self.document.op('@@')(tsquery)) \
+            .order_by(db.func.ts_rank(self.document, tsquery).desc(), Transaction.date.desc())
+
+
+BACKENDS = {backend.dialect: backend for backend in (SqliteSearch(), PostgresSearch())}
+
+
+def get_search_backend(bind=None):
+    """Get the search backend for a connection or engine; the session's engine by default"""
+    bind = bind if bind is not None else db.session.get_bind()
+    return BACKENDS.get(bind.dialect.name, SearchBackend())
+
+
+@event.listens_for(Transaction.__table__, 'after_create')
+def install_search(target, connection, **kw):
+    get_search_backend(connection).install(connection)
+
+
+@event.listens_for(Transaction.__table__, 'before_drop')
+def uninstall_search(target, connection, **kw):
+    get_search_backend(connection).uninstall(connection)
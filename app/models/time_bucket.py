@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from app.models import db
+
+INTERVALS = ('day', 'week', 'month')
+
+
+class date_bucket(FunctionElement):
+    """
+    Start date of the day, ISO week (Monday) or month containing a date column.
+    Compiles to date_trunc on PostgreSQL and to date/strftime modifiers on SQLite,
+    so time series can be grouped in SQL on either database.
+    """
+    type = db.Date()
+    inherit_cache = True
+    name = 'date_bucket'
+    # The interval is rendered into the SQL, so it must be part of the statement cache key
+    _traverse_internals = FunctionElement._traverse_internals + [('interval', InternalTraversal.dp_string)]
+
+    def __init__(self, column, interval):
+        if interval not in INTERVALS:
+            raise ValueError(f'Unknown interval: {interval}')
+        self.interval = interval
+        super().__init__(column)
+
+
+@compiles(date_bucket)
+def compile_date_bucket(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    return f"CAST(date_trunc('{element.interval}', {column}) AS DATE)"
+
+
+@compiles(date_bucket, 'sqlite')
+def compile_date_bucket_sqlite(element, compiler, **kw):
+    column = compiler.process(element.clauses, **kw)
+    if element.interval == 'week':
+        # strftime('%w') counts from Sunday = 0; step back to Monday
+        return f"date({column}, '-' || ((CAST(strftime('%w', {column}) AS INTEGER) + 6) % 7) || ' days')"
+    if element.interval == 'month':
+        return f"date({column}, 'start of month')"
+    return f'date({column})'
+
+
+def bucket_start(value, interval):
+    """Python counterpart of date_bucket for a single date"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if interval == 'week':
+        return value - timedelta(days=value.weekday())
+    if interval == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def bucket_range(start, end, interval):
+    """Start dates of every bucket from the one containing start to the one containing end"""
+    current, last = bucket_start(start, interval), bucket_start(end, interval)
+    while current <= last:
+        yield current
+        if interval == 'month':
+            current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        else:
+            current += timedelta(days=7 if interval == 'week' else 1)
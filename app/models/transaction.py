@@ -1,8 +1,22 @@
 # In models/transaction.py
+from collections import defaultdict
 from datetime import datetime
-from decimal import Decimal
 
-from app.models import db, BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import validates
+
+from app.models import db, BaseModel, IdType
+from app.models.balance_snapshot import AccountBalanceSnapshot
+from app.models.daily_rollup import DailyRollup
+from app.models.lookup import CategoryName, LookupName, TagName, ensure_names
+from app.models.money import Money, MoneyType
+
+
+def sign_amount(amount, transaction_type):
+    """The amount as a transaction stores it: negative for expenses, positive otherwise"""
+    amount = abs(Money.of(amount))
+    return -amount if transaction_type == 'expense' else amount
 
 
 class Transaction(db.Model, BaseModel):
@@ -10,25 +24,34 @@ class Transaction(db.Model, BaseModel):
     Transaction Model for tracking financial transactions
     """
     __tablename__ = 'transactions'
-
-    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    __table_args__ = (
+        # Every list, dashboard and budget query filters by owner and date range.
+        # id completes the (date, id) keyset order used to paginate transaction lists.
+        db.Index('ix_transactions_user_date', 'user_id', 'date', 'id'),
+        db.Index('ix_transactions_user_category_tag_date', 'user_id', 'category_id', 'tag_id', 'date'),
+        db.Index('ix_transactions_account_date', 'account_id', 'date', 'id'),
+    )
+
+    # Stored signed, expenses negative, so a sum over any rows is their net change to the balance
+    signed_amount = db.Column('amount', MoneyType(), nullable=False)
     transaction_type = db.Column(db.String(20), nullable=False)  # 'income' or 'expense'
     description = db.Column(db.Text)
     date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    category = db.Column(db.String(100), nullable=False)
-    tag = db.Column(db.String(100), nullable=False)
+    # Stored as ids into the categories and tags lookup tables; read and compared as names
+    category = db.Column('category_id', LookupName(CategoryName), db.ForeignKey('categories.id'), nullable=False)
+    tag = db.Column('tag_id', LookupName(TagName), db.ForeignKey('tags.id'), nullable=False)
 
     # Foreign Keys
-    user_id = db.Column(db.String(50), db.ForeignKey('users.id'), nullable=False)
-    account_id = db.Column(db.String(50), db.ForeignKey('accounts.id'), nullable=False)
+    user_id = db.Column(IdType(), db.ForeignKey('users.id'), nullable=False)
+    account_id = db.Column(IdType(), db.ForeignKey('accounts.id'), nullable=False)
 
     # Relationships
     account = db.relationship('Account', back_populates='transactions')
 
     def __init__(self, amount, transaction_type, account_id, category, tag, user_id,
                  description=None, date=None):
-        self.amount = Decimal(str(amount))
-        self.transaction_type = transaction_type.lower()
+        self.transaction_type = transaction_type
+        self.amount = amount
         self.account_id = account_id
         self.category = category
         self.tag = tag
@@ -36,11 +59,46 @@ class Transaction(db.Model, BaseModel):
         self.description = description
         self.date = date if date else datetime.utcnow()
 
+    @hybrid_property
+    def amount(self):
+        """The amount as entered, never negative; transaction_type gives its direction"""
+        if self.signed_amount is None:
+            return None
+        return abs(self.signed_amount)
+
+    @amount.inplace.setter
+    def _amount_setter(self, value):
+        # Reading the type of an expired instance must not flush edits save() has yet to compare
+        with db.session.no_autoflush:
+            transaction_type = self.transaction_type
+        self.signed_amount = sign_amount(value, transaction_type)
+
+    @amount.inplace.expression
+    @classmethod
+    def _amount_expression(cls):
+        return db.func.abs(cls.signed_amount, type_=MoneyType())
+
+    @validates('transaction_type')
+    def _sign_for_type(self, key, transaction_type):
+        """Changing the type of a transaction flips the sign of its stored amount"""
+        transaction_type = transaction_type.lower()
+        with db.session.no_autoflush:
+            stored = self.signed_amount
+        if stored is not None:
+            self.signed_amount = sign_amount(stored, transaction_type)
+        return transaction_type
+
     def save(self):
-        """Save transaction and update related records"""
+        """Save transaction and update related records in a single database transaction"""
+        from app.models.account import Account
+        from app.models.budget import Budget
+
         try:
-            if not self.account:
-                from app.models.account import Account
+            # Stored values of an edited transaction, so its old rollup and balance effect can be reversed.
+            # Loaded first, before any lazy load can autoflush the pending edits.
+            previous = self._load_stored_values()
+
+            if self.account is None or self.account.id != self.account_id:
                 self.account = Account.query.get(self.account_id)
                 if not self.account:
                     raise ValueError(f"Account with ID {self.account_id} not found")
@@ -49,32 +107,41 @@ class Transaction(db.Model, BaseModel):
             if self.account.user_id != self.user_id:
                 raise ValueError("Account does not belong to this user")
 
-            # Begin transaction
-            db.session.begin_nested()
-
             # Add transaction
             db.session.add(self)
 
-            # Update account balance
-            self.account.update_balance(self.amount, self.transaction_type)
-
-            # Commit changes
-            db.session.commit()
-
-            # Invalidate any cached budget calculations
-            from app.models.budget import Budget
-            active_budgets = Budget.query.filter(
+            # Keep daily rollups in step within the same database transaction
+            if previous is not None:
+                DailyRollup.remove_transaction(previous)
+            DailyRollup.add_transaction(self)
+
+            # Move the balance snapshots by this write's change on each day it touched
+            changes = [(self.date, self.signed_amount)]
+            if previous is not None and previous.account_id != self.account_id:
+                AccountBalanceSnapshot.apply(previous.user_id, previous.account_id,
+                                             [(previous.date, -previous.signed_amount)])
+            elif previous is not None:
+                changes.append((previous.date, -previous.signed_amount))
+            AccountBalanceSnapshot.apply(self.user_id, self.account_id, changes)
+
+            # Cached reports of the affected accounts are now stale
+            Account.bump_data_version(self.account_id, previous.account_id if previous else None)
+
+            # Update account balances as SQL deltas; an edit first reverses the stored values
+            deltas = defaultdict(Money)
+            if previous is not None:
+                deltas[previous.account_id] -= previous.signed_amount
+            deltas[self.account_id] += self.signed_amount
+            Account.adjust_balances(deltas)
+
+            # Invalidate any cached budget calculations by touching updated_at
+            Budget.query.filter(
                 Budget.user_id == self.user_id,
                 Budget.category == self.category,
                 Budget.start_date <= self.date,
-                Budget.end_date >= self.date
-            ).all()
-
-            for budget in active_budgets:
-                if not budget.tag or budget.tag == self.tag:
-                    # Force budget recalculation by touching updated_at
-                    budget.updated_at = datetime.utcnow()
-                    db.session.add(budget)
+                Budget.end_date >= self.date,
+                db.or_(Budget.tag.is_(None), Budget.tag == '', Budget.tag == self.tag)
+            ).update({Budget.updated_at: datetime.utcnow()}, synchronize_session=False)
 
             db.session.commit()
             return True
@@ -85,11 +152,40 @@ class Transaction(db.Model, BaseModel):
 
     def delete(self):
         """Delete transaction and update account balance"""
-        # Reverse the transaction effect on balance
-        reverse_type = 'expense' if self.transaction_type == 'income' else 'income'
-        self.account.update_balance(self.amount, reverse_type)
-        db.session.delete(self)
-        db.session.commit()
+        from app.models.account import Account
+
+        try:
+            # Read the values before the row is gone; an expired instance could not reload them
+            effect = self.signed_amount
+
+            db.session.delete(self)
+            DailyRollup.remove_transaction(self)
+            AccountBalanceSnapshot.apply(self.user_id, self.account_id, [(self.date, -effect)])
+            Account.bump_data_version(self.account_id)
+
+            # Reverse the transaction effect on balance
+            Account.adjust_balances({self.account_id: -effect})
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    def _load_stored_values(self):
+        """Load the persisted row of an existing transaction, ignoring unsaved edits"""
+        if db.inspect(self).key is None:
+            return None
+
+        with db.session.no_autoflush:
+            return db.session.query(
+                Transaction.signed_amount,
+                Transaction.transaction_type,
+                Transaction.date,
+                Transaction.category,
+                Transaction.tag,
+                Transaction.user_id,
+                Transaction.account_id
+            ).filter(Transaction.id == self.id).first()
 
     def get_category_icon(self):
         """Get the FontAwesome icon for this transaction's category"""
@@ -117,6 +213,53 @@ class Transaction(db.Model, BaseModel):
             'category_color': self.get_category_color()
         }
 
+    @staticmethod
+    def get_totals(query):
+        """Sum income and expenses over a filtered transaction query with one aggregate, as Money"""
+        totals = {'income': Money(), 'expense': Money()}
+        rows = query.with_entities(
+            Transaction.transaction_type,
+            db.func.sum(Transaction.signed_amount)
+        ).order_by(None).group_by(Transaction.transaction_type)
+
+        for transaction_type, total in rows:
+            if transaction_type in totals:
+                totals[transaction_type] = abs(Money.of(total))
+        return totals
+
+    @staticmethod
+    def get_totals_by_category(query):
+        """
+        Sum a filtered transaction query per category and type with one GROUP BY.
+        Returns (totals, summary): income and expense totals over the whole query as Money,
+        and a per category breakdown zero-filled against the preset categories.
+        """
+        from app.models.category import Category
+
+        totals = {'income': Money(), 'expense': Money()}
+        summary = {category: {
+            'income': 0.0,
+            'expense': 0.0,
+            'transaction_count': 0
+        } for category in Category.PRESET_CATEGORIES}
+
+        rows = query.with_entities(
+            Transaction.category,
+            Transaction.transaction_type,
+            db.func.sum(Transaction.signed_amount),
+            db.func.count(Transaction.id)
+        ).order_by(None).group_by(Transaction.category, Transaction.transaction_type)
+
+        for category, transaction_type, total, count in rows:
+            if transaction_type not in totals:
+                continue
+            total = abs(Money.of(total))
+            totals[transaction_type] += total
+            if category in summary:
+                summary[category][transaction_type] += float(total)
+                summary[category]['transaction_count'] += count
+        return totals, summary
+
     @staticmethod
     def get_by_date_range(user_id, start_date, end_date):
         """Get all transactions within a date range"""
@@ -129,63 +272,58 @@ class Transaction(db.Model, BaseModel):
     @staticmethod
     def get_category_summary(user_id, start_date=None, end_date=None):
         """Get transaction summary by category"""
-        query = Transaction.query.filter_by(user_id=user_id)
-
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
+        from app.models.category import Category
 
-        transactions = query.all()
+        rows = DailyRollup.summarize(user_id, 'category', 'tag', 'transaction_type',
+                                     start_date=start_date, end_date=end_date)
 
         summary = {}
-        for transaction in transactions:
-            if transaction.category not in summary:
-                summary[transaction.category] = {
+        for category, tag, transaction_type, total, count in rows:
+            if category not in summary:
+                summary[category] = {
                     'income': 0,
                     'expense': 0,
-                    'color': transaction.get_category_color(),
-                    'icon': transaction.get_category_icon(),
+                    'color': Category.PRESET_CATEGORIES.get(category, {}).get('color', '#718096'),
+                    'icon': Category.PRESET_CATEGORIES.get(category, {}).get('icon', 'tag'),
                     'tags': {}
                 }
 
-            # Update category totals
-            summary[transaction.category][transaction.transaction_type] += float(transaction.amount)
+            # Update category totals; rollup totals are signed like the amounts
+            total = float(abs(total))
+            summary[category][transaction_type] += total
 
             # Update tag totals
-            if transaction.tag not in summary[transaction.category]['tags']:
-                summary[transaction.category]['tags'][transaction.tag] = {
+            if tag not in summary[category]['tags']:
+                summary[category]['tags'][tag] = {
                     'income': 0,
                     'expense': 0
                 }
-            summary[transaction.category]['tags'][transaction.tag][transaction.transaction_type] += float(
-                transaction.amount)
+            summary[category]['tags'][tag][transaction_type] += total
 
         return summary
 
     @staticmethod
     def get_tag_summary(user_id, category=None, start_date=None, end_date=None):
         """Get transaction summary by tags within a category"""
-        query = Transaction.query.filter_by(user_id=user_id)
-
-        if category:
-            query = query.filter_by(category=category)
-        if start_date:
-            query = query.filter(Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(Transaction.date <= end_date)
-
-        transactions = query.all()
+        filters = {'category': category} if category else {}
+        rows = DailyRollup.summarize(user_id, 'tag', 'category', 'transaction_type',
+                                     start_date=start_date, end_date=end_date, **filters)
 
         summary = {}
-        for transaction in transactions:
-            if transaction.tag not in summary:
-                summary[transaction.tag] = {
+        for tag, tag_category, transaction_type, total, count in rows:
+            if tag not in summary:
+                summary[tag] = {
                     'income': 0,
                     'expense': 0,
-                    'category': transaction.category
+                    'category': tag_category
                 }
 
-            summary[transaction.tag][transaction.transaction_type] += float(transaction.amount)
+            summary[tag][transaction_type] += float(abs(total))
 
         return summary
+
+
+@event.listens_for(Transaction, 'before_insert')
+@event.listens_for(Transaction, 'before_update')
+def add_lookup_names(mapper, connection, target):
+    ensure_names(connection, [target.category], [target.tag])
@@ -1,5 +1,6 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
 from app.models import BaseModel, db
 
 
@@ -11,6 +12,8 @@ class User(UserMixin, db.Model, BaseModel):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    # Part of the session id; bumped on password change, which ends the user's other sessions
+    session_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships - cascade ensures child records are deleted when user is deleted
     accounts = db.relationship('Account', backref='user', lazy='dynamic',
@@ -23,6 +26,10 @@ class User(UserMixin, db.Model, BaseModel):
     def __repr__(self):
         return f'<User {self.username}>'
 
+    def get_id(self):
+        """Session id for Flask-Login: the user id and session version"""
+        return f'{self.id}:{self.session_version or 0}'
+
     def set_password(self, password):
         """Set the user's password hash"""
         self.password_hash = generate_password_hash(password)
@@ -41,19 +48,23 @@ class User(UserMixin, db.Model, BaseModel):
 
     def get_category_stats(self):
         """Get statistics for all categories used by user"""
+        from app.models.category import Category
+        from app.models.daily_rollup import DailyRollup
+
         stats = {}
-        for transaction in self.transactions:
-            if transaction.category not in stats:
-                stats[transaction.category] = {
+        for category, transaction_type, total, count in DailyRollup.summarize(
+                self.id, 'category', 'transaction_type'):
+            if category not in stats:
+                stats[category] = {
                     'income': 0,
                     'expense': 0,
                     'transaction_count': 0,
-                    'color': transaction.get_category_color(),
-                    'icon': transaction.get_category_icon()
+                    'color': Category.PRESET_CATEGORIES.get(category, {}).get('color', '#718096'),
+                    'icon': Category.PRESET_CATEGORIES.get(category, {}).get('icon', 'tag')
                 }
 
-            stats[transaction.category][transaction.transaction_type] += float(transaction.amount)
-            stats[transaction.category]['transaction_count'] += 1
+            stats[category][transaction_type] += float(abs(total))
+            stats[category]['transaction_count'] += int(count)
 
         return stats
 
@@ -77,3 +88,10 @@ class User(UserMixin, db.Model, BaseModel):
     def get_by_username(cls, username):
         """Get user by username"""
         return cls.query.filter_by(username=username).first()
+
+
+@event.listens_for(User, 'before_update')
+def bump_session_version_on_password_change(mapper, connection, target):
+    """Sessions made with the old password stop loading the user"""
+    if db.inspect(target).attrs.password_hash.history.has_changes():
+        target.session_version = User.session_version + 1
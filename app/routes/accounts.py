@@ -1,11 +1,17 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, abort
+from sqlalchemy.orm import selectinload
 from flask_login import login_required, current_user
 from decimal import Decimal
 
 from app import db
 from app.forms.account import AccountForm, AccountEditForm, AccountDeleteForm
 from app.models.account import Account
+from app.models.balance_snapshot import AccountBalanceSnapshot
+from app.models.daily_rollup import DailyRollup
+from app.models.money import Money
 from app.models.transaction import Transaction
+from app.utils.accounts import user_accounts
+from app.utils.pagination import paginate_transactions, get_per_page
 from datetime import datetime, timedelta
 
 accounts = Blueprint('accounts', __name__)
@@ -15,37 +21,23 @@ accounts = Blueprint('accounts', __name__)
 @login_required
 def index():
     """List all accounts"""
-    user_accounts = Account.query.filter_by(user_id=current_user.id).all()
-    total_balance = sum(float(account.balance) for account in user_accounts)
-
-    # Get account statistics
-    account_stats = {}
-    max_transactions = 0  # Initialize max_transactions
-
-    for account in user_accounts:
-        # Get monthly transaction totals
-        start_date = datetime.utcnow() - timedelta(days=30)
-        transactions = Transaction.query.filter_by(
-            account_id=account.id,
-            user_id=current_user.id
-        ).filter(
-            Transaction.date >= start_date
-        ).all()
-
-        transaction_count = len(transactions)
-        max_transactions = max(max_transactions, transaction_count)  # Update max_transactions
-
-        income = sum(float(t.amount) for t in transactions if t.transaction_type == 'income')
-        expenses = sum(float(t.amount) for t in transactions if t.transaction_type == 'expense')
-
-        account_stats[account.id] = {
-            'monthly_income': income,
-            'monthly_expenses': expenses,
-            'transaction_count': transaction_count
-        }
+    accounts_list = user_accounts(current_user.id)
+    total_balance = float(sum(Money.of(account.balance) for account in accounts_list))
+
+    # Get monthly transaction totals for every account in one query
+    start_date = datetime.utcnow() - timedelta(days=30)
+    account_stats = Account.get_statistics(
+        current_user.id,
+        [account.id for account in accounts_list],
+        start_date
+    )
+    max_transactions = max(
+        (stats['transaction_count'] for stats in account_stats.values()),
+        default=0
+    )
 
     return render_template('accounts/list.html',
-                           accounts=user_accounts,
+                           accounts=accounts_list,
                            total_balance=total_balance,
                            account_stats=account_stats,
                            max_transactions=max_transactions)  # Pass max_transactions to template
@@ -167,8 +159,10 @@ def delete(account_id):
     if request.method == 'POST' and form.validate():
         if account.balance == 0:
             try:
-                # Delete all associated transactions first
+                # Delete all associated transactions, their rollups and balance snapshots first
                 Transaction.query.filter_by(account_id=account.id).delete()
+                DailyRollup.query.filter_by(account_id=account.id).delete()
+                AccountBalanceSnapshot.query.filter_by(account_id=account.id).delete()
                 db.session.delete(account)
                 db.session.commit()
 
@@ -224,16 +218,36 @@ def view(account_id):
     end_date = datetime.strptime(end_date, '%Y-%m-%d')
 
     # Get transactions for the date range
-    transactions = Transaction.query.filter(
+    query = Transaction.query.filter(
         Transaction.account_id == account_id,
         Transaction.user_id == current_user.id,
         Transaction.date >= start_date,
         Transaction.date <= end_date
-    ).order_by(Transaction.date.desc()).all()
+    )
 
-    # Calculate statistics
-    total_income = sum(float(t.amount) for t in transactions if t.transaction_type == 'income')
-    total_expenses = sum(float(t.amount) for t in transactions if t.transaction_type == 'expense')
+    # Calculate statistics over the whole range, then load a single page of rows
+    totals = Transaction.get_totals(query)
+    total_income = float(totals['income'])
+    total_expenses = float(totals['expense'])
+
+    try:
+        transactions = paginate_transactions(
+            query.options(selectinload(Transaction.account)),
+            get_per_page(request.args, current_app.config),
+            after=request.args.get('after'),
+            before=request.args.get('before')
+        )
+    except ValueError:
+        abort(400)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({
+            'transactions': [t.to_dict() for t in transactions],
+            'next_cursor': transactions.next_cursor,
+            'prev_cursor': transactions.prev_cursor,
+            'total_income': total_income,
+            'total_expenses': total_expenses
+        })
 
     return render_template('accounts/view.html',
                            account=account,
@@ -248,10 +262,13 @@ def view(account_id):
 @accounts.route('/api/<account_id>/balance-history')  # Add '/api/' prefix
 @login_required
 def balance_history(account_id):
-    """API endpoint for account balance history"""
+    """API endpoint for account balance history, one end-of-day balance per day"""
     try:
         # Get days parameter from query string, default to 30
         days = int(request.args.get('days', 30))
+        if days < 0:
+            raise ValueError(days)
+        days = min(days, current_app.config['MAX_BALANCE_HISTORY_DAYS'])
 
         account = Account.query.filter_by(
             id=account_id,
@@ -261,31 +278,11 @@ def balance_history(account_id):
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
 
-        transactions = Transaction.query.filter(
-            Transaction.account_id == account_id,
-            Transaction.user_id == current_user.id,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).order_by(Transaction.date.asc()).all()
-
-        # Calculate daily balances
-        daily_balances = []
-        running_balance = float(account.balance)
-
-        # Work backwards from current balance
-        for transaction in reversed(transactions):
-            if transaction.transaction_type == 'income':
-                running_balance -= float(transaction.amount)
-            else:
-                running_balance += float(transaction.amount)
-
-            daily_balances.append({
-                'date': transaction.date.strftime('%Y-%m-%d'),
-                'balance': round(running_balance, 2)
-            })
-
-        # Sort balances chronologically
-        daily_balances.reverse()
+        # Daily balances are read from the snapshots, not replayed from transactions
+        daily_balances = [{
+            'date': day.strftime('%Y-%m-%d'),
+            'balance': float(balance)
+        } for day, balance in AccountBalanceSnapshot.daily_balances(account.id, start_date, end_date)]
 
         return jsonify({
             'success': True,
@@ -13,7 +13,7 @@ budgets = Blueprint('budgets', __name__, url_prefix='/budgets')  # Add url_prefi
 @login_required
 def index():
     """Display all budgets"""
-    active_budgets = Budget.get_active_budgets(current_user.id)
+    active_budgets = Budget.evaluate_many(Budget.get_active_budgets(current_user.id))
     categories = Category.get_all_categories()
     form = BudgetForm()
 
@@ -47,6 +47,7 @@ def create_budget():
                 notification_threshold=form.notification_threshold.data if hasattr(form,
                                                                                    'notification_threshold') else None
             )
+            Budget.evaluate_many([budget])
             return jsonify(budget.to_dict()), 201
         else:
             return jsonify({'errors': form.errors}), 400
@@ -61,6 +62,7 @@ def create_budget():
 def get_budget(budget_id):
     """Get a specific budget"""
     budget = Budget.query.filter_by(id=budget_id, user_id=current_user.id).first_or_404()
+    Budget.evaluate_many([budget])
     return jsonify(budget.to_dict())
 
 
@@ -88,6 +90,7 @@ def update_budget(budget_id):
                                                                                         'notification_threshold') else None
 
             db.session.commit()
+            Budget.evaluate_many([budget])
             return jsonify(budget.to_dict())
         except ValueError as e:
             db.session.rollback()
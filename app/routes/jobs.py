@@ -0,0 +1,40 @@
+from flask import Blueprint, jsonify, send_file, url_for
+from flask_login import login_required, current_user
+
+from app.models.job import Job
+
+jobs = Blueprint('jobs', __name__)
+
+
+def job_response(job):
+    """Serialize a job with the URLs a client needs to follow it"""
+    data = job.to_dict()
+    data['status_url'] = url_for('jobs.job_status', job_id=job.id)
+    if data['has_result']:
+        data['download_url'] = url_for('jobs.download_result', job_id=job.id)
+    return data
+
+
+@jobs.route('/api/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Get the status and progress of a background job"""
+    job = Job.get_for_user(job_id, current_user.id)
+    return jsonify(job_response(job))
+
+
+@jobs.route('/api/jobs/<job_id>/download')
+@login_required
+def download_result(job_id):
+    """Download the file produced by a finished job"""
+    job = Job.get_for_user(job_id, current_user.id)
+    if job.status != Job.SUCCEEDED or not job.result_path:
+        return jsonify({'error': 'Job has no result yet', 'status': job.status}), 409
+
+    return send_file(
+        job.result_path,
+        mimetype=job.result_mimetype,
+        as_attachment=True,
+        download_name=job.result_name,
+        max_age=0
+    )
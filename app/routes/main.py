@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template
 from flask_login import login_required, current_user
-from app.models.account import Account
 from app.models.transaction import Transaction
 from app.models.budget import Budget
+from app.models.daily_rollup import DailyRollup
+from app.models.money import Money
+from app.utils.accounts import user_accounts
 from datetime import datetime, timedelta
 
 main = Blueprint('main', __name__)
@@ -24,8 +26,8 @@ def get_time_based_greeting():
 @login_required
 def index():
     # Get account summaries
-    accounts = Account.query.filter_by(user_id=current_user.id).all()
-    total_balance = sum(float(account.balance) for account in accounts)
+    accounts = user_accounts(current_user.id)
+    total_balance = float(sum(Money.of(account.balance) for account in accounts))
 
     # Get recent transactions
     recent_transactions = Transaction.query.filter_by(
@@ -38,23 +40,21 @@ def index():
     start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
 
-    month_transactions = Transaction.get_by_date_range(
-        current_user.id,
-        start_of_month,
-        end_of_month
-    )
+    month_totals = {
+        transaction_type: float(abs(total))
+        for transaction_type, total, count in DailyRollup.summarize(
+            current_user.id,
+            'transaction_type',
+            start_date=start_of_month,
+            end_date=end_of_month
+        )
+    }
 
-    total_income = sum(
-        float(t.amount) for t in month_transactions
-        if t.transaction_type == 'income'
-    )
-    total_expenses = sum(
-        float(t.amount) for t in month_transactions
-        if t.transaction_type == 'expense'
-    )
+    total_income = month_totals.get('income', 0)
+    total_expenses = month_totals.get('expense', 0)
 
     # Get active budgets and their status
-    active_budgets = Budget.get_active_budgets(current_user.id)
+    active_budgets = Budget.evaluate_many(Budget.get_active_budgets(current_user.id))
     budget_status = [
         {
             'category': budget.category,
@@ -1,10 +1,14 @@
-from flask import Blueprint, render_template, request, send_file, current_app
+import re
+
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, send_file, abort
 from flask_login import login_required, current_user
 from app.forms.report import ReportFilterForm
 from app.models import Transaction
 from app.utils.filters import ExportFilters
-from app.utils.report_generator import ReportGenerator
-import io
+from app.utils.jobs import enqueue_export
+from app.utils.report_cache import ReportCache
+from app.utils.report_generator import REPORT_MIMETYPES
+from app.routes.jobs import job_response
 
 bp = Blueprint('reports', __name__, url_prefix='/reports')
 
@@ -13,6 +17,7 @@ bp = Blueprint('reports', __name__, url_prefix='/reports')
 @login_required
 def generate_report():
     form = ReportFilterForm(current_user)
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     if request.method == 'POST' and form.validate():
         try:
@@ -25,35 +30,59 @@ def generate_report():
                 format=form.format.data
             )
 
-            # Get transactions based on filters
-            transactions = Transaction.query.filter_by(user_id=current_user.id)
-            transactions = filters.build_query(transactions).order_by(Transaction.date.desc()).all()
+            # Serve a cached copy when the account's data has not changed since it was made
+            cache = ReportCache.from_app()
+            extension = 'xlsx' if filters.format.lower() == 'xlsx' else 'pdf'
+            key = cache.key_for(filters)
+            if cache.get(current_user.id, key, extension):
+                download_url = url_for('reports.download_cached', key=key, format=extension)
+                if is_ajax:
+                    return jsonify({'status': 'succeeded', 'progress': 100, 'download_url': download_url})
+                return redirect(download_url)
 
-            if not transactions:
+            # Check there is something to report before queueing the export
+            transactions = Transaction.query.filter_by(user_id=current_user.id)
+            if filters.build_query(transactions).first() is None:
                 current_app.logger.info(f"No transactions found for the given filters")
-                return render_template('reports/generate.html', form=form,
-                                       error="No transactions found for the selected period")
-
-            # Generate report
-            generator = ReportGenerator(transactions, filters)
-            output, mimetype, filename = generator.export()
+                error = "No transactions found for the selected period"
+                if is_ajax:
+                    return jsonify({'error': error}), 404
+                return render_template('reports/generate.html', form=form, error=error)
 
-            if not isinstance(output, io.BytesIO):
-                output = io.BytesIO(output)
-
-            output.seek(0)
-
-            return send_file(
-                output,
-                mimetype=mimetype,
-                as_attachment=True,
-                download_name=filename,
-                max_age=0  # Prevent caching
-            )
+            # The report file is generated by the background worker (`flask jobs work`)
+            job = enqueue_export(filters)
+            if is_ajax:
+                return jsonify(job_response(job)), 202
+            return render_template('reports/generate.html', form=form, job=job_response(job))
 
         except Exception as e:
             current_app.logger.error(f"Error generating report: {str(e)}")
-            return render_template('reports/generate.html', form=form,
-                                   error="An error occurred while generating the report")
+            error = "An error occurred while generating the report"
+            if is_ajax:
+                return jsonify({'error': error}), 500
+            return render_template('reports/generate.html', form=form, error=error)
+
+    if is_ajax and request.method == 'POST':
+        return jsonify({'error': 'Invalid report filters', 'errors': form.errors}), 400
 
     return render_template('reports/generate.html', form=form)
+
+
+@bp.route('/download/<key>.<format>')
+@login_required
+def download_cached(key, format):
+    """Download a cached report of the current user"""
+    if format not in REPORT_MIMETYPES or not re.fullmatch(r'[0-9a-f]{64}', key):
+        abort(404)
+
+    path = ReportCache.from_app().get(current_user.id, key, format)
+    if not path:
+        abort(404)
+
+    return send_file(
+        path,
+        mimetype=REPORT_MIMETYPES[format],
+        as_attachment=True,
+        download_name=ExportFilters(current_user.id, format=format).get_filename(),
+        max_age=0  # Prevent caching
+    )
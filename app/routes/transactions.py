@@ -1,47 +1,24 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
-import csv
-import io
+from sqlalchemy.orm import selectinload
 
 from app import db
 from app.models.transaction import Transaction
-from app.models.account import Account
 from app.models.category import Category
+from app.models.daily_rollup import DailyRollup
+from app.models.job import Job
+from app.models.search import get_search_backend
+from app.models.time_bucket import INTERVALS, bucket_range, date_bucket
 from app.forms.transaction import TransactionForm, TransactionFilterForm, BulkTransactionForm
+from app.utils.accounts import user_account
+from app.utils.jobs import enqueue_import
+from app.utils.pagination import paginate_transactions, get_per_page
 
 transactions = Blueprint('transactions', __name__)
 
 
-def get_complete_category_summary(user_id, start_date=None, end_date=None):
-    """Get summary for all categories, including those with zero transactions"""
-    # Get all preset categories
-    all_categories = Category.PRESET_CATEGORIES.keys()
-
-    # Initialize summary with zero values for all categories
-    summary = {category: {
-        'income': 0.0,
-        'expense': 0.0,
-        'transaction_count': 0
-    } for category in all_categories}
-
-    # Build query
-    query = Transaction.query.filter_by(user_id=user_id)
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-
-    # Update summary with actual transaction data
-    for transaction in query.all():
-        if transaction.category in summary:
-            summary[transaction.category][transaction.transaction_type] += float(transaction.amount)
-            summary[transaction.category]['transaction_count'] += 1
-
-    return summary
-
-
 @transactions.route('/')
 @login_required
 def index():
@@ -93,24 +70,36 @@ def index():
 
     search = request.args.get('search', '')
     if search:
-        query = query.filter(Transaction.description.ilike(f'%{search}%'))
+        query = get_search_backend().filter(query, search)
 
-    # Execute query
-    transactions = query.order_by(Transaction.date.desc()).all()
+    # Totals and the category summary cover the whole filtered range with one aggregate;
+    # only one page of rows is loaded
+    totals, category_summary = Transaction.get_totals_by_category(query)
+    total_income, total_expenses = totals['income'], totals['expense']
 
-    # Calculate totals
-    total_income = sum(t.amount for t in transactions if t.transaction_type == 'income')
-    total_expenses = sum(t.amount for t in transactions if t.transaction_type == 'expense')
-
-    # Get complete category summary including zero-value categories
-    category_summary = get_complete_category_summary(
-        current_user.id,
-        start_date=start_date,
-        end_date=end_date
-    )
+    try:
+        # No eager load of Transaction.account: the filter form loaded the user's accounts
+        # into the session, so each row's account comes from the identity map
+        page = paginate_transactions(
+            query,
+            get_per_page(request.args, current_app.config),
+            after=request.args.get('after'),
+            before=request.args.get('before')
+        )
+    except ValueError:
+        abort(400)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({
+            'transactions': [t.to_dict() for t in page],
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor,
+            'total_income': float(total_income),
+            'total_expenses': float(total_expenses)
+        })
 
     return render_template('transactions/list.html',
-                           transactions=transactions,
+                           transactions=page,
                            total_income=total_income,
                            total_expenses=total_expenses,
                            categories=Category.PRESET_CATEGORIES,
@@ -135,8 +124,8 @@ def create():
             # Update tag choices before validation
             form.update_tag_choices(form.category.data)
 
-            # Verify account exists
-            account = Account.query.get(form.account_id.data)
+            # Verify the account exists and belongs to the user
+            account = user_account(current_user.id, form.account_id.data)
             if not account:
                 flash(f"Account not found", 'error')
                 return render_template('transactions/create.html',
@@ -235,64 +224,72 @@ def get_category_tags(category):
     return jsonify(tags)
 
 
+@transactions.route('/api/transactions/search')
+@login_required
+def search_transactions():
+    """API endpoint for description search, best matches first"""
+    term = request.args.get('q', '').strip()
+    if not term:
+        return jsonify({'transactions': []})
+
+    limit = max(1, min(request.args.get('limit', 20, type=int), current_app.config['MAX_TRANSACTIONS_PER_PAGE']))
+    query = Transaction.query.filter_by(user_id=current_user.id).options(selectinload(Transaction.account))
+    results = get_search_backend().ranked(query, term).limit(limit).all()
+    return jsonify({'transactions': [t.to_dict() for t in results]})
+
+
 @transactions.route('/api/transactions/stats')
 @login_required
 def transaction_stats():
-    """API endpoint for transaction statistics"""
+    """API endpoint for transaction statistics bucketed by day, week or month"""
+    interval = request.args.get('interval', 'day')
+    if interval not in INTERVALS:
+        return jsonify({'error': f'interval must be one of {", ".join(INTERVALS)}'}), 400
+
     try:
-        # Parse date parameters
         days = int(request.args.get('days', 30))
+    except ValueError:
+        return jsonify({'error': 'days must be a whole number'}), 400
+
+    try:
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
 
-        # Get daily stats
-        daily_stats = {}
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            daily_stats[date_str] = {
-                'income': 0.0,
-                'expense': 0.0,
-                'net': 0.0
-            }
-            current_date += timedelta(days=1)
-
-        # Query transactions for the period
-        transactions = Transaction.query.filter(
-            Transaction.user_id == current_user.id,
-            Transaction.date.between(start_date, end_date)
-        ).all()
-
-        # Update daily stats
-        for transaction in transactions:
-            date_str = transaction.date.strftime('%Y-%m-%d')
-            amount = float(transaction.amount)
-
-            if transaction.transaction_type == 'income':
-                daily_stats[date_str]['income'] += amount
-            else:
-                daily_stats[date_str]['expense'] += amount
-
-            daily_stats[date_str]['net'] = (
-                    daily_stats[date_str]['income'] - daily_stats[date_str]['expense']
-            )
+        # Aggregate the daily rollups into buckets in SQL; only non-empty buckets come back
+        bucket = date_bucket(DailyRollup.day, interval)
+        rows = DailyRollup.summarize(current_user.id, bucket, 'transaction_type',
+                                     start_date=start_date, end_date=end_date)
+
+        # Zero-fill the buckets without transactions
+        stats = {
+            day.strftime('%Y-%m-%d'): {'income': 0.0, 'expense': 0.0, 'net': 0.0}
+            for day in bucket_range(start_date, end_date, interval)
+        }
+
+        transaction_count = 0
+        for day, transaction_type, total, count in rows:
+            stat = stats[day.strftime('%Y-%m-%d')]
+            stat[transaction_type] += float(abs(total))
+            stat['net'] = stat['income'] - stat['expense']
+            transaction_count += int(count)
 
         # Calculate totals
-        total_income = sum(stat['income'] for stat in daily_stats.values())
-        total_expenses = sum(stat['expense'] for stat in daily_stats.values())
+        total_income = sum(stat['income'] for stat in stats.values())
+        total_expenses = sum(stat['expense'] for stat in stats.values())
 
         return jsonify({
-            'daily_stats': daily_stats,
+            'interval': interval,
+            'stats': stats,
             'summary': {
                 'total_income': float(total_income),
                 'total_expenses': float(total_expenses),
                 'net_amount': float(total_income - total_expenses),
-                'transaction_count': len(transactions)
+                'transaction_count': transaction_count
             }
         })
-    except Exception as e:
-        print('Error in transaction_stats:', str(e))  # Add debug print
-        return jsonify({'error': str(e)}), 500
+    except Exception:
+        current_app.logger.exception('Error in transaction_stats')
+        return jsonify({'error': 'Could not load transaction statistics'}), 500
 
 
 @transactions.route('/import', methods=['GET', 'POST'])
@@ -303,51 +300,19 @@ def import_transactions():
 
     if request.method == 'POST' and form.validate():
         try:
-            file = form.file.data
-            account = Account.get_by_id(form.account_id.data)
-
-            stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-            csv_reader = csv.DictReader(stream) if form.has_headers.data else csv.reader(stream)
-
-            transaction_count = 0
-            error_count = 0
-
-            for row in csv_reader:
-                try:
-                    if form.has_headers.data:
-                        transaction = Transaction(
-                            amount=float(row['amount']),
-                            transaction_type=row['type'],
-                            description=row['description'],
-                            date=datetime.strptime(row['date'], '%Y-%m-%d'),
-                            account_id=account.id,
-                            category=row['category'],
-                            tag=row['tag'],
-                            user_id=current_user.id
-                        )
-                    else:
-                        transaction = Transaction(
-                            amount=float(row[0]),
-                            transaction_type=row[1],
-                            description=row[2],
-                            date=datetime.strptime(row[3], '%Y-%m-%d'),
-                            account_id=account.id,
-                            category=row[4],
-                            tag=row[5],
-                            user_id=current_user.id
-                        )
-
-                    transaction.save()
-                    transaction_count += 1
-
-                except Exception as e:
-                    error_count += 1
-                    continue
-
-            flash(f'Imported {transaction_count} transactions successfully. {error_count} errors.', 'success')
-            return redirect(url_for('transactions.index'))
+            account = user_account(current_user.id, form.account_id.data)
+            if not account:
+                abort(404)
+            job = enqueue_import(current_user.id, account.id, form.file.data, has_headers=form.has_headers.data)
+
+            flash('Import started. You can follow its progress below.', 'info')
+            return redirect(url_for('transactions.import_transactions', job=job.id))
 
         except Exception as e:
             flash('Error importing transactions: ' + str(e), 'error')
 
-    return render_template('transactions/import.html', form=form)
+    job = None
+    if request.args.get('job'):
+        job = Job.get_for_user(request.args['job'], current_user.id)
+
+    return render_template('transactions/import.html', form=form, job=job)
@@ -82,50 +82,42 @@ document.addEventListener('DOMContentLoaded', function() {
 
             const response = await fetch(form.action, {
                 method: 'POST',
-                body: formData
+                body: formData,
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
             });
 
             if (!response.ok) {
-                throw new Error('Failed to generate report');
+                const data = await response.json().catch(() => ({}));
+                throw new Error(data.error || 'Failed to generate report');
             }
 
-            const blob = await response.blob();
-
-            // Create download link
-            const url = window.URL.createObjectURL(blob);
-            const a = document.createElement('a');
-            a.style.display = 'none';
-            a.href = url;
-
-            // Get the proper file extension
-            const format = formData.get('format');
-            const timestamp = formatDate(new Date());
-            let filename = `spending_report_${timestamp}`;
-
-            // Set proper extension based on format
-            if (format === 'xlsx') {
-                filename += '.xlsx';
-                a.setAttribute('download', filename); // Explicitly set download attribute
-            } else {
-                filename += '.pdf';
-                a.setAttribute('download', filename);
+            // The report is built by a background worker; wait for it, then download
+            const job = await waitForJob(await response.json(), submitBtn);
+            if (job.status !== 'succeeded') {
+                throw new Error(job.error || 'Failed to generate report');
             }
 
-            document.body.appendChild(a);
-            a.click();
-            window.URL.revokeObjectURL(url);
-            document.body.removeChild(a);
+            window.location.href = job.download_url;
 
         } catch (error) {
             console.error('Error:', error);
-            showError('Failed to generate report. Please try again.');
+            showError(error.message || 'Failed to generate report. Please try again.');
         } finally {
             submitBtn.disabled = false;
             submitBtn.innerHTML = '<i class="fas fa-file-export"></i> Generate Report';
         }
     }
 
-    function formatDate(date) {
-        return date.toISOString().split('T')[0].replace(/-/g, '');
+    async function waitForJob(job, submitBtn) {
+        while (job.status === 'queued' || job.status === 'running') {
+            submitBtn.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Generating... ${job.progress}%`;
+            await new Promise(resolve => setTimeout(resolve, 1000));
+
+            const response = await fetch(job.status_url, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+            });
+            job = await response.json();
+        }
+        return job;
     }
 });
@@ -5,6 +5,34 @@ document.addEventListener('DOMContentLoaded', function() {
     const previewContent = preview.querySelector('.preview-content');
     const importButton = document.getElementById('importButton');
     const downloadSampleBtn = document.getElementById('downloadSample');
+    const jobStatus = document.getElementById('jobStatus');
+
+    // Follow a queued import until the worker finishes it
+    if (jobStatus) {
+        pollJob(jobStatus.dataset.statusUrl);
+    }
+
+    async function pollJob(statusUrl) {
+        const progress = document.getElementById('jobProgress');
+        const message = document.getElementById('jobMessage');
+
+        try {
+            const response = await fetch(statusUrl, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' }
+            });
+            const job = await response.json();
+
+            progress.value = job.progress;
+            message.textContent = job.error || job.message || job.status;
+
+            if (job.status !== 'succeeded' && job.status !== 'failed') {
+                setTimeout(() => pollJob(statusUrl), 1000);
+            }
+        } catch (error) {
+            console.error('Error:', error);
+            message.textContent = 'Could not load import progress.';
+        }
+    }
 
     // Handle drag and drop events
     ['dragenter', 'dragover', 'dragleave', 'drop'].forEach(eventName => {
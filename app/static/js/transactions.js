@@ -210,7 +210,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     async function fetchCashFlowData(days) {
         try {
-            const response = await fetch(`/api/transactions/stats?days=${days}`);
+            // Long ranges are charted by week or month so the point count stays small
+            const interval = days > 365 ? 'month' : days > 90 ? 'week' : 'day';
+            const response = await fetch(`/transactions/api/transactions/stats?days=${days}&interval=${interval}`);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
@@ -222,11 +224,11 @@ document.addEventListener('DOMContentLoaded', function() {
 
             console.log('API Response:', data); // Debug log
 
-            const sortedDates = Object.keys(data.daily_stats).sort();
+            const sortedDates = Object.keys(data.stats).sort();
             const chartData = {
                 labels: sortedDates.map(date => new Date(date).toLocaleDateString()),
-                income: sortedDates.map(date => data.daily_stats[date].income || 0),
-                expenses: sortedDates.map(date => data.daily_stats[date].expense || 0)
+                income: sortedDates.map(date => data.stats[date].income || 0),
+                expenses: sortedDates.map(date => data.stats[date].expense || 0)
             };
 
             console.log('Processed Chart Data:', chartData); // Debug log
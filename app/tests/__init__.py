@@ -2,9 +2,16 @@
 Test suite initialization.
 This module provides common test data and utilities used across test modules.
 """
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import datetime, timedelta
 
+from flask import request
+from flask_login import login_user
+from sqlalchemy import event
+
+from app.models import Transaction
+
 __version__ = '1.0.0'
 
 # Test Data Constants
@@ -44,3 +51,39 @@ TEST_CONFIG = {
     'WTF_CSRF_ENABLED': False,
     'SECRET_KEY': 'test-secret-key'
 }
+
+
+@contextmanager
+def record_queries(engine):
+    """Record every statement executed on the engine as (statement, params) pairs."""
+    statements = []
+
+    def _before_execute(conn, clauseelement, multiparams, params, execution_options):
+        statements.append((clauseelement, multiparams[0] if multiparams else params))
+
+    event.listen(engine, 'before_execute', _before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_execute', _before_execute)
+
+
+def add_transaction(user, account, **overrides):
+    """Save a transaction in the user's account: a 10.00 Food / Groceries expense made now unless overridden."""
+    fields = dict(amount='10.00', transaction_type='expense', category='Food', tag='Groceries')
+    fields.update(overrides)
+    transaction = Transaction(user_id=user.id, account_id=account.id, **fields)
+    transaction.save()
+    return transaction
+
+
+def dispatch_request(app, user, url, **kwargs):
+    """Run the view behind a URL as the given user and return its response.
+
+    Views are called inside a test request context rather than through the
+    test client so the shared session app never handles a real request.
+    """
+    with app.test_request_context(url, **kwargs):
+        login_user(user)
+        view = app.view_functions[request.endpoint]
+        return app.make_response(view(**request.view_args))
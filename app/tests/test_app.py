@@ -0,0 +1,44 @@
+"""
+Tests for the application factory.
+"""
+import os
+
+from alembic.script import ScriptDirectory
+from flask import has_app_context
+
+from app import create_app, db
+from app.commands import schema_cli
+from app.config import TestingConfig
+
+
+def test_factory_leaves_no_context_pushed():
+    """Each request, thread or greenlet must get its own app context and g"""
+    app = create_app(TestingConfig)
+
+    assert not has_app_context()
+    with app.app_context():
+        assert 'auth.login' in app.view_functions
+
+
+def test_schema_create(tmp_path):
+    """The factory leaves the schema alone; `flask schema create` sets up a new database"""
+    class NewDatabaseConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'new.db'}"
+
+    app = create_app(NewDatabaseConfig)
+    with app.app_context():
+        assert db.inspect(db.engine).get_table_names() == []
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(schema_cli, ['create'])
+    assert 'at the latest migration' in result.output
+
+    with app.app_context():
+        assert 'transactions' in db.inspect(db.engine).get_table_names()
+        version = db.session.execute(db.text('SELECT version_num FROM alembic_version')).scalar()
+        db.engine.dispose()
+    head = ScriptDirectory(os.path.join(os.path.dirname(app.root_path), 'migrations')).get_current_head()
+    assert version == head
+
+    result = runner.invoke(schema_cli, ['create'])
+    assert 'missing tables' in result.output
@@ -0,0 +1,118 @@
+"""
+Tests for upgrading a database created before the migrations.
+"""
+import os
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Account, AccountBalanceSnapshot, Budget, DailyRollup, Transaction
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The tables as the first release created them, before any migration
+BASELINE_SCHEMA = [
+    """CREATE TABLE users (
+           id VARCHAR(36) PRIMARY KEY, created_at TIMESTAMP, updated_at TIMESTAMP,
+           username VARCHAR(80) NOT NULL UNIQUE, email VARCHAR(120) NOT NULL UNIQUE,
+           password_hash VARCHAR(256) NOT NULL, is_active BOOLEAN)""",
+    """CREATE TABLE accounts (
+           id VARCHAR(36) PRIMARY KEY, created_at TIMESTAMP, updated_at TIMESTAMP,
+           name VARCHAR(100) NOT NULL, account_type VARCHAR(50) NOT NULL, currency VARCHAR(3) NOT NULL,
+           balance NUMERIC(10, 2) NOT NULL, description TEXT,
+           user_id VARCHAR(50) NOT NULL REFERENCES users (id))""",
+    """CREATE TABLE transactions (
+           id VARCHAR(36) PRIMARY KEY, created_at TIMESTAMP, updated_at TIMESTAMP,
+           amount NUMERIC(10, 2) NOT NULL, transaction_type VARCHAR(20) NOT NULL, description TEXT,
+           date TIMESTAMP NOT NULL, category VARCHAR(100) NOT NULL, tag VARCHAR(100) NOT NULL,
+           user_id VARCHAR(50) NOT NULL REFERENCES users (id),
+           account_id VARCHAR(50) NOT NULL REFERENCES accounts (id))""",
+    """CREATE TABLE budgets (
+           id VARCHAR(36) PRIMARY KEY, created_at TIMESTAMP, updated_at TIMESTAMP,
+           amount NUMERIC(10, 2) NOT NULL, start_date TIMESTAMP NOT NULL, end_date TIMESTAMP NOT NULL,
+           notification_threshold INTEGER, category VARCHAR(100) NOT NULL, tag VARCHAR(100),
+           user_id VARCHAR(50) NOT NULL REFERENCES users (id))""",
+]
+
+BASELINE_DATA = [
+    "INSERT INTO users (id, username, email, password_hash, is_active) "
+    "VALUES ('u1', 'saver', 'saver@example.com', 'x', TRUE)",
+    "INSERT INTO accounts (id, name, account_type, currency, balance, user_id) "
+    "VALUES ('a1', 'Main', 'bank', 'USD', 280.25, 'u1')",
+    "INSERT INTO transactions (id, amount, transaction_type, description, date, category, tag, user_id, account_id) "
+    "VALUES ('t1', 200.00, 'income', 'Salary', '2025-03-01 09:00:00', 'Income', 'Salary', 'u1', 'a1')",
+    "INSERT INTO transactions (id, amount, transaction_type, description, date, category, tag, user_id, account_id) "
+    "VALUES ('t2', 12.50, 'expense', 'Lunch', '2025-03-02 12:00:00', 'Food', 'Snacks', 'u1', 'a1')",
+    "INSERT INTO transactions (id, amount, transaction_type, description, date, category, tag, user_id, account_id) "
+    "VALUES ('t3', 7.25, 'expense', 'Coffee', '2025-03-02 16:00:00', 'Food', 'Beverages', 'u1', 'a1')",
+    "INSERT INTO budgets (id, amount, start_date, end_date, notification_threshold, category, user_id) "
+    "VALUES ('b1', 50.00, '2025-03-01 00:00:00', '2025-03-31 00:00:00', 80, 'Food', 'u1')",
+]
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def baseline_uri(request, tmp_path):
+    """A database holding data in the tables of the first release"""
+    if request.param == 'sqlite':
+        uri = f"sqlite:///{tmp_path / 'baseline.db'}"
+    else:
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+
+    engine = create_engine(uri)
+    with engine.begin() as connection:
+        if engine.dialect.name == 'postgresql':
+            connection.execute(text('DROP SCHEMA public CASCADE'))
+            connection.execute(text('CREATE SCHEMA public'))
+        for statement in BASELINE_SCHEMA + BASELINE_DATA:
+            connection.execute(text(statement))
+    engine.dispose()
+    yield uri
+
+    if request.param == 'postgresql':
+        engine = create_engine(uri)
+        with engine.begin() as connection:
+            connection.execute(text('DROP SCHEMA public CASCADE'))
+            connection.execute(text('CREATE SCHEMA public'))
+        engine.dispose()
+
+
+def flask(uri, *args):
+    env = dict(os.environ, DATABASE_URI=uri, PYTHONPATH=ROOT)
+    env.pop('DATABASE_URL', None)
+    return subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi', *args],
+                          cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+
+
+def test_release_upgrades_baseline_database(baseline_uri):
+    """The release steps keep balances, budgets and totals in the right units"""
+    flask(baseline_uri, 'schema', 'create')
+    flask(baseline_uri, 'db', 'upgrade')
+
+    class UpgradedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = baseline_uri
+
+    app = create_app(UpgradedConfig)
+    with app.app_context():
+        account = db.session.get(Account, 'a1')
+        assert account.balance == Decimal('280.25')
+        assert account.opening_balance == Decimal('100.00')
+        assert db.session.get(Budget, 'b1').amount == Decimal('50.00')
+
+        assert {t.id: t.signed_amount for t in Transaction.query} == {
+            't1': Decimal('200.00'), 't2': Decimal('-12.50'), 't3': Decimal('-7.25')}
+        assert Account.reconcile_balances(dry_run=True) == []
+
+        totals = {transaction_type: (total, count) for transaction_type, total, count
+                  in DailyRollup.summarize('u1', 'transaction_type')}
+        assert totals == {'income': (Decimal('200.00'), 1), 'expense': (Decimal('-19.75'), 2)}
+        assert AccountBalanceSnapshot.balance_at('a1', date(2025, 3, 1)) == Decimal('300.00')
+        assert AccountBalanceSnapshot.balance_at('a1', date(2025, 3, 2)) == Decimal('280.25')
+        db.engine.dispose()
@@ -0,0 +1,4 @@
+"""
+Model tests package initialization.
+Provides helpers for inspecting the SQL emitted by models and routes.
+"""
@@ -0,0 +1,202 @@
+"""
+Tests for account statistics.
+"""
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import Account, Transaction
+from .. import TEST_DATA, add_transaction, dispatch_request, record_queries
+
+
+def add_account(user, name):
+    account = Account()
+    account.name = name
+    account.account_type = TEST_DATA['account']['account_type']
+    account.currency = TEST_DATA['account']['currency']
+    account.balance = TEST_DATA['account']['initial_balance']
+    account.user_id = user.id
+    account.save()
+    return account
+
+
+def add_transactions(user, account, count, **overrides):
+    for _ in range(count):
+        add_transaction(user, account, **overrides)
+
+
+class TestAccountStatistics:
+    """Test cases for Account.get_statistics."""
+
+    def test_statistics_per_account(self, test_user, test_account):
+        other = add_account(test_user, 'Savings')
+        idle = add_account(test_user, 'Idle')
+        add_transactions(test_user, test_account, 2, transaction_type='income')
+        add_transactions(test_user, test_account, 3)
+        add_transactions(test_user, test_account, 4, date=datetime.utcnow() - timedelta(days=45))
+        add_transactions(test_user, other, 1)
+
+        stats = Account.get_statistics(test_user.id, [test_account.id, other.id, idle.id],
+                                       datetime.utcnow() - timedelta(days=30))
+
+        assert stats[test_account.id] == {
+            'monthly_income': 20.0,
+            'monthly_expenses': 30.0,
+            'transaction_count': 5
+        }
+        assert stats[other.id]['transaction_count'] == 1
+        assert stats[idle.id] == {'monthly_income': 0.0, 'monthly_expenses': 0.0, 'transaction_count': 0}
+
+    def test_statistics_single_query(self, test_user, test_account):
+        accounts = [test_account] + [add_account(test_user, f'Account {i}') for i in range(4)]
+        for account in accounts:
+            add_transactions(test_user, account, 2)
+        user_id, account_ids = test_user.id, [account.id for account in accounts]
+
+        with record_queries(db.engine) as statements:
+            Account.get_statistics(user_id, account_ids, datetime.utcnow() - timedelta(days=30))
+
+        assert len(statements) == 1
+
+    def test_index_query_count_independent_of_accounts(self, app, test_user, test_account):
+        """Regression test: the accounts page must not issue a query per account."""
+        add_transactions(test_user, test_account, 2)
+        with record_queries(db.engine) as statements:
+            dispatch_request(app, test_user, '/accounts/')
+        baseline = len(statements)
+
+        for i in range(10):
+            add_transactions(test_user, add_account(test_user, f'Account {i}'), 2)
+        with record_queries(db.engine) as statements:
+            response = dispatch_request(app, test_user, '/accounts/')
+
+        assert response.status_code == 200
+        assert len(statements) == baseline
+
+
+class TestAccountDataVersion:
+    """The data version changes with every write that affects an account's reports."""
+
+    def version(self, account):
+        return Account.get_data_version(account.user_id, account.id)
+
+    def test_transaction_writes_bump_version(self, test_user, test_account):
+        versions = [self.version(test_account)]
+
+        add_transactions(test_user, test_account, 1)
+        versions.append(self.version(test_account))
+
+        transaction = Transaction.query.one()
+        transaction.description = 'Edited'
+        transaction.save()
+        versions.append(self.version(test_account))
+
+        transaction.delete()
+        versions.append(self.version(test_account))
+
+        assert versions == sorted(set(versions))
+
+    def test_moving_transaction_bumps_both_accounts(self, test_user, test_account):
+        other = add_account(test_user, 'Savings')
+        add_transactions(test_user, test_account, 1)
+        before = self.version(test_account), self.version(other)
+
+        transaction = Transaction.query.one()
+        transaction.account_id = other.id
+        transaction.account = other
+        transaction.save()
+
+        assert self.version(test_account) > before[0]
+        assert self.version(other) > before[1]
+
+    def test_detail_edit_bumps_version(self, test_user, test_account):
+        before = self.version(test_account)
+        account = db.session.get(Account, test_account.id)
+        account.description = 'Only the description'
+        db.session.commit()
+        assert self.version(test_account) == before
+
+        account.currency = 'EUR'
+        db.session.commit()
+        assert self.version(test_account) == before + 1
+
+    def test_combined_version_for_all_accounts(self, test_user, test_account):
+        other = add_account(test_user, 'Savings')
+        before = Account.get_data_version(test_user.id)
+
+        add_transactions(test_user, other, 1)
+
+        assert Account.get_data_version(test_user.id) != before
+
+
+class TestBalanceUpdates:
+    """Balances change by SQL deltas inside the writer's database transaction."""
+
+    def stored_balance(self, account):
+        with db.engine.connect() as connection:
+            return connection.execute(db.select(Account.balance).where(Account.id == account.id)).scalar()
+
+    def test_concurrent_writer_is_not_overwritten(self, test_user, test_account):
+        initial = test_account.balance
+        # Another writer changes the balance after this session loaded the account
+        with db.engine.begin() as connection:
+            connection.execute(db.update(Account).where(Account.id == test_account.id)
+                               .values(balance=Account.balance + 5))
+
+        add_transactions(test_user, test_account, 1)
+
+        assert self.stored_balance(test_account) == initial + 5 - 10
+
+    def test_one_commit_per_save(self, test_user, test_account):
+        commits = []
+
+        def on_commit(connection):
+            commits.append(connection)
+
+        db.event.listen(db.engine, 'commit', on_commit)
+        try:
+            with record_queries(db.engine) as statements:
+                add_transactions(test_user, test_account, 1)
+        finally:
+            db.event.remove(db.engine, 'commit', on_commit)
+
+        assert len(commits) == 1
+        assert any('balance=(accounts.balance +' in str(statement) for statement, _ in statements)
+
+    def test_edit_reverses_stored_amount(self, test_user, test_account):
+        initial = test_account.balance
+        add_transactions(test_user, test_account, 1)
+
+        transaction = Transaction.query.one()
+        transaction.amount = '25.00'
+        transaction.save()
+        assert self.stored_balance(test_account) == initial - 25
+
+        transaction.transaction_type = 'income'
+        transaction.save()
+        assert self.stored_balance(test_account) == initial + 25
+
+        other = add_account(test_user, 'Savings')
+        transaction.account_id = other.id
+        transaction.save()
+        assert self.stored_balance(test_account) == initial
+        assert self.stored_balance(other) == other.opening_balance + 25
+
+        transaction.delete()
+        assert self.stored_balance(other) == other.opening_balance
+
+    def test_reconcile_reports_and_fixes_drift(self, app, test_user, test_account):
+        from app.commands import balances_cli
+        add_transactions(test_user, test_account, 2)
+        expected = self.stored_balance(test_account)
+        with db.engine.begin() as connection:
+            connection.execute(db.update(Account).where(Account.id == test_account.id).values(balance=999))
+
+        drift = Account.reconcile_balances(dry_run=True)
+        assert [(account_id, ledger) for account_id, _, ledger in drift] == [(test_account.id, expected)]
+        assert self.stored_balance(test_account) == 999
+
+        result = app.test_cli_runner().invoke(balances_cli, ['reconcile'])
+        assert result.exit_code == 0, result.output
+        assert 'Corrected 1 drifted balances.' in result.output
+        assert self.stored_balance(test_account) == expected
+        assert Account.reconcile_balances(dry_run=True) == []
@@ -0,0 +1,161 @@
+"""
+Tests for end-of-day account balance snapshots.
+"""
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app import db
+from app.commands import balances_cli
+from app.models import Account, AccountBalanceSnapshot, Transaction
+from app.utils.transaction_import import TransactionImporter
+from .. import add_transaction, dispatch_request, record_queries
+
+
+def snapshots(account):
+    return [(s.day, s.balance) for s in
+            AccountBalanceSnapshot.query.filter_by(account_id=account.id).order_by(AccountBalanceSnapshot.day)]
+
+
+class TestBalanceSnapshots:
+    """Snapshots follow every transaction save, edit, delete and import."""
+
+    def test_opening_balance_defaults_to_initial_balance(self, test_account):
+        assert test_account.opening_balance == test_account.balance
+        assert test_account.balance_at(date(2000, 1, 1)) == test_account.balance
+
+    def test_save_and_backdated_save(self, test_user, test_account):
+        opening = test_account.opening_balance
+        add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                        date=datetime(2025, 3, 1, 10))
+        add_transaction(test_user, test_account, amount='30.00', date=datetime(2025, 3, 5, 10))
+        add_transaction(test_user, test_account, amount='5.00', date=datetime(2025, 3, 3, 10))
+
+        assert snapshots(test_account) == [
+            (date(2025, 3, 1), opening + 100),
+            (date(2025, 3, 3), opening + 95),
+            (date(2025, 3, 5), opening + 65),
+        ]
+        assert test_account.balance_at(date(2025, 2, 28)) == opening
+        assert test_account.balance_at(date(2025, 3, 4)) == opening + 95
+        assert test_account.balance_at(date(2030, 1, 1)) == test_account.balance
+
+    def test_edit_moves_the_change(self, test_user, test_account):
+        opening = test_account.opening_balance
+        transaction = add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                                      date=datetime(2025, 3, 5, 10))
+
+        transaction.date = datetime(2025, 3, 1, 10)
+        transaction.amount = Decimal('40.00')
+        transaction.save()
+
+        assert snapshots(test_account) == [(date(2025, 3, 1), opening + 40)]
+
+    def test_edit_with_a_form_date(self, test_user, test_account):
+        """The edit form sets a plain date on a transaction stored with a datetime"""
+        opening = test_account.opening_balance
+        transaction = add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                                      date=datetime(2025, 3, 5, 10))
+
+        transaction.date = date(2025, 3, 1)
+        transaction.save()
+
+        assert snapshots(test_account) == [(date(2025, 3, 1), opening + 100)]
+
+    def test_delete_and_move_between_accounts(self, test_user, test_account):
+        other = Account(name='Savings', account_type='bank', balance=Decimal('50.00'), user_id=test_user.id)
+        other.save()
+        opening = test_account.opening_balance
+        transaction = add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                                      date=datetime(2025, 3, 1, 10))
+
+        transaction.account_id = other.id
+        transaction.account = other
+        transaction.save()
+        assert snapshots(test_account) == []
+        assert other.balance_at(date(2025, 3, 1)) == Decimal('150.00')
+
+        Transaction.query.get(transaction.id).delete()
+        assert snapshots(other) == []
+        assert test_account.balance_at(date(2025, 3, 1)) == opening
+
+    def test_backdated_write_moves_later_snapshots_in_place(self, test_user, test_account):
+        for day in range(2, 30):
+            add_transaction(test_user, test_account, amount='1.00', transaction_type='income',
+                            date=datetime(2025, 3, day, 10))
+        before = snapshots(test_account)
+
+        with record_queries(db.engine) as statements:
+            add_transaction(test_user, test_account, amount='10.00', date=datetime(2025, 3, 1, 10))
+        writes = [str(statement) for statement, _ in statements
+                  if 'account_balance_snapshots' in str(statement) and not str(statement).startswith('SELECT')]
+
+        # Later days move with one UPDATE and only the new day is inserted
+        assert [write.split()[0] for write in writes] == ['UPDATE', 'INSERT']
+        assert snapshots(test_account) == [(date(2025, 3, 1), test_account.opening_balance - 10)] + [
+            (day, balance - 10) for day, balance in before]
+
+    def test_writes_match_a_rebuild(self, test_user, test_account):
+        """Saves, edits, moves within the account and deletes leave the same snapshots as a rebuild"""
+        kept = add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                               date=datetime(2025, 3, 1, 10))
+        moved = add_transaction(test_user, test_account, amount='30.00', date=datetime(2025, 3, 5, 10))
+        add_transaction(test_user, test_account, amount='7.00', date=datetime(2025, 3, 9, 10))
+        emptied = add_transaction(test_user, test_account, amount='4.00', date=datetime(2025, 3, 7, 10))
+
+        moved.date = datetime(2025, 3, 3, 10)
+        moved.transaction_type = 'income'
+        moved.save()
+        kept.amount = Decimal('60.00')
+        kept.save()
+        emptied.delete()
+        written = snapshots(test_account)
+
+        AccountBalanceSnapshot.rebuild(test_account.id)
+        assert written == snapshots(test_account)
+        assert [day for day, _ in written] == [date(2025, 3, 1), date(2025, 3, 3), date(2025, 3, 9)]
+
+    def test_import_and_rebuild(self, app, test_user, test_account):
+        opening = test_account.opening_balance
+        stream = io.BytesIO(b'amount,type,description,date,category,tag\n'
+                            b'10.00,income,A,2025-03-01,Food,Groceries\n'
+                            b'4.00,expense,B,2025-03-02,Food,Groceries\n')
+        TransactionImporter(test_account, test_user.id).run(stream)
+        imported = snapshots(test_account)
+        assert imported == [(date(2025, 3, 1), opening + 10), (date(2025, 3, 2), opening + 6)]
+
+        AccountBalanceSnapshot.query.delete()
+        db.session.commit()
+        result = app.test_cli_runner().invoke(balances_cli, ['rebuild-snapshots', '--account-id', test_account.id])
+
+        assert result.exit_code == 0, result.output
+        assert snapshots(test_account) == imported
+
+
+class TestBalanceHistory:
+    """The balance history endpoint returns one point per day."""
+
+    def test_daily_points(self, app, test_user, test_account):
+        opening = float(test_account.opening_balance)
+        today = datetime.utcnow()
+        add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                        date=today - timedelta(days=3))
+        add_transaction(test_user, test_account, amount='25.00', date=today - timedelta(days=3))
+        add_transaction(test_user, test_account, amount='10.00', date=today - timedelta(days=1))
+
+        response = dispatch_request(app, test_user, f'/accounts/api/{test_account.id}/balance-history?days=5')
+        balances = json.loads(response.get_data())['balances']
+
+        assert len(balances) == 6
+        assert [point['balance'] for point in balances] == [opening, opening, opening + 75, opening + 75,
+                                                            opening + 65, opening + 65]
+        assert balances[-1]['date'] == today.strftime('%Y-%m-%d')
+
+    def test_years_of_history(self, app, test_user, test_account):
+        response = dispatch_request(app, test_user, f'/accounts/api/{test_account.id}/balance-history?days=1825')
+        assert len(json.loads(response.get_data())['balances']) == 1826
+
+    def test_days_capped_at_five_years(self, app, test_user, test_account):
+        response = dispatch_request(app, test_user, f'/accounts/api/{test_account.id}/balance-history?days=100000')
+        assert len(json.loads(response.get_data())['balances']) == 1826
@@ -0,0 +1,84 @@
+"""
+Tests for budget spending evaluation.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Budget
+from app.models.money import Money
+from .. import add_transaction, record_queries
+
+
+def add_budget(user, category, tag=None, amount=100):
+    now = datetime.utcnow()
+    budget = Budget(amount=amount, category=category, tag=tag, user_id=user.id,
+                    start_date=now, end_date=now + timedelta(days=30))
+    budget.save()
+    return budget
+
+
+@pytest.fixture
+def spending(database, test_user, test_account):
+    """Expenses spread across categories, tags and dates around the budget period."""
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+    add_transaction(test_user, test_account, amount='50.00', date=tomorrow)
+    add_transaction(test_user, test_account, amount='20.00', tag='Dining Out', date=tomorrow)
+    add_transaction(test_user, test_account, amount='30.00', date=datetime.utcnow() - timedelta(days=10))
+    add_transaction(test_user, test_account, amount='40.00', category='Transport', tag='Fuel', date=tomorrow)
+    add_transaction(test_user, test_account, amount='500.00', transaction_type='income', date=tomorrow)
+
+
+class TestBudgetEvaluation:
+    """Test cases for batched budget evaluation."""
+
+    def test_evaluate_many_matches_single_queries(self, test_user, spending):
+        budgets = [
+            add_budget(test_user, 'Food', 'Groceries'),
+            add_budget(test_user, 'Food'),
+            add_budget(test_user, 'Transport', amount=30),
+            add_budget(test_user, 'Healthcare'),
+        ]
+        expected = []
+        for budget in budgets:
+            expected.append(budget.get_spent_amount())
+            db.session.expire(budget)
+
+        Budget.evaluate_many(budgets)
+
+        assert [budget.get_spent_amount() for budget in budgets] == expected
+        assert expected == [Decimal('50.00'), Decimal('70.00'), Decimal('40.00'), Decimal('0')]
+        assert budgets[2].is_exceeded()
+
+    def test_evaluate_many_uses_one_query(self, test_user, spending):
+        budgets = [add_budget(test_user, category) for category in ('Food', 'Transport', 'Home')]
+        budgets = Budget.get_active_budgets(test_user.id)
+
+        with record_queries(db.engine) as statements:
+            Budget.evaluate_many(budgets)
+            for budget in budgets:
+                budget.to_dict()
+                budget.should_notify()
+
+        assert len(statements) == 1
+
+    def test_memoized_amount_cleared_on_commit(self, test_user, test_account, spending):
+        budget = add_budget(test_user, 'Transport')
+        assert budget.get_spent_amount() == Decimal('40.00')
+
+        add_transaction(test_user, test_account, amount='15.00', category='Transport', tag='Fuel',
+                        date=datetime.utcnow() + timedelta(days=1))
+
+        assert budget.get_spent_amount() == Decimal('55.00')
+
+    def test_amount_assigned_as_float(self, test_user, spending):
+        budget = add_budget(test_user, 'Transport')
+        budget.amount = float('80.00')
+
+        assert isinstance(budget.amount, Money)
+        assert budget.get_spending_percentage() == Decimal('50.00')
+
+    def test_evaluate_many_empty(self):
+        assert Budget.evaluate_many([]) == []
@@ -0,0 +1,110 @@
+"""
+Tests for incrementally maintained daily rollups.
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import DailyRollup, Transaction
+from app.commands import rollups_cli
+from .. import add_transaction
+
+
+def rollup_rows():
+    return sorted(
+        (r.day, r.account_id, r.category, r.tag, r.transaction_type, r.total_amount, r.transaction_count)
+        for r in DailyRollup.query.filter(DailyRollup.transaction_count != 0).all()
+    )
+
+
+@pytest.fixture
+def ledger(test_user, test_account):
+    """A handful of transactions over two days and two categories."""
+    return [
+        add_transaction(test_user, test_account, amount='12.50', date=datetime(2025, 3, 14, 12, 30)),
+        add_transaction(test_user, test_account, amount='7.50', date=datetime(2025, 3, 14, 18, 0)),
+        add_transaction(test_user, test_account, amount='40.00', category='Transport', tag='Fuel',
+                        date=datetime(2025, 3, 15, 9, 0)),
+        add_transaction(test_user, test_account, amount='900.00', category='Salary', tag='Base Pay',
+                        transaction_type='income', date=datetime(2025, 3, 15, 9, 0)),
+    ]
+
+
+class TestDailyRollupMaintenance:
+    """Rollups follow every transaction save, edit and delete."""
+
+    def test_save_accumulates_per_day(self, test_user, ledger):
+        food = DailyRollup.query.filter_by(category='Food').one()
+        assert food.day == datetime(2025, 3, 14).date()
+        assert food.total_amount == Decimal('-20.00')  # expenses are negative
+        assert food.transaction_count == 2
+
+    def test_edit_moves_totals(self, test_user, ledger):
+        transaction = ledger[0]
+        transaction.amount = Decimal('30.00')
+        transaction.category = 'Entertainment'
+        transaction.tag = 'Movies'
+        transaction.save()
+
+        food = DailyRollup.query.filter_by(category='Food').one()
+        assert (food.total_amount, food.transaction_count) == (Decimal('-7.50'), 1)
+        movies = DailyRollup.query.filter_by(category='Entertainment').one()
+        assert (movies.total_amount, movies.transaction_count) == (Decimal('-30.00'), 1)
+
+    def test_save_without_changes_is_idempotent(self, ledger):
+        before = rollup_rows()
+        ledger[2].save()
+        assert rollup_rows() == before
+
+    def test_delete_reverses_rollup(self, test_user, ledger):
+        ledger[2].delete()
+
+        assert DailyRollup.query.filter_by(category='Transport').one().transaction_count == 0
+        assert 'Transport' not in Transaction.get_category_summary(test_user.id)
+
+    def test_rebuild_matches_incremental_rollups(self, test_user, ledger):
+        ledger[0].delete()
+        incremental = rollup_rows()
+
+        written = DailyRollup.rebuild()
+
+        assert written == len(incremental)
+        assert rollup_rows() == incremental
+
+    def test_rebuild_command(self, app, test_user, ledger):
+        DailyRollup.query.delete()
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(rollups_cli, ['rebuild', '--user-id', test_user.id])
+
+        assert 'Rebuilt 3 daily rollup rows' in result.output
+        assert len(rollup_rows()) == 3
+
+
+class TestRollupSummaries:
+    """Aggregate helpers read from rollups with the same results as a raw scan."""
+
+    def test_category_summary(self, test_user, ledger):
+        summary = Transaction.get_category_summary(test_user.id)
+
+        assert summary['Food']['expense'] == 20.0
+        assert summary['Food']['tags']['Groceries']['expense'] == 20.0
+        assert summary['Salary']['income'] == 900.0
+        assert summary['Transport']['icon'] == 'car'
+
+    def test_category_summary_date_range(self, test_user, ledger):
+        summary = Transaction.get_category_summary(test_user.id,
+                                                   start_date=datetime(2025, 3, 15),
+                                                   end_date=datetime(2025, 3, 15))
+        assert set(summary) == {'Transport', 'Salary'}
+
+    def test_tag_summary(self, test_user, ledger):
+        summary = Transaction.get_tag_summary(test_user.id, category='Food')
+        assert summary == {'Groceries': {'income': 0, 'expense': 20.0, 'category': 'Food'}}
+
+    def test_user_category_stats(self, test_user, ledger):
+        stats = test_user.get_category_stats()
+        assert stats['Food']['transaction_count'] == 2
+        assert stats['Salary']['income'] == 900.0
@@ -0,0 +1,63 @@
+"""
+Tests for the database engine profiles.
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.config import Config
+from app.models.engine import configure_engine, engine_options, engine_profile
+
+
+def config(uri, **settings):
+    values = {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+    values.update(SQLALCHEMY_DATABASE_URI=uri, **settings)
+    return values
+
+
+class TestEngineProfile:
+    """The profile follows the database URI unless configured otherwise."""
+
+    def test_selected_by_backend(self):
+        assert engine_profile(config('postgresql://localhost/app')) == 'postgresql'
+        assert engine_profile(config('postgresql+psycopg2://localhost/app')) == 'postgresql'
+        assert engine_profile(config('sqlite:///app.db')) == 'sqlite'
+        assert engine_profile(config('mysql://localhost/app')) == 'none'
+        assert engine_profile(config('postgresql://localhost/app', DATABASE_PROFILE='none')) == 'none'
+
+    def test_postgresql_pool_follows_web_threads(self):
+        options = engine_options(config('postgresql://localhost/app', WEB_THREADS=8))
+        assert options['pool_size'] == 8
+        assert options['pool_pre_ping'] is True
+        assert 'statement_timeout=30000' in options['connect_args']['options']
+
+        assert engine_options(config('postgresql://localhost/app', DB_POOL_SIZE=3))['pool_size'] == 3
+        assert engine_options(config('sqlite:///app.db')) == {}
+
+    def test_sqlite_pragmas(self, tmp_path):
+        settings = config(f"sqlite:///{tmp_path / 'app.db'}")
+        engine = create_engine(settings['SQLALCHEMY_DATABASE_URI'])
+        configure_engine(engine, settings)
+
+        with engine.connect() as connection:
+            def pragma(name):
+                return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == Config.SQLITE_BUSY_TIMEOUT_MS
+            assert pragma('cache_size') == Config.SQLITE_CACHE_SIZE
+        engine.dispose()
+
+    def test_postgresql_connection_settings(self):
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+        settings = config(uri, DB_STATEMENT_TIMEOUT_MS=1500)
+        engine = create_engine(uri, **engine_options(settings))
+
+        with engine.connect() as connection:
+            assert connection.execute(text('SHOW statement_timeout')).scalar() == '1500ms'
+            assert connection.execute(text('SHOW application_name')).scalar() == Config.DB_APPLICATION_NAME
+        engine.dispose()
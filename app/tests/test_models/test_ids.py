@@ -0,0 +1,121 @@
+"""
+Tests for time-ordered ids and their compact storage.
+"""
+import os
+import time
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import db
+from app.commands import ids_cli
+from app.models import Account, Transaction, User, generate_id
+from app.models.ids import compact_ids, use_compact_ids, uuid7
+
+
+def raw_id(connection, table, column='id'):
+    return connection.execute(db.text(f'SELECT {column} FROM {table}')).scalar()
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def compact_engine(request):
+    """An engine storing compact ids, with the schema created on it."""
+    if request.param == 'sqlite':
+        engine = create_engine('sqlite://')
+    else:
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+        engine = create_engine(uri)
+    use_compact_ids(engine)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    yield engine
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+class TestUuid7:
+    """Generated ids are version 7 UUIDs in creation order."""
+
+    def test_version_and_variant(self):
+        value = uuid7()
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+        assert abs(int.from_bytes(value.bytes[:6], 'big') - time.time() * 1000) < 1000
+
+    def test_ordered_across_milliseconds(self):
+        ids = []
+        for _ in range(5):
+            ids.append(generate_id())
+            time.sleep(0.002)
+        assert ids == sorted(ids)
+        assert len(ids[0]) == 36
+
+
+class TestCompactIds:
+    """With compact ids, rows store 16-byte ids and code keeps using strings."""
+
+    def test_round_trip(self, compact_engine):
+        with Session(compact_engine) as session:
+            user = User(username='compact', email='compact@example.com', password_hash='x')
+            session.add(user)
+            session.flush()
+            account = Account(name='Cash', account_type='cash', balance=0, user_id=user.id)
+            session.add(account)
+            session.commit()
+            user_id, account_id = user.id, account.id
+
+        with Session(compact_engine) as session:
+            assert session.get(User, user_id).username == 'compact'
+            assert session.query(Account).filter_by(user_id=user_id).one().id == account_id
+            assert session.query(Account).filter(Account.id.in_([account_id])).count() == 1
+            # Malformed ids in URLs find nothing instead of failing
+            assert session.query(Account).filter_by(id='not-an-id').first() is None
+
+        with compact_engine.connect() as connection:
+            stored = raw_id(connection, 'accounts', 'user_id')
+        if compact_engine.dialect.name == 'postgresql':
+            assert stored == uuid.UUID(user_id)
+        else:
+            assert stored == uuid.UUID(user_id).bytes
+
+
+class TestConvertIds:
+    """`flask ids convert` rewrites an existing database between storages."""
+
+    @pytest.fixture(autouse=True)
+    def string_ids(self, database):
+        if compact_ids(db.engine.dialect):
+            pytest.skip('converts from string ids; the suite runs with COMPACT_IDS')
+
+    def test_convert_and_back(self, app, test_user, test_account, test_transaction):
+        user_id, account_id, transaction_id = test_user.id, test_account.id, test_transaction.id
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(ids_cli, ['convert', 'compact'])
+        assert result.exit_code == 0, result.output
+        with db.engine.connect() as connection:
+            assert raw_id(connection, 'transactions') == uuid.UUID(transaction_id).bytes
+            assert raw_id(connection, 'transactions', 'account_id') == uuid.UUID(account_id).bytes
+            if connection.dialect.name == 'sqlite':
+                # The search index follows the rewritten ids
+                indexed_id = raw_id(connection, 'transactions_fts_source', 'transaction_id')
+                assert indexed_id == uuid.UUID(transaction_id).bytes
+
+        result = runner.invoke(ids_cli, ['convert', 'string'])
+        assert result.exit_code == 0, result.output
+        assert Transaction.query.get(transaction_id).account.user_id == user_id
+
+    def test_non_uuid_id_aborts(self, app, test_user):
+        user_id = test_user.id
+        db.session.add(Account(id='legacy-account', name='Old', account_type='cash', balance=0, user_id=user_id))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(ids_cli, ['convert', 'compact'])
+
+        assert result.exit_code != 0
+        with db.engine.connect() as connection:
+            assert raw_id(connection, 'users') == user_id
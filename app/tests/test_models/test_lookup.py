@@ -0,0 +1,178 @@
+"""
+Tests for the category and tag lookup tables behind Transaction and Budget.
+"""
+import io
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Account, Budget, Category, CategoryName, IdType, TagName, Transaction, User
+from app.utils.transaction_import import TransactionImporter
+from .. import add_transaction
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def lookup_engine(request):
+    """An engine with just the category lookup table created on it."""
+    if request.param == 'sqlite':
+        engine = create_engine('sqlite://')
+    else:
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+        engine = create_engine(uri)
+    CategoryName.__table__.drop(engine, checkfirst=True)
+    CategoryName.__table__.create(engine)
+    yield engine
+    CategoryName.__table__.drop(engine)
+    engine.dispose()
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def lookup_app(request, tmp_path):
+    """An app with its own database, on SQLite or Postgres, and a user with an account."""
+    if request.param == 'sqlite':
+        uri = f"sqlite:///{tmp_path / 'lookup.db'}"
+    else:
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+
+    class LookupConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+
+    app = create_app(LookupConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='lookup', email='lookup@example.com', password_hash='x')
+        user.save()
+        account = Account(name='Main', account_type='bank', balance=0, user_id=user.id)
+        account.save()
+        yield user, account
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def names(model):
+    return [row.name for row in model.query.order_by(model.id)]
+
+
+class TestLookupTables:
+    """Category and tag names are stored once and referenced by id."""
+
+    def test_seeded_with_presets(self, database):
+        assert names(CategoryName) == list(Category.PRESET_CATEGORIES)
+        assert set(names(TagName)) == {tag for tags in Category.CATEGORY_TAGS.values()
+                                       for tag in tags['Subcategories']}
+        assert names(TagName).count('Books') == 1
+
+    def test_rows_store_ids_and_read_names(self, test_user, test_account):
+        transaction = add_transaction(test_user, test_account, category='Food', tag='Snacks')
+
+        raw = db.session.execute(db.text('SELECT category_id, tag_id FROM transactions WHERE id = :id')
+                                 .bindparams(db.bindparam('id', transaction.id, type_=IdType()))).one()
+        assert raw == (CategoryName.query.filter_by(name='Food').one().id,
+                       TagName.query.filter_by(name='Snacks').one().id)
+
+        db.session.expire_all()
+        loaded = Transaction.query.get(transaction.id)
+        assert (loaded.category, loaded.tag) == ('Food', 'Snacks')
+        assert loaded.to_dict()['category'] == 'Food'
+
+    def test_new_names_are_added_on_write(self, test_user, test_account):
+        transaction = add_transaction(test_user, test_account, category='Pets', tag='Vet')
+        transaction.tag = 'Grooming'
+        transaction.save()
+        Budget(amount='50.00', category='Pets', user_id=test_user.id, start_date=datetime(2025, 3, 1),
+               end_date=datetime(2025, 3, 31), tag='Toys').save()
+
+        assert names(CategoryName)[-1] == 'Pets'
+        assert names(TagName)[-3:] == ['Vet', 'Grooming', 'Toys']
+        db.session.expire_all()
+        assert Transaction.query.get(transaction.id).tag == 'Grooming'
+
+    def test_import_adds_new_names(self, test_user, test_account):
+        stream = io.BytesIO(b'amount,type,description,date,category,tag\n'
+                            b'10.00,expense,A,2025-03-01,Pets,Vet\n'
+                            b'4.00,expense,B,2025-03-02,Food,Snacks\n')
+        imported, errors = TransactionImporter(test_account, test_user.id).run(stream)
+
+        assert (imported, errors) == (2, 0)
+        assert sorted((t.category, t.tag) for t in Transaction.query) == [('Food', 'Snacks'), ('Pets', 'Vet')]
+
+    def test_queries_compare_and_group_by_name(self, test_user, test_account):
+        add_transaction(test_user, test_account, category='Food', tag='Snacks')
+        add_transaction(test_user, test_account, amount='5.00', category='Food', tag='Beverages')
+        add_transaction(test_user, test_account, amount='100.00', category='Home', tag='Rent')
+
+        assert Transaction.query.filter_by(category='Food').count() == 2
+        assert Transaction.query.filter(Transaction.category.in_(['Home', 'Unknown'])).count() == 1
+        assert Transaction.query.filter(Transaction.category.not_in(['Home'])).count() == 2
+        assert Transaction.query.filter(Transaction.tag == 'Unknown').count() == 0
+
+        totals = db.session.query(Transaction.category, db.func.sum(Transaction.amount)) \
+            .group_by(Transaction.category).all()
+        assert sorted(totals) == [('Food', 15), ('Home', 100)]
+
+    def test_selecting_names_adds_no_subquery(self):
+        assert 'categories' not in str(db.select(Transaction))
+        assert 'tags' not in str(db.select(Budget.category, Budget.tag))
+
+    def test_rolled_back_names_are_not_kept(self, database):
+        CategoryName.ensure(db.session.connection(), ['Pets'])
+        added = CategoryName.query.filter_by(name='Pets').one().id
+        assert CategoryName.name_of(added, db.engine.dialect) == 'Pets'
+        db.session.rollback()
+
+        # SQLite hands the rolled back id out again
+        CategoryName.ensure(db.session.connection(), ['Garden'])
+        db.session.commit()
+        garden = CategoryName.query.filter_by(name='Garden').one().id
+        assert CategoryName.name_of(garden, db.engine.dialect) == 'Garden'
+
+    def test_budget_without_tag(self, test_user, test_account):
+        add_transaction(test_user, test_account, category='Food', tag='Snacks', date=datetime(2025, 3, 1, 10))
+        budget = Budget(amount='50.00', category='Food', user_id=test_user.id,
+                        start_date=datetime(2025, 3, 1), end_date=datetime(2025, 3, 31))
+        budget.save()
+
+        db.session.expire_all()
+        budget = Budget.query.get(budget.id)
+        assert budget.tag is None
+        assert budget.get_spent_amount() == 10
+
+
+def test_ensure_existing_names_keeps_ids_dense(lookup_engine):
+    """Names already present draw no ids, so the next new name gets the next id"""
+    with lookup_engine.begin() as connection:
+        last_id = connection.execute(db.select(db.func.max(CategoryName.id))).scalar()
+        for _ in range(50):
+            CategoryName.ensure(connection, ['Food', 'Home'])
+            CategoryName.seed(connection)
+        CategoryName.ensure(connection, ['Pets', 'Food'])
+
+        added = connection.execute(db.select(CategoryName.id).where(CategoryName.name == 'Pets')).scalar()
+    assert added == last_id + 1
+
+
+def test_ids_past_smallint(lookup_app):
+    """Lookup ids keep working once the sequence has gone past 32767"""
+    user, account = lookup_app
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text("SELECT setval('categories_id_seq', 40000)"))
+    else:
+        db.session.execute(db.text("INSERT INTO categories (id, name) VALUES (40000, 'Filler')"))
+    db.session.commit()
+
+    transaction = add_transaction(user, account, category='Pets', tag='Vet')
+    db.session.expire_all()
+
+    assert CategoryName.query.filter_by(name='Pets').one().id > 40000
+    assert db.session.get(Transaction, transaction.id).category == 'Pets'
+    assert Transaction.query.filter_by(category='Pets').count() == 1
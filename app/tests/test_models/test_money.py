@@ -0,0 +1,86 @@
+"""
+Tests for integer minor-unit amounts.
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Account, DailyRollup, IdType, Transaction
+from app.models.money import Money
+
+
+class TestMoney:
+    """Money does exact integer arithmetic on cents."""
+
+    @pytest.mark.parametrize('value, minor', [
+        ('12.34', 1234),
+        (Decimal('0.005'), 1),
+        (Decimal('-0.005'), -1),
+        (0.1, 10),
+        (19.99, 1999),
+        (7, 700),
+        (None, 0),
+    ])
+    def test_of_rounds_half_up_to_the_cent(self, value, minor):
+        assert Money.of(value).minor == minor
+
+    def test_float_amounts_sum_exactly(self):
+        assert sum(Money.of(0.1) for _ in range(10)) == Money.of('1.00')
+        assert sum(0.1 for _ in range(10)) != 1.0
+
+    def test_arithmetic_and_comparisons(self):
+        balance = Money.of('100.00') - Money.of('30.25') + Decimal('0.50')
+        assert balance == Decimal('70.25')
+        assert balance.to_decimal() == Decimal('70.25')
+        assert -balance < 0 < balance
+        assert abs(-balance) == balance
+        assert 10 - Money.of('2.50') == Money.of('7.50')
+        assert str(balance) == '70.25' and float(balance) == 70.25
+        assert not Money() and len({Money.of(1), Money.of('1.00')}) == 1
+
+
+class TestMoneyType:
+    """Amount columns store BIGINT cents and load as Money; transaction amounts are signed."""
+
+    def test_stored_as_signed_integer_cents(self, test_user, test_account):
+        transaction = Transaction(amount=Decimal('19.99'), transaction_type='expense', category='Food',
+                                  tag='Groceries', user_id=test_user.id, account_id=test_account.id,
+                                  date=datetime(2025, 3, 1, 10))
+        transaction.save()
+
+        raw = db.session.execute(db.text('SELECT amount FROM transactions WHERE id = :id')
+                                 .bindparams(db.bindparam('id', transaction.id, type_=IdType()))).scalar()
+        assert raw == -1999 and isinstance(raw, int)
+
+        db.session.expire_all()
+        loaded = Transaction.query.get(transaction.id)
+        assert isinstance(loaded.amount, Money)
+        assert (loaded.amount, loaded.signed_amount) == (Decimal('19.99'), Decimal('-19.99'))
+        assert f'{loaded.amount:,.2f}' == '19.99'
+
+    def test_changing_type_flips_the_sign(self, test_user, test_account):
+        opening = test_account.balance
+        transaction = Transaction(amount='25.00', transaction_type='expense', category='Food',
+                                  tag='Groceries', user_id=test_user.id, account_id=test_account.id)
+        transaction.save()
+
+        transaction.transaction_type = 'income'
+        transaction.save()
+
+        db.session.expire_all()
+        assert Transaction.query.get(transaction.id).signed_amount == Decimal('25.00')
+        assert Account.query.get(test_account.id).balance == opening + Decimal('25.00')
+
+    def test_sums_are_exact(self, test_user, test_account):
+        opening = test_account.balance
+        for _ in range(10):
+            Transaction(amount=0.1, transaction_type='expense', category='Food', tag='Groceries',
+                        user_id=test_user.id, account_id=test_account.id, date=datetime(2025, 3, 1, 10)).save()
+
+        db.session.expire_all()
+        assert Account.query.get(test_account.id).balance == opening - Decimal('1.00')
+        total = db.session.query(db.func.sum(DailyRollup.total_amount)) \
+            .filter(DailyRollup.account_id == test_account.id).scalar()
+        assert total == Decimal('-1.00')
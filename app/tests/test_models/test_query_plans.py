@@ -0,0 +1,139 @@
+"""
+Query plan tests.
+Runs EXPLAIN over every statement a route issues and fails when a query
+against the transactions, budgets or daily_rollups tables falls back to a
+full table scan.
+"""
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.sql import Select
+
+from app import db
+from app.models import Transaction
+from app.models.search import PostgresSearch
+from app.utils.pagination import encode_cursor
+from .. import dispatch_request, record_queries
+
+INDEXED_TABLES = ('transactions', 'budgets', 'daily_rollups')
+
+ROUTES = [
+    '/',
+    '/accounts/',
+    '/transactions/',
+    '/transactions/?type_filter=expense',
+    '/transactions/?category_filter=Food&tag_filter=Groceries',
+    '/transactions/?search=coffee',
+    '/transactions/api/transactions/search?q=cof',
+    '/transactions/api/transactions/stats?days=90',
+    '/transactions/api/transactions/stats?days=3650&interval=month',
+    '/budgets/',
+]
+
+ACCOUNT_ROUTES = [
+    '/accounts/{account_id}',
+    '/accounts/api/{account_id}/balance-history?days=90',
+    # Keyset pagination cursors
+    '/transactions/?after={cursor}',
+    '/transactions/?before={cursor}',
+    '/accounts/{account_id}?after={cursor}',
+]
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (%s)\b' % '|'.join(INDEXED_TABLES))
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (%s)\b' % '|'.join(INDEXED_TABLES))
+
+
+def explain(connection, statement, params):
+    """Return the plan lines for a statement on the connection's dialect."""
+    compiled = statement.compile(dialect=connection.dialect,
+                                 compile_kwargs={'render_postcompile': True})
+    bound = compiled.construct_params(params)
+    if connection.dialect.name == 'sqlite':
+        positional = tuple(bound[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', positional)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', bound)
+    return [row[0] for row in rows]
+
+
+def find_full_scans(connection, statements):
+    """Return (sql, plan line) pairs for every full scan of an indexed table."""
+    pattern = SQLITE_FULL_SCAN if connection.dialect.name == 'sqlite' else POSTGRES_FULL_SCAN
+    scans = []
+    for statement, params in statements:
+        if not isinstance(statement, Select):
+            continue
+        for line in explain(connection, statement, params):
+            if pattern.search(line):
+                scans.append((str(statement), line))
+    return scans
+
+
+def is_sqlite_search(statement):
+    """Whether a statement queries the SQLite FTS5 table, which other dialects cannot plan."""
+    return 'transactions_fts' in str(statement)
+
+
+def capture_route_queries(app, user, transaction):
+    """Request every covered route and return the statements issued."""
+    cursor = encode_cursor(transaction)
+    urls = ROUTES + [url.format(account_id=transaction.account_id, cursor=cursor) for url in ACCOUNT_ROUTES]
+    with record_queries(db.engine) as statements:
+        for url in urls:
+            response = dispatch_request(app, user, url)
+            assert response.status_code == 200, url
+    return statements
+
+
+@pytest.fixture
+def postgres_engine():
+    """Engine for the optional Postgres plan check, configured via TEST_POSTGRES_URI."""
+    uri = os.environ.get('TEST_POSTGRES_URI')
+    if not uri:
+        pytest.skip('TEST_POSTGRES_URI is not set')
+    engine = create_engine(uri)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    yield engine
+    db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+class TestRouteQueryPlans:
+    """Every route query on transactions and budgets must be served by an index."""
+
+    def test_sqlite_routes_use_indexes(self, app, test_user, test_transaction, test_budget):
+        statements = capture_route_queries(app, test_user, test_transaction)
+        assert statements
+
+        with db.engine.connect() as connection:
+            scans = find_full_scans(connection, statements)
+        assert not scans, scans
+
+    def test_postgres_routes_use_indexes(self, app, test_user, test_transaction, test_budget,
+                                         postgres_engine):
+        statements = [(statement, params)
+                      for statement, params in capture_route_queries(app, test_user, test_transaction)
+                      if not is_sqlite_search(statement)]
+
+        # The search routes ran against SQLite; plan the Postgres backend's version of them instead
+        query = Transaction.query.filter_by(user_id=test_user.id)
+        search = PostgresSearch()
+        statements += [(search.filter(query, 'coffee').statement, {}),
+                       (search.ranked(query, 'cof').limit(20).statement, {})]
+
+        with postgres_engine.connect() as connection:
+            # Tiny test tables always favour a sequential scan; force the planner to show its index choice
+            connection.exec_driver_sql('SET enable_seqscan = off')
+            scans = find_full_scans(connection, statements)
+        assert not scans, scans
+
+    def test_full_scan_detected_without_indexes(self, database, test_user):
+        """The harness itself flags an unindexed filter."""
+        statement = db.select(Transaction).where(Transaction.description == 'coffee')
+
+        with db.engine.connect() as connection:
+            scans = find_full_scans(connection, [(statement, {})])
+        assert scans
@@ -0,0 +1,123 @@
+"""
+Tests for full-text search over transaction descriptions.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.commands import search_cli
+from app.models import Transaction, User, generate_id
+from app.models.search import SqliteSearch, get_search_backend
+from .. import add_transaction, dispatch_request
+
+XHR = {'X-Requested-With': 'XMLHttpRequest'}
+
+
+def search(user, term, ranked=False):
+    query = Transaction.query.filter_by(user_id=user.id)
+    backend = get_search_backend()
+    query = backend.ranked(query, term) if ranked else backend.filter(query, term)
+    return [t.description for t in query]
+
+
+@pytest.fixture
+def descriptions(test_user, test_account):
+    for i, description in enumerate(['Coffee at the station', 'Uber ride home',
+                                     'Coffee beans and coffee filters', 'Hubert birthday gift', None]):
+        add_transaction(test_user, test_account, description=description,
+                        date=datetime.utcnow() - timedelta(days=i + 1))
+
+
+class TestTransactionSearch:
+    """Test cases for the SQLite FTS5 search backend."""
+
+    def test_backend_follows_dialect(self, database):
+        assert isinstance(get_search_backend(), SqliteSearch)
+
+    def test_prefix_match_on_word_starts(self, test_user, descriptions):
+        assert search(test_user, 'ub') == ['Uber ride home']
+        assert sorted(search(test_user, 'COF')) == ['Coffee at the station', 'Coffee beans and coffee filters']
+
+    def test_every_word_must_match(self, test_user, descriptions):
+        assert search(test_user, 'coffee fil') == ['Coffee beans and coffee filters']
+
+    def test_ranked_best_match_first(self, test_user, descriptions):
+        assert search(test_user, 'coffee', ranked=True)[0] == 'Coffee beans and coffee filters'
+
+    def test_query_syntax_is_literal(self, test_user, descriptions):
+        assert search(test_user, 'coffee" OR uber*') == []
+        assert search(test_user, 'station-coffee') == ['Coffee at the station']
+
+    def test_index_follows_edits_deletes_and_bulk_inserts(self, test_user, test_account, descriptions):
+        transaction = Transaction.query.filter_by(description='Uber ride home').one()
+        transaction.description = 'Taxi ride home'
+        db.session.commit()
+        assert search(test_user, 'uber') == []
+        assert search(test_user, 'taxi') == ['Taxi ride home']
+
+        transaction.delete()
+        assert search(test_user, 'taxi') == []
+
+        db.session.execute(db.insert(Transaction), [{
+            'id': generate_id(), 'signed_amount': -5, 'transaction_type': 'expense', 'description': 'Bakery',
+            'date': datetime.utcnow(), 'category': 'Food', 'tag': 'Groceries',
+            'user_id': test_user.id, 'account_id': test_account.id
+        }])
+        db.session.commit()
+        assert search(test_user, 'bak') == ['Bakery']
+
+    def test_index_survives_renumbered_rowids(self, test_user, descriptions):
+        # Rebuilding the table, as batch migrations do, copies the rows under new rowids;
+        # the triggers go with the old table and are installed again afterwards
+        connection = db.session.connection()
+        connection.exec_driver_sql('CREATE TEMP TABLE copied AS SELECT * FROM transactions ORDER BY date')
+        for trigger in ('insert', 'delete', 'update'):
+            connection.exec_driver_sql(f'DROP TRIGGER transactions_fts_{trigger}')
+        connection.exec_driver_sql('DELETE FROM transactions')
+        connection.exec_driver_sql('INSERT INTO transactions SELECT * FROM copied')
+        connection.exec_driver_sql('DROP TABLE copied')
+        get_search_backend(connection).install(connection)
+        db.session.commit()
+
+        assert search(test_user, 'ub') == ['Uber ride home']
+        assert search(test_user, 'hub', ranked=True) == ['Hubert birthday gift']
+
+    def test_rebuild_command(self, app, test_user, descriptions):
+        db.session.execute(db.text("INSERT INTO transactions_fts (transactions_fts) VALUES ('delete-all')"))
+        db.session.commit()
+        assert search(test_user, 'coffee') == []
+
+        result = app.test_cli_runner().invoke(search_cli, ['rebuild'])
+
+        assert result.exit_code == 0, result.output
+        assert len(search(test_user, 'coffee')) == 2
+
+    def test_punctuation_only_term_falls_back_to_like(self, test_user, test_account, descriptions):
+        add_transaction(test_user, test_account, description='Refund ???')
+        assert search(test_user, '???') == ['Refund ???']
+
+
+class TestSearchRoutes:
+    """The transaction list filter and the ranked search API."""
+
+    def test_list_filter(self, app, test_user, descriptions):
+        response = dispatch_request(app, test_user, '/transactions/?search=ube', headers=XHR)
+        body = json.loads(response.get_data())
+        assert [t['description'] for t in body['transactions']] == ['Uber ride home']
+
+    def test_search_api_is_ranked_and_limited(self, app, test_user, descriptions):
+        response = dispatch_request(app, test_user, '/transactions/api/transactions/search?q=coffee&limit=1')
+        body = json.loads(response.get_data())
+        assert [t['description'] for t in body['transactions']] == ['Coffee beans and coffee filters']
+
+    def test_search_api_only_searches_own_transactions(self, app, test_user, descriptions):
+        other = User()
+        other.username = 'other'
+        other.email = 'other@example.com'
+        other.set_password('password123')
+        other.save()
+
+        response = dispatch_request(app, other, '/transactions/api/transactions/search?q=coffee')
+        assert json.loads(response.get_data()) == {'transactions': []}
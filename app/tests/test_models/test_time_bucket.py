@@ -0,0 +1,83 @@
+"""
+Tests for SQL time bucketing and the bucketed transaction stats endpoint.
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import db
+from app.models import Transaction
+from app.models.time_bucket import bucket_range, bucket_start, date_bucket
+from .. import add_transaction, dispatch_request
+
+# A leap day, a year boundary and every weekday
+SAMPLE_DATES = [date(2024, 2, 29), date(2024, 12, 30), date(2025, 1, 1)] + \
+               [date(2025, 3, 10) + timedelta(days=i) for i in range(7)]
+
+
+def bucket_in_sql(connection, value, interval):
+    column = db.literal(value, db.Date)
+    return connection.execute(db.select(date_bucket(column, interval))).scalar()
+
+
+class TestDateBucket:
+    """date_bucket agrees with its Python counterpart on every dialect."""
+
+    @pytest.mark.parametrize('interval', ['day', 'week', 'month'])
+    def test_sqlite(self, database, interval):
+        with db.engine.connect() as connection:
+            for value in SAMPLE_DATES:
+                assert bucket_in_sql(connection, value, interval) == bucket_start(value, interval), value
+
+    @pytest.mark.parametrize('interval', ['day', 'week', 'month'])
+    def test_postgres(self, interval):
+        uri = os.environ.get('TEST_POSTGRES_URI')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URI is not set')
+        engine = create_engine(uri)
+        with engine.connect() as connection:
+            for value in SAMPLE_DATES:
+                assert bucket_in_sql(connection, value, interval) == bucket_start(value, interval), value
+        engine.dispose()
+
+    def test_unknown_interval(self):
+        with pytest.raises(ValueError):
+            date_bucket(Transaction.date, 'year')
+
+    def test_bucket_range(self):
+        assert list(bucket_range(date(2024, 11, 15), date(2025, 2, 1), 'month')) == [
+            date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)]
+        assert list(bucket_range(date(2025, 3, 12), date(2025, 3, 17), 'week')) == [
+            date(2025, 3, 10), date(2025, 3, 17)]
+
+
+class TestTransactionStats:
+    """The stats endpoint buckets in SQL and zero-fills empty buckets."""
+
+    def test_monthly_buckets(self, app, test_user, test_account):
+        today = datetime.utcnow().date()
+        this_month = today.replace(day=1)
+        add_transaction(test_user, test_account, amount='100.00', transaction_type='income',
+                        date=datetime.combine(this_month, datetime.min.time()))
+        add_transaction(test_user, test_account, amount='30.00', date=datetime.combine(today, datetime.min.time()))
+
+        response = dispatch_request(app, test_user, '/transactions/api/transactions/stats?days=365&interval=month')
+        body = json.loads(response.get_data())
+
+        assert body['interval'] == 'month'
+        assert len(body['stats']) in (12, 13)
+        assert all(key.endswith('-01') for key in body['stats'])
+        assert body['stats'][this_month.isoformat()] == {'income': 100.0, 'expense': 30.0, 'net': 70.0}
+        assert body['summary']['transaction_count'] == 2
+        assert sum(stat['income'] for stat in body['stats'].values()) == 100.0
+
+    def test_invalid_interval(self, app, test_user):
+        response = dispatch_request(app, test_user, '/transactions/api/transactions/stats?interval=year')
+        assert response.status_code == 400
+
+    def test_invalid_days(self, app, test_user):
+        response = dispatch_request(app, test_user, '/transactions/api/transactions/stats?days=week')
+        assert response.status_code == 400
@@ -0,0 +1,37 @@
+"""
+Tests for transaction aggregate helpers.
+"""
+from decimal import Decimal
+
+from app.models import Category, Transaction
+from .. import add_transaction
+
+
+class TestTotalsByCategory:
+    """Test cases for Transaction.get_totals_by_category."""
+
+    def test_one_aggregate_gives_totals_and_zero_filled_summary(self, test_user, test_account):
+        add_transaction(test_user, test_account, amount='12.50', category='Food', tag='Groceries')
+        add_transaction(test_user, test_account, amount='7.50', category='Food', tag='Restaurants')
+        add_transaction(test_user, test_account, amount='900.00', category='Salary', tag='Base Pay',
+                        transaction_type='income')
+        query = Transaction.query.filter_by(user_id=test_user.id)
+
+        totals, summary = Transaction.get_totals_by_category(query)
+
+        assert totals == Transaction.get_totals(query) == {'income': Decimal('900.00'),
+                                                           'expense': Decimal('20.00')}
+        assert set(summary) == set(Category.PRESET_CATEGORIES)
+        assert summary['Food'] == {'income': 0.0, 'expense': 20.0, 'transaction_count': 2}
+        assert summary['Salary'] == {'income': 900.0, 'expense': 0.0, 'transaction_count': 1}
+        assert summary['Transport']['transaction_count'] == 0
+
+    def test_summary_follows_query_filters(self, test_user, test_account):
+        add_transaction(test_user, test_account, amount='12.50', category='Food', tag='Groceries')
+        add_transaction(test_user, test_account, amount='40.00', category='Transport', tag='Fuel')
+        query = Transaction.query.filter_by(user_id=test_user.id, category='Food')
+
+        totals, summary = Transaction.get_totals_by_category(query)
+
+        assert totals['expense'] == Decimal('12.50')
+        assert summary['Transport']['expense'] == 0.0
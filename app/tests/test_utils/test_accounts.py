@@ -0,0 +1,75 @@
+"""
+Tests for the request-scoped accounts provider.
+"""
+from datetime import datetime, timedelta
+
+from flask import g
+
+from app import db
+from app.forms.report import ReportFilterForm
+from app.forms.transaction import BulkTransactionForm, TransactionFilterForm, TransactionForm
+from app.models import Account, User
+from app.utils.accounts import user_account, user_accounts
+
+from .. import TEST_DATA, dispatch_request, record_queries
+
+
+def account_queries(statements):
+    return [statement for statement, _ in statements if 'FROM accounts' in str(statement)]
+
+
+def other_user_account():
+    user = User(username='other', email='other@example.com')
+    user.set_password(TEST_DATA['user']['password'])
+    user.save()
+    account = Account(name='Other', account_type='cash', balance=0, user_id=user.id)
+    account.save()
+    return account
+
+
+class TestUserAccounts:
+    """Accounts are loaded once per request and checked for ownership."""
+
+    def test_forms_share_one_query(self, app, test_user, test_account):
+        with app.test_request_context(), record_queries(db.engine) as statements:
+            forms = [TransactionForm(test_user), TransactionFilterForm(test_user),
+                     BulkTransactionForm(test_user), ReportFilterForm(test_user)]
+            assert user_account(test_user.id, test_account.id) is test_account
+
+        assert len(account_queries(statements)) == 1
+        assert forms[0].account_id.choices == [(test_account.id, test_account.name)]
+        assert forms[3].account_id.choices[1] == (test_account.id, 'Test Account (USD)')
+
+    def test_forgotten_after_request(self, app, test_user, test_account):
+        with app.test_request_context():
+            user_accounts(test_user.id)
+        assert 'user_accounts' not in g
+
+        with app.test_request_context():
+            account = Account(name='Savings', account_type='bank', balance=0, user_id=test_user.id)
+            account.save()
+            assert user_account(test_user.id, account.id) is account
+
+    def test_other_users_account_is_not_found(self, app, test_user, test_account):
+        other = other_user_account()
+        with app.test_request_context():
+            assert user_account(test_user.id, other.id) is None
+
+    def test_transaction_list_queries_accounts_once(self, app, test_user, test_account, test_transaction):
+        tomorrow = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+        with record_queries(db.engine) as statements:
+            response = dispatch_request(app, test_user, f'/transactions/?end_date={tomorrow}')
+
+        assert response.status_code == 200
+        assert f'<td>{test_account.name}</td>' in response.get_data(as_text=True)
+        assert len(account_queries(statements)) == 1
+
+    def test_create_rejects_other_users_account(self, app, test_user, test_account):
+        other = other_user_account()
+        data = {'amount': '10.00', 'transaction_type': 'expense', 'category': 'Food',
+                'tag': 'Groceries', 'account_id': other.id, 'date': '2025-03-01'}
+
+        response = dispatch_request(app, test_user, '/transactions/create', method='POST', data=data)
+
+        assert response.status_code == 200
+        assert test_user.transactions.count() == 0
@@ -0,0 +1,122 @@
+"""
+Tests for the per-request timing instrumentation.
+"""
+import json
+import logging
+
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Account, User
+from app.utils.instrumentation import RequestTimings
+
+from .. import TEST_DATA
+
+
+@pytest.fixture
+def instrumented_app(tmp_path):
+    class InstrumentedConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'instrumented.db'}"
+        SECRET_KEY = 'test-secret-key'
+        SESSION_COOKIE_SECURE = False
+        SERVER_TIMING = True
+        REQUEST_LOG = True
+
+    app = create_app(InstrumentedConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username=TEST_DATA['user']['username'], email=TEST_DATA['user']['email'])
+        user.set_password(TEST_DATA['user']['password'])
+        user.save()
+        session_id = user.get_id()
+        user_id = user.id
+    yield app, user_id, session_id
+    with app.app_context():
+        db.engine.dispose()
+
+
+def logged_in_client(app, session_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = session_id
+        session['_fresh'] = True
+    return client
+
+
+def server_timing(response):
+    """{metric: (milliseconds, description)} of the Server-Timing header"""
+    metrics = {}
+    for metric in response.headers['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(params['dur']), params.get('desc', '').strip('"'))
+    return metrics
+
+
+def add_accounts(app, user_id, count):
+    with app.app_context():
+        for i in range(count):
+            Account(name=f'Account {i}', account_type='bank', balance=0, user_id=user_id).save()
+
+
+class TestInstrumentation:
+    """Requests report their SQL, rendering and total time."""
+
+    def test_server_timing_header(self, instrumented_app):
+        app, user_id, session_id = instrumented_app
+        add_accounts(app, user_id, 1)
+
+        response = logged_in_client(app, session_id).get('/accounts/')
+        assert response.status_code == 200
+        metrics = server_timing(response)
+
+        assert set(metrics) >= {'total', 'db', 'render'}
+        assert metrics['db'][1].endswith(' queries') and int(metrics['db'][1].split()[0]) > 0
+        assert metrics['total'][0] >= metrics['db'][0]
+        assert metrics['total'][0] >= metrics['render'][0]
+
+    def test_log_line(self, instrumented_app, caplog):
+        app, user_id, session_id = instrumented_app
+        client = logged_in_client(app, session_id)
+
+        with caplog.at_level(logging.INFO, logger='app.utils.instrumentation'):
+            client.get('/auth/login')
+        record = json.loads(caplog.records[-1].getMessage())
+
+        assert record['method'] == 'GET'
+        assert record['endpoint'] == 'auth.login'
+        assert record['status'] in (200, 302)
+        assert record['duration_ms'] >= record['sql_ms']
+
+    def test_query_count_does_not_grow_with_accounts(self, instrumented_app):
+        """Pages listing accounts run a fixed number of queries, not one per account"""
+        app, user_id, session_id = instrumented_app
+        client = logged_in_client(app, session_id)
+
+        def query_count(url):
+            return int(server_timing(client.get(url))['db'][1].split()[0])
+
+        add_accounts(app, user_id, 1)
+        client.get('/')  # loads the user into the per-process cache
+        before = {url: query_count(url) for url in ('/', '/accounts/', '/budgets/')}
+        add_accounts(app, user_id, 5)
+        assert {url: query_count(url) for url in before} == before
+
+    def test_failed_statements_are_counted(self, instrumented_app):
+        app, _, _ = instrumented_app
+        with app.test_request_context():
+            g.request_timings = RequestTimings()
+            with pytest.raises(OperationalError):
+                db.session.execute(db.text('SELECT * FROM no_such_table'))
+            db.session.rollback()
+            db.session.execute(db.text('SELECT 1'))
+
+            assert g.request_timings.sql_count == 2
+            db.session.remove()
+
+    def test_disabled_by_default(self, app, client):
+        assert 'Server-Timing' not in client.get('/auth/login').headers
+
@@ -0,0 +1,236 @@
+"""
+Tests for the background job queue, worker and job API.
+"""
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import NotFound
+
+from app import db
+from app.models import Job, Transaction, User
+from app.utils.filters import ExportFilters
+from app.utils.jobs import MAX_ATTEMPTS, enqueue_export, enqueue_import, heartbeat, purge_jobs, work
+from .. import dispatch_request
+
+
+CSV = (
+    'amount,type,description,date,category,tag\n'
+    '2500.00,income,Salary,2025-03-01,Salary,Base Pay\n'
+    '42.50,expense,Groceries,2025-03-02,Food,Groceries\n'
+)
+
+
+@pytest.fixture
+def jobs_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOBS_DIR', str(tmp_path))
+    monkeypatch.setitem(app.config, 'REPORT_CACHE_DIR', str(tmp_path / 'report_cache'))
+    return tmp_path
+
+
+def upload(content=CSV):
+    return FileStorage(io.BytesIO(content.encode('utf-8')), filename='transactions.csv')
+
+
+def leave_running(job, minutes_ago):
+    """Claim the job as a worker that stopped beating minutes_ago would have"""
+    job.status = Job.RUNNING
+    job.attempts += 1
+    job.started_at = job.heartbeat_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+    db.session.commit()
+
+
+def export_filters(user, account, format='xlsx'):
+    today = datetime.utcnow().date()
+    return ExportFilters(user_id=user.id, start_date=today - timedelta(days=30),
+                         end_date=today + timedelta(days=1), account_id=account.id, format=format)
+
+
+class TestJobQueue:
+    """Test cases for queueing and claiming jobs."""
+
+    def test_claim_in_order(self, test_user):
+        first = Job.enqueue(test_user.id, 'export', format='pdf')
+        second = Job.enqueue(test_user.id, 'export', format='xlsx')
+
+        claimed = [Job.claim_next(), Job.claim_next()]
+
+        assert {job.id for job in claimed} == {first.id, second.id}
+        assert all(job.status == Job.RUNNING and job.started_at for job in claimed)
+        assert Job.claim_next() is None
+
+    def test_stale_running_job_is_claimed_again(self, test_user):
+        stale = Job.enqueue(test_user.id, 'export', format='pdf')
+        leave_running(stale, minutes_ago=10)
+        alive = Job.enqueue(test_user.id, 'export', format='pdf')
+        leave_running(alive, minutes_ago=1)
+
+        claimed = Job.claim_next(stale_after=300)
+
+        assert claimed.id == stale.id
+        assert claimed.attempts == 2
+        assert claimed.heartbeat_at > datetime.utcnow() - timedelta(minutes=1)
+        assert Job.claim_next(stale_after=300) is None
+
+    def test_progress_is_capped_until_finished(self, test_user):
+        job = Job.enqueue(test_user.id, 'import')
+        job.update_progress(10, 10)
+        assert job.progress == 99
+
+        job.succeed(message='done')
+        assert (job.status, job.progress, job.finished) == (Job.SUCCEEDED, 100, True)
+
+
+class TestWorker:
+    """Test cases for running jobs with the worker."""
+
+    def test_import_job(self, jobs_dir, test_user, test_account):
+        job = enqueue_import(test_user.id, test_account.id, upload())
+        upload_path = job.params['path']
+        assert Transaction.query.count() == 0
+
+        assert work(once=True) == 1
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.SUCCEEDED
+        assert job.message == 'Imported 2 transactions successfully. 0 errors.'
+        assert Transaction.query.filter_by(account_id=test_account.id).count() == 2
+        assert not os.path.exists(upload_path)
+
+    def test_import_job_names_bad_lines(self, jobs_dir, test_user, test_account):
+        enqueue_import(test_user.id, test_account.id, upload(CSV + 'abc,expense,Bad,2025-03-03,Food,Groceries\n'))
+
+        work(once=True)
+
+        job = Job.query.one()
+        assert job.message == 'Imported 2 transactions successfully. 1 errors. Check lines 4.'
+
+    def test_interrupted_export_runs_again(self, jobs_dir, test_user, test_account, test_transaction):
+        job = enqueue_export(export_filters(test_user, test_account))
+        leave_running(job, minutes_ago=10)
+
+        assert work(once=True) == 1
+        assert db.session.get(Job, job.id).status == Job.SUCCEEDED
+
+    def test_interrupted_import_is_not_run_twice(self, jobs_dir, test_user, test_account):
+        job = enqueue_import(test_user.id, test_account.id, upload())
+        leave_running(job, minutes_ago=10)
+
+        work(once=True)
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.FAILED
+        assert 'worker stopped' in job.error
+        assert Transaction.query.count() == 0
+
+    def test_export_stopping_its_worker_repeatedly_fails(self, jobs_dir, test_user, test_account):
+        job = enqueue_export(export_filters(test_user, test_account))
+        for _ in range(MAX_ATTEMPTS):
+            leave_running(job, minutes_ago=10)
+
+        work(once=True)
+        assert db.session.get(Job, job.id).status == Job.FAILED
+
+    def test_heartbeat(self, test_user):
+        job = Job.enqueue(test_user.id, 'export', format='pdf')
+        leave_running(job, minutes_ago=10)
+
+        with heartbeat(job.id, interval=0.01):
+            time.sleep(0.2)
+
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).heartbeat_at > datetime.utcnow() - timedelta(minutes=1)
+
+    def test_export_job(self, jobs_dir, test_user, test_account, test_transaction):
+        job = enqueue_export(export_filters(test_user, test_account))
+
+        work(once=True)
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.SUCCEEDED
+        assert job.result_name.endswith('.xlsx')
+        assert os.path.getsize(job.result_path) > 0
+
+    def test_export_job_records_render_time(self, jobs_dir, test_user, test_account, test_transaction, caplog):
+        rendered = enqueue_export(export_filters(test_user, test_account))
+        with caplog.at_level('INFO', logger='app.utils.jobs'):
+            work(once=True)
+        cached = enqueue_export(export_filters(test_user, test_account))
+        work(once=True)
+
+        assert db.session.get(Job, rendered.id).render_ms >= 0
+        assert f'Job {rendered.id} rendered a xlsx report of 1 transactions in' in caplog.text
+        # The second export is served from the report cache without rendering
+        assert db.session.get(Job, cached.id).status == Job.SUCCEEDED
+        assert db.session.get(Job, cached.id).render_ms is None
+
+    def test_failed_job_records_error(self, jobs_dir, test_user, test_account):
+        job = enqueue_export(export_filters(test_user, test_account))
+
+        work(once=True)
+
+        job = db.session.get(Job, job.id)
+        assert job.status == Job.FAILED
+        assert 'No transactions found' in job.error
+
+    def test_purge_removes_old_results(self, jobs_dir, test_user, test_account, test_transaction):
+        job = enqueue_export(export_filters(test_user, test_account))
+        work(once=True)
+        job = db.session.get(Job, job.id)
+        result_path = job.result_path
+        job.finished_at = datetime.utcnow() - timedelta(days=30)
+        db.session.commit()
+
+        assert purge_jobs(7) == 1
+        assert Job.query.count() == 0
+        assert not os.path.exists(result_path)
+
+
+class TestJobRoutes:
+    """Test cases for enqueueing from views and the job API."""
+
+    def test_import_view_enqueues(self, app, jobs_dir, test_user, test_account):
+        response = dispatch_request(app, test_user, '/transactions/import', method='POST', data={
+            'account_id': test_account.id,
+            'has_headers': 'y',
+            'file': (io.BytesIO(CSV.encode('utf-8')), 'transactions.csv')
+        })
+
+        job = Job.query.one()
+        assert response.status_code == 302
+        assert job.id in response.location
+        assert (job.kind, job.status) == ('import', Job.QUEUED)
+        assert Transaction.query.count() == 0
+
+    def test_status_and_download(self, app, jobs_dir, test_user, test_account, test_transaction):
+        job = enqueue_export(export_filters(test_user, test_account, format='pdf'))
+
+        response = dispatch_request(app, test_user, f'/api/jobs/{job.id}/download')
+        assert response.status_code == 409
+
+        work(once=True)
+
+        status = json.loads(dispatch_request(app, test_user, f'/api/jobs/{job.id}').get_data())
+        assert status['status'] == Job.SUCCEEDED
+        assert status['download_url'] == f'/api/jobs/{job.id}/download'
+
+        response = dispatch_request(app, test_user, status['download_url'])
+        response.direct_passthrough = False
+        assert response.mimetype == 'application/pdf'
+        assert response.get_data().startswith(b'%PDF')
+        response.close()
+
+    def test_jobs_are_private(self, app, test_user):
+        job = Job.enqueue(test_user.id, 'export', format='pdf')
+        other = User()
+        other.username = 'other'
+        other.email = 'other@example.com'
+        other.set_password('password123')
+        other.save()
+
+        with pytest.raises(NotFound):
+            dispatch_request(app, other, f'/api/jobs/{job.id}')
@@ -0,0 +1,184 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import io
+import os
+import runpy
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.parser import text_string_to_metric_families
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models import Account, Transaction, User
+from app.utils import metrics
+from app.utils.filters import ExportFilters
+from app.utils.report_generator import ReportGenerator
+from app.utils.transaction_import import TransactionImporter
+
+from .. import TEST_DATA
+
+
+def metered_config(tmp_path, **settings):
+    class MeteredConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'metered.db'}"
+        SECRET_KEY = 'test-secret-key'
+        SESSION_COOKIE_SECURE = False
+        METRICS = True
+
+    for name, value in settings.items():
+        setattr(MeteredConfig, name, value)
+    return MeteredConfig
+
+
+@pytest.fixture
+def metered_app(tmp_path):
+    app = create_app(metered_config(tmp_path))
+    with app.app_context():
+        db.create_all()
+        user = User(username=TEST_DATA['user']['username'], email=TEST_DATA['user']['email'])
+        user.set_password(TEST_DATA['user']['password'])
+        user.save()
+        Account(name='Main', account_type='bank', balance=0, user_id=user.id).save()
+        session_id = user.get_id()
+    yield app, session_id
+    with app.app_context():
+        db.engine.dispose()
+
+
+def sample(name, **labels):
+    """Current value of a sample in this process, 0 if not recorded yet"""
+    return metrics._metrics.registry.get_sample_value(metrics.PREFIX + name, labels) or 0
+
+
+class TestMetrics:
+    """Requests, queries, reports, imports and caches are measured."""
+
+    def test_request_metrics(self, metered_app):
+        app, session_id = metered_app
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = session_id
+            session['_fresh'] = True
+
+        before = {
+            'requests': sample('request_duration_seconds_count', endpoint='accounts.index'),
+            'ok': sample('responses_total', endpoint='accounts.index', status='200'),
+            'queries': sample('db_queries_total', endpoint='accounts.index'),
+            'checkouts': sample('db_pool_checkout_seconds_count'),
+            'misses': sample('cache_lookups_total', cache='user', result='miss'),
+            'hits': sample('cache_lookups_total', cache='user', result='hit'),
+        }
+        assert client.get('/accounts/').status_code == 200
+        assert client.get('/accounts/').status_code == 200
+
+        assert sample('request_duration_seconds_count', endpoint='accounts.index') == before['requests'] + 2
+        assert sample('responses_total', endpoint='accounts.index', status='200') == before['ok'] + 2
+        assert sample('db_queries_total', endpoint='accounts.index') > before['queries']
+        assert sample('db_pool_checkout_seconds_count') > before['checkouts']
+        assert sample('cache_lookups_total', cache='user', result='miss') == before['misses'] + 1
+        assert sample('cache_lookups_total', cache='user', result='hit') == before['hits'] + 1
+
+    def test_exposition(self, metered_app):
+        app, _ = metered_app
+        client = app.test_client()
+        client.get('/auth/login')
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=')
+        families = {family.name: family for family in text_string_to_metric_families(response.get_data(as_text=True))}
+        assert {'moneyminder_request_duration_seconds', 'moneyminder_db_pool_checkout_seconds',
+                'moneyminder_cache_lookups'} <= set(families)
+
+    def test_token(self, tmp_path):
+        app = create_app(metered_config(tmp_path, METRICS_TOKEN='secret'))
+        client = app.test_client()
+
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+    def test_token_required_outside_development(self, tmp_path):
+        with pytest.raises(RuntimeError):
+            create_app(metered_config(tmp_path, TESTING=False))
+
+    def test_pool_stays_timed_after_dispose(self, metered_app):
+        app, _ = metered_app
+        with app.app_context():
+            db.engine.dispose(close=False)
+            before = sample('db_pool_checkout_seconds_count')
+            with db.engine.connect():
+                pass
+            assert sample('db_pool_checkout_seconds_count') == before + 1
+
+    def test_report_and_import_metrics(self, metered_app):
+        app, _ = metered_app
+        with app.app_context():
+            account = Account.query.first()
+            lines = ['amount,type,description,date,category,tag']
+            lines += [f'{i}.50,expense,Row {i},{datetime.utcnow():%Y-%m-%d},Food,Groceries' for i in range(1, 21)]
+            lines.append('oops,expense,Bad row,2024-01-01,Food,Groceries')
+
+            imported = sample('import_rows_total', outcome='imported')
+            errors = sample('import_rows_total', outcome='error')
+            imports = sample('import_rows_per_second_count')
+            TransactionImporter(account, account.user_id).run(io.BytesIO('\n'.join(lines).encode('utf-8')))
+            assert sample('import_rows_total', outcome='imported') == imported + 20
+            assert sample('import_rows_total', outcome='error') == errors + 1
+            assert sample('import_rows_per_second_count') == imports + 1
+
+            today = datetime.utcnow().date()
+            filters = ExportFilters(account.user_id, today - timedelta(days=1), today + timedelta(days=1),
+                                    account.id, format='xlsx')
+            reports = sample('report_duration_seconds_count', format='xlsx')
+            size = sample('report_size_bytes_sum', format='xlsx')
+            output, _, _ = ReportGenerator(Transaction.query.filter_by(user_id=account.user_id), filters).export()
+
+            assert sample('report_duration_seconds_count', format='xlsx') == reports + 1
+            assert sample('report_size_bytes_sum', format='xlsx') == size + len(output.read())
+
+
+WORKER = """
+from app import create_app
+from app.config import Config
+app = create_app(Config)
+assert app.test_client().get('/auth/login').status_code == 200
+"""
+
+
+def test_workers_are_added_up(tmp_path):
+    """Processes sharing PROMETHEUS_MULTIPROC_DIR are reported together"""
+    directory = tmp_path / 'metrics'
+    directory.mkdir()
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    env = dict(os.environ, METRICS='1', METRICS_TOKEN='secret', PROMETHEUS_MULTIPROC_DIR=str(directory),
+               DATABASE_URI=f"sqlite:///{tmp_path / 'workers.db'}", PYTHONPATH=root)
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER], cwd=root, env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(directory))
+    count = registry.get_sample_value('moneyminder_request_duration_seconds_count', {'endpoint': 'auth.login'})
+    assert count == 2
+
+
+def test_exited_workers_are_marked_dead(tmp_path, monkeypatch):
+    """gunicorn's child_exit hook removes the live gauge files of the worker that exited"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    monkeypatch.delenv('METRICS', raising=False)
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    for pid in (101, 102):
+        (tmp_path / f'gauge_livesum_{pid}.db').touch()
+        (tmp_path / f'counter_{pid}.db').touch()
+
+    settings = runpy.run_path(os.path.join(root, 'gunicorn.conf.py'))
+    settings['child_exit'](None, SimpleNamespace(pid=101))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'counter_101.db', 'counter_102.db', 'gauge_livesum_102.db']
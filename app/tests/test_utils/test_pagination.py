@@ -0,0 +1,115 @@
+"""
+Tests for keyset pagination of transaction lists.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest
+
+from app import db
+from app.models import Transaction
+from app.utils.pagination import decode_cursor, encode_cursor, get_per_page, paginate_transactions
+from .. import add_transaction, dispatch_request, record_queries
+
+XHR = {'X-Requested-With': 'XMLHttpRequest'}
+
+
+def insert_transactions(user, account, count, same_day=False):
+    """Add transactions, newest first; same_day gives them all one timestamp."""
+    now = datetime.utcnow().replace(microsecond=0) - timedelta(days=2)
+    for i in range(count):
+        add_transaction(user, account, transaction_type='income' if i % 4 == 0 else 'expense',
+                        description=f'Transaction {i}', date=now if same_day else now - timedelta(minutes=i))
+
+
+def walk(query, per_page):
+    """Collect the ids of every page by following next cursors."""
+    ids, cursor = [], None
+    while True:
+        page = paginate_transactions(query, per_page, after=cursor)
+        ids.extend(t.id for t in page)
+        if not page.has_next:
+            return ids
+        cursor = page.next_cursor
+
+
+class TestKeysetPagination:
+    """Test cases for paginate_transactions."""
+
+    @pytest.mark.parametrize('same_day', [False, True])
+    def test_pages_cover_every_row_once_in_order(self, test_user, test_account, same_day):
+        insert_transactions(test_user, test_account, 23, same_day=same_day)
+        query = Transaction.query.filter_by(user_id=test_user.id)
+
+        expected = [t.id for t in query.order_by(Transaction.date.desc(), Transaction.id.desc())]
+        assert walk(query, 5) == expected
+
+    def test_before_cursor_returns_previous_page(self, test_user, test_account):
+        insert_transactions(test_user, test_account, 12)
+        query = Transaction.query.filter_by(user_id=test_user.id)
+        first = paginate_transactions(query, 5)
+        second = paginate_transactions(query, 5, after=first.next_cursor)
+
+        previous = paginate_transactions(query, 5, before=second.prev_cursor)
+
+        assert [t.id for t in previous] == [t.id for t in first]
+        assert not previous.has_prev
+        assert previous.next_cursor == first.next_cursor
+
+    def test_cursor_round_trip(self, test_transaction):
+        assert decode_cursor(encode_cursor(test_transaction)) == (test_transaction.date, test_transaction.id)
+        with pytest.raises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_per_page_is_bounded(self, app):
+        assert get_per_page(MultiDict(), app.config) == app.config['TRANSACTIONS_PER_PAGE']
+        assert get_per_page(MultiDict({'per_page': '10'}), app.config) == 10
+        assert get_per_page(MultiDict({'per_page': '100000'}), app.config) == app.config['MAX_TRANSACTIONS_PER_PAGE']
+
+
+class TestPaginatedViews:
+    """The transaction list and account view render one page with totals for the whole range."""
+
+    def test_list_totals_cover_all_pages(self, app, test_user, test_account):
+        insert_transactions(test_user, test_account, 20)
+
+        response = dispatch_request(app, test_user, '/transactions/?per_page=5', headers=XHR)
+        body = json.loads(response.get_data())
+
+        assert len(body['transactions']) == 5
+        assert body['next_cursor']
+        assert body['total_income'] == 50.0
+        assert body['total_expenses'] == 150.0
+
+    def test_account_view_pages(self, app, test_user, test_account):
+        insert_transactions(test_user, test_account, 7)
+        url = f'/accounts/{test_account.id}?per_page=5'
+
+        first = json.loads(dispatch_request(app, test_user, url, headers=XHR).get_data())
+        second = json.loads(dispatch_request(app, test_user, f"{url}&after={first['next_cursor']}",
+                                             headers=XHR).get_data())
+
+        assert len(second['transactions']) == 2
+        assert second['next_cursor'] is None
+        assert second['prev_cursor']
+
+    def test_invalid_cursor_is_rejected(self, app, test_user):
+        with pytest.raises(BadRequest):
+            dispatch_request(app, test_user, '/transactions/?after=garbage')
+
+    def test_query_count_independent_of_history(self, app, test_user, test_account):
+        """Regression test: accounts are eager loaded and only one page is fetched."""
+        insert_transactions(test_user, test_account, 3)
+        Transaction.query.first()  # loads the category and tag names once per process
+        with record_queries(db.engine) as statements:
+            dispatch_request(app, test_user, '/transactions/')
+        baseline = len(statements)
+
+        insert_transactions(test_user, test_account, 200)
+        with record_queries(db.engine) as statements:
+            response = dispatch_request(app, test_user, '/transactions/')
+
+        assert response.status_code == 200
+        assert len(statements) == baseline
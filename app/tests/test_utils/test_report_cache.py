@@ -0,0 +1,152 @@
+"""
+Tests for the on-disk report cache.
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.exceptions import NotFound
+
+from app import db
+from app.models import Account, Job
+from app.utils.filters import ExportFilters
+from app.utils.jobs import enqueue_export, work
+from app.utils.report_cache import ReportCache
+from app.utils.report_generator import ReportGenerator
+from .. import add_transaction, dispatch_request
+
+
+@pytest.fixture
+def cache_dirs(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOBS_DIR', str(tmp_path / 'jobs'))
+    monkeypatch.setitem(app.config, 'REPORT_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path
+
+
+@pytest.fixture
+def filters(test_user, test_account, test_transaction):
+    today = datetime.utcnow().date()
+    return ExportFilters(user_id=test_user.id, start_date=today - timedelta(days=30),
+                         end_date=today + timedelta(days=1), account_id=test_account.id, format='pdf')
+
+
+def source_file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+class TestReportCache:
+    """Test cases for ReportCache storage and eviction."""
+
+    def test_key_covers_every_input(self):
+        args = ['user', 'account', datetime(2025, 3, 1), datetime(2025, 3, 31), 'pdf', 1]
+        key = ReportCache.make_key(*args)
+
+        for i, value in enumerate(['other', 'other', datetime(2025, 2, 1), datetime(2025, 4, 1), 'xlsx', 2]):
+            changed = list(args)
+            changed[i] = value
+            assert ReportCache.make_key(*changed) != key
+
+    def test_put_and_get(self, tmp_path):
+        cache = ReportCache(str(tmp_path / 'cache'), 1024)
+        assert cache.get('user', 'a' * 64, 'pdf') is None
+
+        path = cache.put('user', 'a' * 64, 'pdf', source_file(tmp_path, 'report.pdf', 10))
+
+        assert cache.get('user', 'a' * 64, 'pdf') == path
+        assert cache.get('other-user', 'a' * 64, 'pdf') is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ReportCache(str(tmp_path / 'cache'), 250)
+        old = cache.put('user', 'a' * 64, 'pdf', source_file(tmp_path, 'a', 100))
+        recent = cache.put('user', 'b' * 64, 'pdf', source_file(tmp_path, 'b', 100))
+        past = time.time() - 60
+        os.utime(old, (past, past))
+        os.utime(recent, (past + 1, past + 1))
+        cache.get('user', 'a' * 64, 'pdf')  # reading refreshes the entry
+
+        cache.put('user', 'c' * 64, 'pdf', source_file(tmp_path, 'c', 100))
+
+        assert os.path.exists(old)
+        assert not os.path.exists(recent)
+
+    def test_disabled_cache(self, tmp_path):
+        cache = ReportCache(str(tmp_path / 'cache'), 0)
+        assert cache.put('user', 'a' * 64, 'pdf', source_file(tmp_path, 'a', 10)) is None
+        assert cache.get('user', 'a' * 64, 'pdf') is None
+
+
+class TestCachedExports:
+    """Repeat exports reuse cached files until the account's data changes."""
+
+    def export(self, filters):
+        job = enqueue_export(filters)
+        work(once=True)
+        return db.session.get(Job, job.id)
+
+    def test_repeat_export_skips_rendering(self, monkeypatch, cache_dirs, filters):
+        first = self.export(filters)
+
+        def fail(*args, **kwargs):
+            raise AssertionError('report rendered again')
+        monkeypatch.setattr(ReportGenerator, 'export', fail)
+        second = self.export(filters)
+
+        assert second.status == Job.SUCCEEDED
+        with open(first.result_path, 'rb') as a, open(second.result_path, 'rb') as b:
+            assert a.read() == b.read()
+
+    def test_new_transaction_invalidates(self, cache_dirs, test_user, test_account, filters):
+        cache = ReportCache.from_app()
+        self.export(filters)
+        assert cache.get(test_user.id, cache.key_for(filters), 'pdf')
+
+        add_transaction(test_user, test_account)
+
+        assert cache.get(test_user.id, cache.key_for(filters), 'pdf') is None
+
+    def test_all_accounts_version_never_repeats(self, test_user, test_account):
+        """Deleting an account cannot bring the combined version back to an earlier value"""
+        other = Account(name='Other', account_type='cash', balance=0, user_id=test_user.id)
+        other.save()
+        Account.bump_data_version(test_account.id)
+        Account.bump_data_version(other.id)
+        Account.bump_data_version(other.id)
+        db.session.commit()
+        version = Account.get_data_version(test_user.id)
+
+        Account.bump_data_version(test_account.id)
+        Account.bump_data_version(test_account.id)
+        db.session.delete(other)
+        db.session.commit()
+
+        assert Account.get_data_version(test_user.id) != version
+        assert Account.get_data_version(test_user.id, test_account.id) == 3
+
+    def test_generate_view_serves_cached_report(self, app, cache_dirs, test_user, filters):
+        self.export(filters)
+        data = {'start_date': filters.start_date.isoformat(), 'end_date': filters.end_date.isoformat(),
+                'account_id': filters.account_id, 'format': 'pdf'}
+
+        response = dispatch_request(app, test_user, '/reports/generate', method='POST', data=data,
+                                    headers={'X-Requested-With': 'XMLHttpRequest'})
+        body = json.loads(response.get_data())
+
+        assert body['status'] == Job.SUCCEEDED
+        assert Job.query.count() == 1  # no new job queued
+
+        download = dispatch_request(app, test_user, body['download_url'])
+        download.direct_passthrough = False
+        assert download.get_data().startswith(b'%PDF')
+        download.close()
+
+    def test_download_rejects_unknown_keys(self, app, cache_dirs, test_user):
+        with pytest.raises(NotFound):
+            dispatch_request(app, test_user, f'/reports/download/{"a" * 64}.pdf')
+        with pytest.raises(NotFound):
+            dispatch_request(app, test_user, '/reports/download/..secret.pdf')
+        with pytest.raises(NotFound):
+            dispatch_request(app, test_user, f'/reports/download/{"a" * 64}.csv')
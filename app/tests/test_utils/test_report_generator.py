@@ -0,0 +1,130 @@
+"""
+Tests for report generation from transaction lists and streamed queries.
+"""
+import re
+import weakref
+import zipfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from reportlab import platypus, rl_config
+
+from app.models import Transaction
+from app.utils.filters import ExportFilters
+from app.utils.report_generator import ReportGenerator, PDF_FIRST_PAGE_ROWS, PDF_ROWS_PER_PAGE
+
+
+@pytest.fixture
+def transactions(test_user, test_account):
+    now = datetime.utcnow()
+    for i, (amount, transaction_type) in enumerate([('100.00', 'income'), ('25.50', 'expense'),
+                                                    ('4.50', 'expense')]):
+        Transaction(
+            amount=amount,
+            transaction_type=transaction_type,
+            description=f'Transaction {i}',
+            category='Food',
+            tag='Groceries',
+            user_id=test_user.id,
+            account_id=test_account.id,
+            date=now - timedelta(days=i)
+        ).save()
+    return Transaction.query.filter_by(user_id=test_user.id).order_by(Transaction.date.desc())
+
+
+@pytest.fixture
+def filters(test_user, test_account):
+    today = datetime.utcnow().date()
+    return ExportFilters(user_id=test_user.id, start_date=today - timedelta(days=30),
+                         end_date=today, account_id=test_account.id, format='xlsx')
+
+
+def read_sheet(output, number):
+    with zipfile.ZipFile(output) as workbook:
+        return workbook.read(f'xl/worksheets/sheet{number}.xml').decode('utf-8')
+
+
+class TestReportGenerator:
+    """Test cases for ReportGenerator."""
+
+    def test_query_summary_matches_list_summary(self, transactions, filters):
+        from_query = ReportGenerator(transactions, filters)
+        from_list = ReportGenerator(transactions.all(), filters)
+
+        assert from_query.summary == from_list.summary == {
+            'total_income': 100.0,
+            'total_expenses': 30.0,
+            'balance': 70.0,
+            'transaction_count': 3
+        }
+        assert from_query.account.id == filters.account_id
+
+    def test_streamed_excel_layout(self, transactions, filters):
+        output = ReportGenerator(transactions, filters).generate_excel()
+
+        with zipfile.ZipFile(output) as workbook:
+            sheets = workbook.read('xl/workbook.xml').decode('utf-8')
+        assert re.findall(r'<sheet name="(\w+)"', sheets) == ['Summary', 'Transactions']
+
+        sheet = read_sheet(output, 2)
+        assert sheet.count('<row ') == 4  # header + 3 transactions
+        assert '<autoFilter ref="A1:F4"/>' in sheet
+        assert '<conditionalFormatting sqref="E2:E4">' in sheet
+        assert sheet.count('<cfRule type="expression"') == 2
+        assert '<pane ySplit="1"' in sheet
+
+    def test_excel_written_to_path(self, tmp_path, transactions, filters):
+        path = str(tmp_path / 'report.xlsx')
+
+        output, mimetype, filename = ReportGenerator(transactions, filters).export(path)
+
+        assert output == path
+        assert filename.endswith('.xlsx')
+        assert zipfile.is_zipfile(path)
+
+    def test_pdf_from_query(self, transactions, filters):
+        filters.format = 'pdf'
+        output, mimetype, _ = ReportGenerator(transactions, filters).export()
+
+        assert mimetype == 'application/pdf'
+        assert output.read(4) == b'%PDF'
+
+    def test_pdf_one_table_per_page(self, monkeypatch, test_account, filters):
+        monkeypatch.setattr(rl_config, 'pageCompression', 0)  # keep page text searchable
+        filters.format = 'pdf'
+        rows = [SimpleNamespace(date=datetime(2025, 3, 1), category='Food', tag='Groceries',
+                                description=f'Row {i}', amount='10.00', transaction_type='expense',
+                                account=test_account)
+                for i in range(PDF_FIRST_PAGE_ROWS + 2 * PDF_ROWS_PER_PAGE)]
+
+        output, _, _ = ReportGenerator(rows, filters).export()
+        pdf = output.read()
+
+        assert len(re.findall(rb'/Type /Page\b', pdf)) == 3
+        assert pdf.count(b'(Description)') == 3  # header repeated on every page
+        assert pdf.count(b'(Page subtotal expenses)') == 3
+        assert pdf.count(f'(USD {PDF_FIRST_PAGE_ROWS * 10:,.2f})'.encode()) == 1
+        assert pdf.count(f'(USD {PDF_ROWS_PER_PAGE * 10:,.2f})'.encode()) == 2
+
+    def test_pdf_tables_made_as_pages_are_laid_out(self, monkeypatch, test_account, filters):
+        """Only the page being drawn is held in memory, not a table for every page"""
+        alive, most_alive = weakref.WeakSet(), []
+
+        class TrackedTable(platypus.Table):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                alive.add(self)
+                most_alive.append(len(alive))
+
+        monkeypatch.setattr(platypus, 'Table', TrackedTable)
+        filters.format = 'pdf'
+        rows = [SimpleNamespace(date=datetime(2025, 3, 1), category='Food', tag='Groceries',
+                                description=f'Row {i}', amount='10.00', transaction_type='expense',
+                                account=test_account)
+                for i in range(PDF_FIRST_PAGE_ROWS + 9 * PDF_ROWS_PER_PAGE)]
+
+        ReportGenerator(rows, filters).export()
+
+        assert len(most_alive) == 11  # the summary table and ten page tables
+        assert max(most_alive) <= 3
@@ -0,0 +1,108 @@
+"""
+Tests for the chunked CSV transaction importer.
+"""
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Account, DailyRollup, Transaction
+from app.utils.transaction_import import TransactionImporter
+from .. import record_queries
+
+
+HEADER = 'amount,type,description,date,category,tag\n'
+
+
+def csv_stream(lines, header=True):
+    return io.BytesIO(((HEADER if header else '') + ''.join(lines)).encode('utf-8'))
+
+
+def expense_lines(count, day=14):
+    return [f'10.00,expense,Lunch {i},2025-03-{day:02d},Food,Restaurants\n' for i in range(count)]
+
+
+class TestTransactionImporter:
+    """Test cases for TransactionImporter."""
+
+    def test_import_with_headers(self, test_user, test_account):
+        stream = csv_stream([
+            '2500.00,income,Salary,2025-03-01,Salary,Base Pay\n',
+            '42.50,expense,Groceries,2025-03-02,Food,Groceries\n',
+        ])
+
+        imported, errors = TransactionImporter(test_account, test_user.id).run(stream)
+
+        assert (imported, errors) == (2, 0)
+        assert Transaction.query.filter_by(account_id=test_account.id).count() == 2
+        assert db.session.get(Account, test_account.id).balance == Decimal('3457.50')
+
+    def test_import_without_headers(self, test_user, test_account):
+        stream = csv_stream(['42.50,expense,Groceries,2025-03-02,Food,Groceries\n'], header=False)
+
+        imported, errors = TransactionImporter(test_account, test_user.id, has_headers=False).run(stream)
+
+        assert (imported, errors) == (1, 0)
+        transaction = Transaction.query.one()
+        assert transaction.date == datetime(2025, 3, 2)
+        assert transaction.category == 'Food'
+
+    def test_invalid_rows_are_counted(self, test_user, test_account):
+        stream = csv_stream([
+            'abc,expense,Bad amount,2025-03-02,Food,Groceries\n',
+            '10.00,transfer,Bad type,2025-03-02,Food,Groceries\n',
+            '10.00,expense,Bad date,03/02/2025,Food,Groceries\n',
+            '10.00,expense,Good,2025-03-02,Food,Groceries\n',
+        ])
+
+        importer = TransactionImporter(test_account, test_user.id)
+        imported, errors = importer.run(stream)
+
+        assert (imported, errors) == (1, 3)
+        assert importer.error_lines == [2, 3, 4]
+        assert db.session.get(Account, test_account.id).balance == Decimal('990.00')
+
+    def test_rejected_row_keeps_rest_of_chunk(self, test_user, test_account):
+        """A row the database rejects fails alone; the other rows of its chunk are imported"""
+        stream = csv_stream(expense_lines(2) + ['1e25,expense,Too large,2025-03-14,Food,Restaurants\n']
+                            + expense_lines(2))
+
+        importer = TransactionImporter(test_account, test_user.id, chunk_size=10)
+        imported, errors = importer.run(stream)
+
+        assert (imported, errors) == (4, 1)
+        assert importer.error_lines == [4]
+        assert Transaction.query.count() == 4
+        assert db.session.get(Account, test_account.id).balance == Decimal('960.00')
+        assert DailyRollup.query.one().transaction_count == 4
+
+    def test_chunks_keep_balance_and_rollups_consistent(self, test_user, test_account):
+        stream = csv_stream(expense_lines(5) + expense_lines(2, day=15))
+
+        imported, errors = TransactionImporter(test_account, test_user.id, chunk_size=2).run(stream)
+
+        assert (imported, errors) == (7, 0)
+        assert db.session.get(Account, test_account.id).balance == Decimal('930.00')
+        rollups = {r.day.day: (r.total_amount, r.transaction_count) for r in DailyRollup.query.all()}
+        assert rollups == {14: (Decimal('-50.00'), 5), 15: (Decimal('-20.00'), 2)}
+
+    def test_queries_scale_with_chunks_not_rows(self, test_user, test_account):
+        user_id = test_user.id
+        # New category and tag names take one extra insert, on the first import only
+        TransactionImporter(test_account, user_id, chunk_size=500).run(csv_stream(expense_lines(1)))
+
+        with record_queries(db.engine) as statements:
+            TransactionImporter(test_account, user_id, chunk_size=500).run(csv_stream(expense_lines(10)))
+        small = len(statements)
+
+        with record_queries(db.engine) as statements:
+            TransactionImporter(test_account, user_id, chunk_size=500).run(csv_stream(expense_lines(400)))
+
+        assert Transaction.query.count() == 411
+        assert len(statements) == small
+
+    def test_rejects_foreign_account(self, test_user, test_account):
+        with pytest.raises(ValueError):
+            TransactionImporter(test_account, 'someone-else')
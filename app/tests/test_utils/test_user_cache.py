@@ -0,0 +1,82 @@
+"""
+Tests for the cached login user loader.
+"""
+from app import db
+from app.models import User
+from app.utils.user_cache import UserCache
+
+from .. import record_queries
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def user_queries(statements):
+    return [statement for statement, _ in statements if 'FROM users' in str(statement)]
+
+
+class TestUserCache:
+    """The user loader reads users from the cache until they expire or change."""
+
+    def test_second_load_skips_the_database(self, test_user):
+        cache = UserCache(max_size=10, ttl=60)
+        session_id = test_user.get_id()
+        cache.load(session_id)
+        db.session.expunge_all()
+
+        with record_queries(db.engine) as statements:
+            user = cache.load(session_id)
+            assert user.username == test_user.username
+            assert user in db.session
+
+        assert user_queries(statements) == []
+
+    def test_entries_expire(self, test_user):
+        clock = FakeClock()
+        cache = UserCache(max_size=10, ttl=60, clock=clock)
+        cache.load(test_user.get_id())
+
+        clock.now = 59
+        assert cache.get(test_user.id) is not None
+        clock.now = 60
+        assert cache.get(test_user.id) is None
+
+    def test_least_recently_used_is_evicted(self, test_user):
+        other = User(username='other', email='other@example.com', password_hash='x')
+        other.save()
+        cache = UserCache(max_size=1, ttl=60)
+
+        cache.load(test_user.get_id())
+        cache.load(other.get_id())
+
+        assert cache.get(test_user.id) is None
+        assert cache.get(other.id)['username'] == 'other'
+
+    def test_update_evicts_user(self, app, test_user):
+        cache = UserCache.from_app()
+        cache.load(test_user.get_id())
+
+        test_user.email = 'renamed@example.com'
+        test_user.save()
+
+        assert cache.get(test_user.id) is None
+        assert cache.load(test_user.get_id()).email == 'renamed@example.com'
+
+    def test_password_change_ends_other_sessions(self, test_user):
+        cache = UserCache(max_size=10, ttl=60)
+        old_session_id = test_user.get_id()
+
+        test_user.set_password('new-password')
+        test_user.save()
+
+        assert test_user.get_id() != old_session_id
+        assert cache.load(old_session_id) is None
+        assert cache.load(test_user.get_id()) is test_user
+
+    def test_unknown_user(self, database):
+        assert UserCache(max_size=10, ttl=60).load('missing:0') is None
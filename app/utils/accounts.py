@@ -0,0 +1,31 @@
+from flask import g, has_request_context
+
+from app.models.account import Account
+
+
+def user_accounts(user_id):
+    """
+    The user's accounts, loaded once per request and shared by the forms, ownership checks
+    and templates of that request. Outside a request every call queries.
+    """
+    if not has_request_context():
+        return Account.query.filter_by(user_id=user_id).all()
+
+    cache = g.setdefault('user_accounts', {})
+    if user_id not in cache:
+        cache[user_id] = Account.query.filter_by(user_id=user_id).all()
+    return cache[user_id]
+
+
+def forget_user_accounts(exception=None):
+    """Teardown hook: g belongs to the app context, which may outlive the request"""
+    g.pop('user_accounts', None)
+
+
+def user_account(user_id, account_id):
+    """One of the user's accounts, or None if the id is not theirs"""
+    return next((account for account in user_accounts(user_id) if account.id == account_id), None)
+
+
+def account_choices(user_id, label=lambda account: account.name):
+    return [(str(account.id), label(account)) for account in user_accounts(user_id)]
@@ -0,0 +1,124 @@
+"""
+Per-request timing: wall time, SQL statements and template rendering.
+Reports render in the job worker, which records their time on the Job instead.
+
+With SERVER_TIMING each response gets a Server-Timing header, shown by the browser's
+developer tools next to the request; with REQUEST_LOG one JSON line per request is logged.
+A high `sql_count` on a page that lists a few rows is the mark of an N+1 query pattern.
+"""
+import json
+import logging
+import time
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """Where one request spent its time, in seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Server-Timing header value; durations are in milliseconds"""
+        metrics = [f'total;dur={total * 1000:.1f}',
+                   f'db;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"']
+        metrics += [f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in self.phases.items()]
+        return ', '.join(metrics)
+
+    def log_record(self, total, response):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_time * 1000, 1),
+        }
+        record.update((f'{phase}_ms', round(seconds * 1000, 1)) for phase, seconds in self.phases.items())
+        return record
+
+
+def current_timings():
+    """The timings of the request being served, or None outside instrumented requests"""
+    if not has_request_context():
+        return None
+    return g.get('request_timings')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Note when each statement starts, on its own execution context"""
+    if context is not None and current_timings() is not None:
+        context.instrumentation_started = time.perf_counter()
+
+
+def _count_statement(context):
+    """Count the statement and its time against the current request"""
+    timings = current_timings()
+    started = getattr(context, 'instrumentation_started', None)
+    if timings is not None and started is not None:
+        timings.sql_count += 1
+        timings.sql_time += time.perf_counter() - started
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _count_statement(context)
+
+
+def _handle_error(exception_context):
+    """Failed statements took database time too"""
+    _count_statement(exception_context.execution_context)
+
+
+def _before_render_template(app, template, context, **extra):
+    if current_timings() is not None:
+        g.render_started = time.perf_counter()
+
+
+def _template_rendered(app, template, context, **extra):
+    timings = current_timings()
+    started = g.pop('render_started', None)
+    if timings is not None and started is not None:
+        timings.add('render', time.perf_counter() - started)
+
+
+def init_instrumentation(app, engine):
+    """Time the app's requests when SERVER_TIMING or REQUEST_LOG is enabled"""
+    if not (app.config.get('SERVER_TIMING') or app.config.get('REQUEST_LOG')):
+        return
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+    @app.before_request
+    def start_timing():
+        g.request_timings = RequestTimings()
+
+    @app.after_request
+    def report_timing(response):
+        timings = g.pop('request_timings', None)
+        if timings is None:
+            return response
+
+        total = timings.elapsed()
+        if app.config.get('SERVER_TIMING'):
+            response.headers['Server-Timing'] = timings.server_timing(total)
+        if app.config.get('REQUEST_LOG'):
+            logger.info(json.dumps(timings.log_record(total, response)))
+        return response
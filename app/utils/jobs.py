@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+
+from app.models import db, generate_id
+from app.models.account import Account
+from app.models.job import Job
+from app.models.transaction import Transaction
+from app.utils.filters import ExportFilters
+from app.utils.report_cache import ReportCache, link_or_copy
+from app.utils.report_generator import ReportGenerator, REPORT_MIMETYPES
+from app.utils.transaction_import import TransactionImporter
+
+logger = logging.getLogger(__name__)
+
+# Exports start over when their worker stopped mid-way, up to MAX_ATTEMPTS runs. An import
+# may have committed some of its chunks already, so it fails instead of running twice.
+RESTARTABLE_KINDS = {'export'}
+MAX_ATTEMPTS = 3
+
+
+def job_storage_dir():
+    """Directory holding uploaded job inputs and generated results"""
+    path = current_app.config.get('JOBS_DIR') or os.path.join(current_app.instance_path, 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue_import(user_id, account_id, file, has_headers=True):
+    """Store an uploaded CSV file and queue it for import"""
+    path = os.path.join(job_storage_dir(), f'{generate_id()}.csv')
+    file.save(path)
+    return Job.enqueue(user_id, 'import', account_id=account_id, has_headers=has_headers, path=path)
+
+
+def enqueue_export(filters):
+    """Queue a report export for the given ExportFilters"""
+    return Job.enqueue(
+        filters.user_id,
+        'export',
+        start_date=filters.start_date.isoformat() if filters.start_date else None,
+        end_date=filters.end_date.isoformat() if filters.end_date else None,
+        account_id=filters.account_id,
+        format=filters.format
+    )
+
+
+def run_import(job):
+    """Import a stored CSV upload into the job owner's account"""
+    params = job.params
+    account = Account.query.filter_by(id=params['account_id'], user_id=job.user_id).first()
+    if account is None:
+        raise ValueError('Account not found')
+
+    with open(params['path'], 'rb') as file:
+        total = sum(1 for _ in file) - (1 if params['has_headers'] else 0)
+
+    importer = TransactionImporter(
+        account,
+        job.user_id,
+        has_headers=params['has_headers'],
+        chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+        progress=lambda imported, errors: job.update_progress(imported + errors, total)
+    )
+    with open(params['path'], 'rb') as file:
+        imported, errors = importer.run(file)
+
+    os.remove(params['path'])
+    message = f'Imported {imported} transactions successfully. {errors} errors.'
+    if importer.error_lines:
+        more = ', ...' if errors > len(importer.error_lines) else ''
+        message += f" Check lines {', '.join(map(str, importer.error_lines))}{more}."
+    job.succeed(message=message)
+
+
+def run_export(job):
+    """Generate a report file for the job owner"""
+    params = job.params
+    filters = ExportFilters(
+        user_id=job.user_id,
+        start_date=date.fromisoformat(params['start_date']) if params['start_date'] else None,
+        end_date=date.fromisoformat(params['end_date']) if params['end_date'] else None,
+        account_id=params['account_id'],
+        format=params['format']
+    )
+
+    cache = ReportCache.from_app()
+    key = cache.key_for(filters)
+    extension = 'xlsx' if filters.format.lower() == 'xlsx' else 'pdf'
+    path = os.path.join(job_storage_dir(), f'{job.id}.{extension}')
+
+    render_ms = None
+    cached = cache.get(job.user_id, key, extension)
+    if cached:
+        link_or_copy(cached, path)
+        mimetype, filename = REPORT_MIMETYPES[extension], filters.get_filename()
+    else:
+        # Pass the query itself so the report is summarized in SQL and streamed to disk
+        transactions = filters.build_query(Transaction.query.filter_by(user_id=job.user_id))
+        generator = ReportGenerator(transactions.order_by(Transaction.date.desc()), filters)
+        if not generator.summary['transaction_count']:
+            raise ValueError('No transactions found for the selected period')
+
+        _, mimetype, filename = generator.export(path)
+        cache.put(job.user_id, key, extension, path)
+        render_ms = round(generator.render_seconds * 1000)
+        logger.info(f"Job {job.id} rendered a {extension} report of "
+                    f"{generator.summary['transaction_count']} transactions in {render_ms} ms")
+
+    job.succeed(message='Report ready', result_path=path, result_name=filename, result_mimetype=mimetype,
+                render_ms=render_ms)
+
+
+JOB_HANDLERS = {
+    'import': run_import,
+    'export': run_export
+}
+
+
+def check_restart(job):
+    """Refuse to run a job again after its worker stopped, unless it can safely start over"""
+    if job.kind not in RESTARTABLE_KINDS:
+        raise RuntimeError('The worker stopped during this import. Some transactions may already be imported; '
+                           'check the account before importing the file again.')
+    if job.attempts > MAX_ATTEMPTS:
+        raise RuntimeError(f'The worker stopped during this job {MAX_ATTEMPTS} times')
+
+
+@contextmanager
+def heartbeat(job_id, interval):
+    """Refresh the job's heartbeat every interval seconds from a thread while the block runs"""
+    engine = db.engine
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                with engine.begin() as connection:
+                    Job.beat(connection, job_id)
+            except Exception:
+                logger.warning(f"Could not record the heartbeat of job {job_id}", exc_info=True)
+
+    thread = threading.Thread(target=beat, name=f'job-{job_id}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_job(job):
+    """Run a claimed job, recording failure on the job instead of raising"""
+    try:
+        if job.attempts > 1:
+            check_restart(job)
+        with heartbeat(job.id, current_app.config['JOB_STALE_SECONDS'] / 10):
+            JOB_HANDLERS[job.kind](job)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Job {job.id} ({job.kind}) failed")
+        job.fail(str(e))
+
+
+def work(interval=2.0, once=False):
+    """
+    Run queued jobs one at a time, polling every interval seconds when the queue is empty.
+    Jobs left running by a worker that stopped are picked up once their heartbeat is
+    JOB_STALE_SECONDS old. With once, return as soon as the queue is drained. Returns the
+    number of jobs run.
+    """
+    processed = 0
+    while True:
+        job = Job.claim_next(stale_after=current_app.config['JOB_STALE_SECONDS'])
+        if job is None:
+            if once:
+                return processed
+            time.sleep(interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+
+def purge_jobs(days):
+    """Delete finished jobs older than the given number of days along with their files"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    jobs = Job.query.filter(Job.status.in_([Job.SUCCEEDED, Job.FAILED]), Job.finished_at < cutoff).all()
+
+    for job in jobs:
+        for path in (job.result_path, job.params.get('path')):
+            if path and os.path.exists(path):
+                os.remove(path)
+        db.session.delete(job)
+
+    db.session.commit()
+    return len(jobs)
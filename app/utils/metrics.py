@@ -0,0 +1,163 @@
+"""
+Prometheus metrics, served at /metrics in the text exposition format when METRICS is enabled.
+
+Web workers and the job worker each record their own numbers. When PROMETHEUS_MULTIPROC_DIR
+is set (gunicorn.conf.py sets it), every process writes them to files in that directory and
+/metrics adds up the files of all processes, so any worker can answer for all of them.
+"""
+import hmac
+import os
+import time
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+PREFIX = 'moneyminder_'
+
+# Histogram buckets in seconds, bytes and rows per second
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+POOL_WAIT_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+REPORT_BUCKETS = (.1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+REPORT_SIZE_BUCKETS = (10e3, 50e3, 100e3, 500e3, 1e6, 5e6, 10e6, 50e6, 100e6)
+IMPORT_RATE_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+_metrics = None
+
+
+class Metrics:
+    """The metrics of this process; created once, when the first app enables them"""
+
+    def __init__(self):
+        from prometheus_client import CollectorRegistry, Counter, Histogram
+
+        self.registry = CollectorRegistry()
+
+        def histogram(name, documentation, labels=(), **kwargs):
+            return Histogram(PREFIX + name, documentation, labels, registry=self.registry, **kwargs)
+
+        def counter(name, documentation, labels=()):
+            return Counter(PREFIX + name, documentation, labels, registry=self.registry)
+
+        self.request_duration = histogram('request_duration_seconds', 'Time to handle a request',
+                                          ['endpoint'], buckets=LATENCY_BUCKETS)
+        self.responses = counter('responses', 'Responses sent', ['endpoint', 'status'])
+        self.db_queries = counter('db_queries', 'SQL statements executed', ['endpoint'])
+        self.db_pool_wait = histogram('db_pool_checkout_seconds',
+                                      'Time to check a connection out of the pool, opening one if needed',
+                                      buckets=POOL_WAIT_BUCKETS)
+        self.report_duration = histogram('report_duration_seconds', 'Time to generate a report',
+                                         ['format'], buckets=REPORT_BUCKETS)
+        self.report_size = histogram('report_size_bytes', 'Size of generated reports',
+                                     ['format'], buckets=REPORT_SIZE_BUCKETS)
+        self.import_rows = counter('import_rows', 'CSV rows imported, by outcome', ['outcome'])
+        self.import_rate = histogram('import_rows_per_second', 'Rows imported per second by each import',
+                                     buckets=IMPORT_RATE_BUCKETS)
+        self.cache_lookups = counter('cache_lookups', 'Cache lookups, by cache and result',
+                                     ['cache', 'result'])
+
+
+def _endpoint():
+    """The label of the current request's endpoint; 'none' outside requests and for unknown URLs"""
+    if has_request_context():
+        return request.endpoint or 'none'
+    return 'none'
+
+
+def observe_report(format, seconds, size):
+    if _metrics is not None:
+        _metrics.report_duration.labels(format).observe(seconds)
+        _metrics.report_size.labels(format).observe(size)
+
+
+def observe_import(imported, errors, seconds):
+    if _metrics is not None:
+        _metrics.import_rows.labels('imported').inc(imported)
+        _metrics.import_rows.labels('error').inc(errors)
+        if seconds > 0:
+            _metrics.import_rate.observe(imported / seconds)
+
+
+def count_cache_lookup(cache, hit):
+    """Record a lookup in one of the caches; the hit ratio is hits over all lookups"""
+    if _metrics is not None:
+        _metrics.cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Count each statement against the endpoint that ran it"""
+    _metrics.db_queries.labels(_endpoint()).inc()
+
+
+def _time_checkouts(pool):
+    """
+    Time the pool's checkouts. The pool has no event before a checkout, so its connect is
+    wrapped; so is recreate, since Engine.dispose replaces the pool with a new one.
+    """
+    connect, recreate = pool.connect, pool.recreate
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            _metrics.db_pool_wait.observe(time.perf_counter() - started)
+
+    def timed_recreate():
+        return _time_checkouts(recreate())
+
+    pool.connect = timed_connect
+    pool.recreate = timed_recreate
+    return pool
+
+
+def registry():
+    """The registry to expose: this process's metrics, or those of all processes"""
+    from prometheus_client import CollectorRegistry, multiprocess
+
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return _metrics.registry
+    combined = CollectorRegistry()
+    multiprocess.MultiProcessCollector(combined)
+    return combined
+
+
+def metrics_view():
+    """Serve the metrics; with METRICS_TOKEN set, scrapers must send it as a bearer token"""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        sent = request.headers.get('Authorization', '').encode('utf-8')
+        if not hmac.compare_digest(sent, f'Bearer {token}'.encode('utf-8')):
+            abort(401)
+    return Response(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app, engine):
+    """Record the app's metrics and serve them at /metrics when METRICS is enabled"""
+    global _metrics
+    if not app.config.get('METRICS'):
+        return
+    # /metrics names every endpoint and its traffic; only development and tests serve it openly
+    if not app.config.get('METRICS_TOKEN') and not (app.debug or app.testing):
+        raise RuntimeError('METRICS_TOKEN must be set to serve metrics outside development')
+    if _metrics is None:
+        _metrics = Metrics()
+
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    _time_checkouts(engine.pool)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = _endpoint()
+            _metrics.request_duration.labels(endpoint).observe(time.perf_counter() - started)
+            _metrics.responses.labels(endpoint, str(response.status_code)).inc()
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
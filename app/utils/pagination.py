@@ -0,0 +1,96 @@
+import base64
+import binascii
+from datetime import datetime
+
+from flask import request, url_for
+
+from app.models import db
+from app.models.transaction import Transaction
+
+
+class KeysetPage:
+    """
+    One page of transactions ordered newest first by (date, id).
+    Cursors point at the boundary rows, so fetching any page costs an index range
+    scan of per_page rows no matter how deep into the history it is.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(transaction):
+    """Encode a transaction's (date, id) position as an opaque URL-safe cursor"""
+    value = f'{transaction.date.isoformat()}|{transaction.id}'
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into (date, id); raises ValueError for malformed input"""
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        date, transaction_id = value.split('|', 1)
+        return datetime.fromisoformat(date), transaction_id
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def paginate_transactions(query, per_page, after=None, before=None):
+    """
+    Get the page of a transaction query following the after cursor (older rows)
+    or preceding the before cursor (newer rows); the newest page when neither is given.
+    """
+    position = db.tuple_(Transaction.date, Transaction.id)
+
+    if before:
+        # Walk towards newer rows, then flip the page back to newest first
+        rows = query.filter(position > decode_cursor(before)) \
+            .order_by(Transaction.date.asc(), Transaction.id.asc()) \
+            .limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        return KeysetPage(
+            items,
+            next_cursor=encode_cursor(items[-1]) if items else None,
+            prev_cursor=encode_cursor(items[0]) if has_more else None
+        )
+
+    if after:
+        query = query.filter(position < decode_cursor(after))
+
+    rows = query.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if len(rows) > per_page else None,
+        prev_cursor=encode_cursor(items[0]) if after and items else None
+    )
+
+
+def get_per_page(args, config):
+    """Read the page size from request args, bounded by the configured maximum"""
+    per_page = args.get('per_page', type=int) or config['TRANSACTIONS_PER_PAGE']
+    return max(1, min(per_page, config['MAX_TRANSACTIONS_PER_PAGE']))
+
+
+def page_url(**cursor):
+    """URL of the current view with its filters kept and the given cursor replacing any other"""
+    args = {key: value for key, value in request.args.items() if key not in ('after', 'before')}
+    args.update(cursor)
+    return url_for(request.endpoint, **request.view_args, **args)
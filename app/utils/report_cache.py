@@ -0,0 +1,120 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from flask import current_app
+
+from app.models.account import Account
+from app.utils.metrics import count_cache_lookup
+
+
+class ReportCache:
+    """
+    Generated report files on local disk, addressed by a hash of the report filters
+    and the account's data version, so a cached report is never served after the
+    data behind it changed. The directory is kept under max_bytes by evicting the
+    least recently used files.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_app(cls):
+        directory = current_app.config.get('REPORT_CACHE_DIR') or \
+            os.path.join(current_app.instance_path, 'report_cache')
+        return cls(directory, current_app.config['REPORT_CACHE_MAX_BYTES'])
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(user_id, account_id, start_date, end_date, format, data_version):
+        """Hash the values that determine a report's content"""
+        parts = [
+            user_id,
+            account_id or '',
+            start_date.isoformat() if start_date else '',
+            end_date.isoformat() if end_date else '',
+            format.lower(),
+            str(data_version)
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def key_for(self, filters):
+        """
+        Get the cache key for ExportFilters. Read it before rendering: data saved
+        afterwards then bumps the version and the cached file is simply skipped.
+        """
+        data_version = Account.get_data_version(filters.user_id, filters.account_id)
+        return self.make_key(filters.user_id, filters.account_id, filters.start_date,
+                             filters.end_date, filters.format, data_version)
+
+    def path(self, user_id, key, format):
+        return os.path.join(self.directory, user_id, f'{key}.{format.lower()}')
+
+    def get(self, user_id, key, format):
+        """Get the path of a cached report, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self.path(user_id, key, format)
+        try:
+            # Refresh the modification time, which orders eviction
+            os.utime(path)
+        except FileNotFoundError:
+            count_cache_lookup('report', hit=False)
+            return None
+        count_cache_lookup('report', hit=True)
+        return path
+
+    def put(self, user_id, key, format, source_path):
+        """Add a generated report to the cache, evicting old entries if it grew too large"""
+        if not self.enabled:
+            return None
+
+        path = self.path(user_id, key, format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Link (or copy) under a temporary name first so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        os.close(fd)
+        os.remove(temp_path)
+        link_or_copy(source_path, temp_path)
+        os.replace(temp_path, path)
+
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used reports until the cache fits in max_bytes"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def link_or_copy(source, destination):
+    """Hard link a file when source and destination share a filesystem, copy it otherwise"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
@@ -1,43 +1,186 @@
 import io
-import pandas as pd
+import os
+import tempfile
+import time
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from sqlalchemy.orm import Query
+
+from app.models import db
+from app.models.account import Account
+from app.models.money import Money
+from app.models.transaction import Transaction
+from app.utils.metrics import observe_report
+
+# Rows fetched per round trip when streaming transactions from a query
+STREAM_BATCH_SIZE = 1000
+
+# Transaction rows per PDF page; the first page also carries the title and summary
+PDF_ROWS_PER_PAGE = 38
+PDF_FIRST_PAGE_ROWS = 12
+
+# Generated PDFs larger than this are spooled to a temporary file instead of memory
+PDF_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+TRANSACTION_COLUMNS = ['Date', 'Category', 'Tag', 'Description', 'Amount', 'Type']
+
+REPORT_MIMETYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf'
+}
+
+
+class FlowableFeed(list):
+    """
+    The flowables of a document, with the rest pulled from an iterator whenever the list
+    runs empty. ReportLab's doc.build only reads and removes the head of its list, so
+    flowables are created as the layout reaches them instead of all up front.
+    """
+
+    def __init__(self, flowables, rest):
+        super().__init__(flowables)
+        self.rest = rest
+
+    def _fill(self):
+        if not super().__len__():
+            flowable = next(self.rest, None)
+            if flowable is not None:
+                self.append(flowable)
+
+    def __len__(self):
+        self._fill()
+        return super().__len__()
+
+    def __getitem__(self, index):
+        self._fill()
+        return super().__getitem__(index)
+
+
+def output_size(output):
+    """Size in bytes of a generated report, given its path or file object"""
+    if isinstance(output, (str, os.PathLike)):
+        return os.path.getsize(output)
+    output.seek(0, io.SEEK_END)
+    return output.tell()
 
 
 class ReportGenerator:
     def __init__(self, transactions, filters):
+        """
+        transactions is either a list of Transaction objects or a Transaction query.
+        Queries are summarized in SQL and streamed row by row, so a report never
+        holds the full result set in memory.
+        """
         self.transactions = transactions
         self.filters = filters
         self.summary = self._calculate_summary()
-        self.account = transactions[0].account if transactions else None
-
-        # Define colors
-        self.COLOR_INCOME = colors.HexColor('#4CAF50')  # Green
-        self.COLOR_EXPENSE = colors.HexColor('#F44336')  # Red
-        self.COLOR_HEADER = colors.HexColor('#F8F9FA')  # Light gray
-        self.COLOR_BORDER = colors.HexColor('#DEE2E6')  # Light border
+        self.account = self._get_account()
+
+    @property
+    def is_query(self):
+        return isinstance(self.transactions, Query)
+
+    def _get_account(self):
+        if self.filters.account_id:
+            account = db.session.get(Account, self.filters.account_id)
+            if account:
+                return account
+        if self.is_query:
+            first = self.transactions.first()
+            return first.account if first else None
+        return self.transactions[0].account if self.transactions else None
 
     def _calculate_summary(self):
         """Calculate report summary"""
-        total_income = sum(float(t.amount) for t in self.transactions if t.transaction_type == 'income')
-        total_expenses = sum(float(t.amount) for t in self.transactions if t.transaction_type == 'expense')
+        if self.is_query:
+            # Amounts are signed, so expense totals come back negative
+            totals = dict(
+                (transaction_type, (float(abs(Money.of(amount))), count))
+                for transaction_type, amount, count in self.transactions.with_entities(
+                    Transaction.transaction_type,
+                    db.func.sum(Transaction.signed_amount),
+                    db.func.count(Transaction.id)
+                ).order_by(None).group_by(Transaction.transaction_type)
+            )
+            total_income = totals.get('income', (0.0, 0))[0]
+            total_expenses = totals.get('expense', (0.0, 0))[0]
+            transaction_count = sum(count for _, count in totals.values())
+        else:
+            # Summed as integer minor units, converted once
+            total_income = float(sum(Money.of(t.amount) for t in self.transactions if t.transaction_type == 'income'))
+            total_expenses = float(sum(Money.of(t.amount) for t in self.transactions
+                                       if t.transaction_type == 'expense'))
+            transaction_count = len(self.transactions)
 
         return {
             'total_income': total_income,
             'total_expenses': total_expenses,
             'balance': total_income - total_expenses,
-            'transaction_count': len(self.transactions)
+            'transaction_count': transaction_count
         }
 
-    def generate_excel(self):
-        """Generate Excel report with enhanced formatting"""
-        output = io.BytesIO()
-
-        # Create account summary data
+    def iter_rows(self):
+        """
+        Yield (date, category, tag, description, amount, transaction_type) per transaction.
+        Queries are read through a server-side cursor in batches of STREAM_BATCH_SIZE.
+        """
+        if not self.is_query:
+            for t in self.transactions:
+                yield t.date, t.category, t.tag, t.description, t.amount, t.transaction_type
+            return
+
+        rows = self.transactions.with_entities(
+            Transaction.date,
+            Transaction.category,
+            Transaction.tag,
+            Transaction.description,
+            Transaction.amount,
+            Transaction.transaction_type
+        ).yield_per(STREAM_BATCH_SIZE)
+        for row in rows:
+            yield tuple(row)
+
+    def generate_excel(self, output=None):
+        """
+        Generate Excel report with enhanced formatting.
+        Rows are written straight to disk in xlsxwriter's constant_memory mode, so
+        memory use stays flat however many transactions the report covers.
+        output may be a path or a file object; a BytesIO is returned when omitted.
+        """
+        import xlsxwriter
+
+        output = output if output is not None else io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+
+        # Add formats
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#f8f9fa',
+            'border': 1,
+            'text_wrap': True,
+            'align': 'center',
+            'valign': 'vcenter',
+            'font_size': 11
+        })
+
+        income_format = workbook.add_format({
+            'font_color': '#4CAF50',
+            'bold': True,
+            'num_format': f'"{self.account.currency}" #,##0.00'
+        })
+
+        expense_format = workbook.add_format({
+            'font_color': '#F44336',
+            'bold': True,
+            'num_format': f'"{self.account.currency}" #,##0.00'
+        })
+
+        date_format = workbook.add_format({
+            'num_format': 'yyyy-mm-dd',
+            'align': 'center'
+        })
+
+        # Create Summary sheet
         summary_data = {
             'Account Name': self.account.name,
             'Account Category': self.account.account_type.title(),
@@ -46,115 +189,97 @@ class ReportGenerator:
             'Total Expenses': f"{self.account.currency} {self.summary['total_expenses']:,.2f}",
             'Net Balance': f"{self.account.currency} {self.summary['balance']:,.2f}"
         }
-
-        # Create transaction data
-        transaction_data = []
-        for t in self.transactions:
-            transaction_data.append({
-                'Date': t.date.strftime('%Y-%m-%d'),
-                'Category': t.category,
-                'Tag': t.tag,
-                'Description': t.description,
-                'Amount': float(t.amount),  # Keep as number for conditional formatting
-                'Type': t.transaction_type.capitalize()
-            })
-
-        # Create Excel writer
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            workbook = writer.book
-
-            # Add formats
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#f8f9fa',
-                'border': 1,
-                'text_wrap': True,
-                'align': 'center',
-                'valign': 'vcenter',
-                'font_size': 11
-            })
-
-            income_format = workbook.add_format({
-                'font_color': '#4CAF50',
-                'bold': True,
-                'num_format': f'"{self.account.currency}" #,##0.00'
-            })
-
-            expense_format = workbook.add_format({
-                'font_color': '#F44336',
-                'bold': True,
-                'num_format': f'"{self.account.currency}" #,##0.00'
-            })
-
-            date_format = workbook.add_format({
-                'num_format': 'yyyy-mm-dd',
-                'align': 'center'
-            })
-
-            # Create Summary sheet
-            summary_df = pd.DataFrame([summary_data])
-            summary_df.to_excel(writer, sheet_name='Summary', index=False, startrow=1)
-            summary_sheet = writer.sheets['Summary']
-
-            # Add title to summary sheet with date range
-            title = f'Account Report ({self.filters.start_date.strftime("%Y-%m-%d")} to {self.filters.end_date.strftime("%Y-%m-%d")})'
-            summary_sheet.merge_range('A1:F1', title,
-                                      workbook.add_format({
-                                          'bold': True,
-                                          'align': 'center',
-                                          'font_size': 14,
-                                          'border': 1
-                                      }))
-
-            # Format Summary sheet
-            for col_num, value in enumerate(summary_df.columns.values):
-                summary_sheet.write(1, col_num, value, header_format)
-                summary_sheet.set_column(col_num, col_num, 20)
-
-            # Create Transactions sheet
-            trans_df = pd.DataFrame(transaction_data)
-            trans_df.to_excel(writer, sheet_name='Transactions', index=False)
-            trans_sheet = writer.sheets['Transactions']
-
-            # Format Transactions sheet
-            for col_num, value in enumerate(trans_df.columns.values):
-                trans_sheet.write(0, col_num, value, header_format)
-
-            # Set column widths
-            trans_sheet.set_column('A:A', 12)  # Date
-            trans_sheet.set_column('B:B', 15)  # Category
-            trans_sheet.set_column('C:C', 15)  # Tag
-            trans_sheet.set_column('D:D', 40)  # Description
-            trans_sheet.set_column('E:E', 15)  # Amount
-            trans_sheet.set_column('F:F', 10)  # Type
-
-            # Apply conditional formatting to Amount column
-            trans_sheet.conditional_format(1, 4, len(transaction_data), 4, {
+        summary_sheet = workbook.add_worksheet('Summary')
+        summary_sheet.set_column(0, len(summary_data) - 1, 20)
+
+        # Add title to summary sheet with date range
+        title = f'Account Report ({self.filters.start_date.strftime("%Y-%m-%d")} to {self.filters.end_date.strftime("%Y-%m-%d")})'
+        summary_sheet.merge_range('A1:F1', title,
+                                  workbook.add_format({
+                                      'bold': True,
+                                      'align': 'center',
+                                      'font_size': 14,
+                                      'border': 1
+                                  }))
+        summary_sheet.write_row(1, 0, list(summary_data.keys()), header_format)
+        summary_sheet.write_row(2, 0, list(summary_data.values()))
+
+        # Create Transactions sheet; constant_memory requires rows in order, header first
+        trans_sheet = workbook.add_worksheet('Transactions')
+        trans_sheet.set_column('A:A', 12, date_format)  # Date
+        trans_sheet.set_column('B:B', 15)  # Category
+        trans_sheet.set_column('C:C', 15)  # Tag
+        trans_sheet.set_column('D:D', 40)  # Description
+        trans_sheet.set_column('E:E', 15)  # Amount
+        trans_sheet.set_column('F:F', 10)  # Type
+        trans_sheet.write_row(0, 0, TRANSACTION_COLUMNS, header_format)
+
+        row_count = 0
+        for row_count, (date, category, tag, description, amount, transaction_type) in enumerate(self.iter_rows(), 1):
+            trans_sheet.write_datetime(row_count, 0, date, date_format)
+            trans_sheet.write_string(row_count, 1, category)
+            trans_sheet.write_string(row_count, 2, tag)
+            trans_sheet.write_string(row_count, 3, description or '')
+            trans_sheet.write_number(row_count, 4, float(amount))  # Keep as number for conditional formatting
+            trans_sheet.write_string(row_count, 5, transaction_type.capitalize())
+
+        # Apply conditional formatting to Amount column
+        if row_count:
+            trans_sheet.conditional_format(1, 4, row_count, 4, {
                 'type': 'formula',
                 'criteria': '=$F2="Income"',
                 'format': income_format
             })
-            trans_sheet.conditional_format(1, 4, len(transaction_data), 4, {
+            trans_sheet.conditional_format(1, 4, row_count, 4, {
                 'type': 'formula',
                 'criteria': '=$F2="Expense"',
                 'format': expense_format
             })
 
-            # Format date column
-            trans_sheet.set_column('A:A', 12, date_format)
-
-            # Add filters to columns
-            trans_sheet.autofilter(0, 0, len(transaction_data), len(trans_df.columns) - 1)
+        # Add filters to columns
+        trans_sheet.autofilter(0, 0, row_count, len(TRANSACTION_COLUMNS) - 1)
 
-            # Freeze the header row
-            trans_sheet.freeze_panes(1, 0)
+        # Freeze the header row
+        trans_sheet.freeze_panes(1, 0)
 
-        output.seek(0)
+        workbook.close()
+        if isinstance(output, io.BytesIO):
+            output.seek(0)
         return output
 
-    def generate_pdf(self):
-        """Generate PDF report with enhanced formatting"""
-        output = io.BytesIO()
+    def _pdf_pages(self):
+        """Split streamed rows into page-sized lists; the first page also holds the summary"""
+        page, size = [], PDF_FIRST_PAGE_ROWS
+        for row in self.iter_rows():
+            page.append(row)
+            if len(page) == size:
+                yield page
+                page, size = [], PDF_ROWS_PER_PAGE
+        if page:
+            yield page
+
+    def generate_pdf(self, output=None):
+        """
+        Generate PDF report with enhanced formatting.
+        Transactions are laid out one page-sized table at a time, each with a repeated
+        header and page subtotals. Each table is made when the layout reaches its page,
+        so only the page being drawn is held in memory. output may be a path or file
+        object; a spooled temporary file is returned when omitted.
+        """
+        # ReportLab is slow to import and only needed here, so workers load it on first use
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+        # Define colors
+        self.COLOR_INCOME = colors.HexColor('#4CAF50')  # Green
+        self.COLOR_EXPENSE = colors.HexColor('#F44336')  # Red
+        self.COLOR_HEADER = colors.HexColor('#F8F9FA')  # Light gray
+        self.COLOR_BORDER = colors.HexColor('#DEE2E6')  # Light border
+
+        output = output if output is not None else tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_SIZE)
         doc = SimpleDocTemplate(output, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
         styles = getSampleStyleSheet()
         elements = []
@@ -216,27 +341,11 @@ class ReportGenerator:
         elements.append(summary_table)
         elements.append(Spacer(1, 30))
 
-        # Transactions table
+        # Transactions, one table per page so layout cost stays linear in the row count
         elements.append(Paragraph("Transaction History", subtitle_style))
 
-        # Table header and data
-        trans_data = [['Date', 'Category', 'Tag', 'Description', 'Amount', 'Type']]
-        for t in self.transactions:
-            amount_str = f"{self.account.currency} {float(t.amount):,.2f}"
-            trans_data.append([
-                t.date.strftime('%Y-%m-%d'),
-                t.category,
-                t.tag,
-                t.description,
-                amount_str,
-                t.transaction_type.capitalize()
-            ])
-
-        # Create transaction table with specific column widths
-        trans_table = Table(trans_data, colWidths=[1 * inch, 1.5 * inch, 1 * inch, 2 * inch, 1.2 * inch, 1 * inch])
-
-        # Basic table style
-        table_style = [
+        col_widths = [1 * inch, 1.5 * inch, 1 * inch, 2 * inch, 1.2 * inch, 1 * inch]
+        base_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), self.COLOR_HEADER),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
@@ -247,21 +356,51 @@ class ReportGenerator:
             ('FONTSIZE', (0, 1), (-1, -1), 8),
             ('GRID', (0, 0), (-1, -1), 1, self.COLOR_BORDER),
             ('ALIGN', (-2, 1), (-2, -1), 'RIGHT'),  # Align amounts right
-        ]
-
-        # Add row-specific styles for income/expense
-        for i, row in enumerate(trans_data[1:], 1):
-            if row[-1] == 'Income':
-                table_style.append(('TEXTCOLOR', (-2, i), (-2, i), self.COLOR_INCOME))
-            else:
-                table_style.append(('TEXTCOLOR', (-2, i), (-2, i), self.COLOR_EXPENSE))
-
-            # Add alternating row colors
-            if i % 2 == 0:
-                table_style.append(('BACKGROUND', (0, i), (-1, i), colors.HexColor('#f8f9fa')))
-
-        trans_table.setStyle(TableStyle(table_style))
-        elements.append(trans_table)
+            ('ROWBACKGROUNDS', (0, 1), (-1, -3), [colors.white, colors.HexColor('#f8f9fa')]),
+            # Page subtotal rows
+            ('FONTNAME', (0, -2), (-1, -1), 'Helvetica-Bold'),
+            ('TEXTCOLOR', (-2, -2), (-2, -2), self.COLOR_INCOME),
+            ('TEXTCOLOR', (-2, -1), (-2, -1), self.COLOR_EXPENSE),
+        ])
+        # Shared per-row styles, indexed by row position within a page
+        income_styles = [('TEXTCOLOR', (-2, i), (-2, i), self.COLOR_INCOME) for i in range(PDF_ROWS_PER_PAGE + 1)]
+        expense_styles = [('TEXTCOLOR', (-2, i), (-2, i), self.COLOR_EXPENSE) for i in range(PDF_ROWS_PER_PAGE + 1)]
+
+        def page_table(rows):
+            page_data = [TRANSACTION_COLUMNS]
+            page_styles = []
+            income = expenses = 0.0
+            for i, (date, category, tag, description, amount, transaction_type) in enumerate(rows, 1):
+                amount = float(amount)
+                page_data.append([
+                    date.strftime('%Y-%m-%d'),
+                    category,
+                    tag,
+                    description,
+                    f"{self.account.currency} {amount:,.2f}",
+                    transaction_type.capitalize()
+                ])
+                if transaction_type == 'income':
+                    income += amount
+                    page_styles.append(income_styles[i])
+                else:
+                    expenses += amount
+                    page_styles.append(expense_styles[i])
+
+            page_data.append(['', '', '', 'Page subtotal income', f"{self.account.currency} {income:,.2f}", ''])
+            page_data.append(['', '', '', 'Page subtotal expenses', f"{self.account.currency} {expenses:,.2f}", ''])
+
+            # repeatRows keeps the header if a page table still has to be split
+            table = Table(page_data, colWidths=col_widths, repeatRows=1)
+            table.setStyle(base_style)
+            table.setStyle(TableStyle(page_styles))
+            return table
+
+        def page_tables():
+            for page, rows in enumerate(self._pdf_pages()):
+                if page:
+                    yield PageBreak()
+                yield page_table(rows)
 
         # Add page numbers
         def add_page_number(canvas, doc):
@@ -269,28 +408,34 @@ class ReportGenerator:
             text = "Page %s" % page_num
             canvas.drawRightString(doc.pagesize[0] - 30, 30, text)
 
-        # Build PDF
-        doc.build(elements, onFirstPage=add_page_number, onLaterPages=add_page_number)
-        output.seek(0)
+        # Build PDF; page tables are made as the layout reaches them and dropped once drawn
+        doc.build(FlowableFeed(elements, page_tables()), onFirstPage=add_page_number, onLaterPages=add_page_number)
+        if hasattr(output, 'seek'):
+            output.seek(0)
         return output
 
-    def export(self):
-        """Export report in specified format with proper filename"""
-        output = None
-        mimetype = None
+    def export(self, output=None):
+        """
+        Export report in specified format with proper filename.
+        output may be a path or file object to write to; an in-memory or spooled
+        temporary file is used when omitted.
+        """
         timestamp = datetime.now().strftime('%Y%m%d')
+        started = time.perf_counter()
 
         if self.filters.format.lower() == 'xlsx':
-            output = self.generate_excel()
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            filename = f'spending_report_{timestamp}.xlsx'
+            format = 'xlsx'
+            output = self.generate_excel(output)
         else:
-            output = self.generate_pdf()
-            mimetype = 'application/pdf'
-            filename = f'spending_report_{timestamp}.pdf'
+            format = 'pdf'
+            output = self.generate_pdf(output)
+        self.render_seconds = time.perf_counter() - started
+        observe_report(format, self.render_seconds, output_size(output))
+        mimetype = REPORT_MIMETYPES[format]
+        filename = f'spending_report_{timestamp}.{format}'
 
         # Ensure the output is at the start
-        if output:
+        if hasattr(output, 'seek'):
             output.seek(0)
 
         return output, mimetype, filename
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import logging
+import time
+from datetime import datetime
+from decimal import InvalidOperation
+
+from app.models import db, generate_id
+from app.models.account import Account
+from app.models.budget import Budget
+from app.models.balance_snapshot import AccountBalanceSnapshot
+from app.models.daily_rollup import DailyRollup
+from app.models.lookup import ensure_names
+from app.models.transaction import Transaction, sign_amount
+from app.utils.metrics import observe_import
+
+logger = logging.getLogger(__name__)
+
+# Column order for files without a header row
+COLUMNS = ('amount', 'type', 'description', 'date', 'category', 'tag')
+
+# Line numbers of rows with errors kept for the import summary
+MAX_ERROR_LINES = 20
+
+
+class TransactionImporter:
+    """
+    Streams a CSV upload into the transactions table.
+
+    Rows are parsed one at a time and inserted in chunks with a single bulk
+    INSERT each. Every chunk applies one net balance delta and one rollup
+    upsert per key in its own database transaction. Budgets are invalidated
+    once at the end. A chunk the database rejects is retried one row at a time,
+    so only its bad rows are lost; error_lines holds the CSV line numbers of the
+    first MAX_ERROR_LINES rows with errors.
+
+    progress, if given, is called as progress(imported, errors) after every chunk.
+    """
+
+    def __init__(self, account, user_id, has_headers=True, chunk_size=1000, progress=None):
+        if account.user_id != user_id:
+            raise ValueError("Account does not belong to this user")
+
+        self.account_id = account.id
+        self.user_id = user_id
+        self.has_headers = has_headers
+        self.chunk_size = chunk_size
+        self.progress = progress
+
+        self.imported = 0
+        self.errors = 0
+        self.error_lines = []
+        self._categories = set()
+        self._first_date = None
+        self._last_date = None
+
+    def run(self, stream):
+        """Import every row from a binary file stream; returns (imported, errors)"""
+        started = time.perf_counter()
+        lines = codecs.iterdecode(stream, 'utf-8-sig')
+        reader = csv.DictReader(lines) if self.has_headers else csv.reader(lines)
+
+        chunk, chunk_lines = [], []
+        for row in reader:
+            values = self._parse_row(row)
+            if values is None:
+                self._add_errors([reader.line_num])
+                continue
+
+            chunk.append(values)
+            chunk_lines.append(reader.line_num)
+            if len(chunk) >= self.chunk_size:
+                self._write_chunk(chunk, chunk_lines)
+                chunk, chunk_lines = [], []
+                self._report_progress()
+
+        if chunk:
+            self._write_chunk(chunk, chunk_lines)
+            self._report_progress()
+
+        self._invalidate_budgets()
+        observe_import(self.imported, self.errors, time.perf_counter() - started)
+        return self.imported, self.errors
+
+    def _parse_row(self, row):
+        """Convert a CSV row into transaction column values, or None if it is invalid"""
+        try:
+            if not self.has_headers:
+                row = dict(zip(COLUMNS, row))
+
+            transaction_type = row['type'].strip().lower()
+            if transaction_type not in ('income', 'expense'):
+                return None
+
+            return {
+                'id': generate_id(),
+                'signed_amount': sign_amount(row['amount'], transaction_type),
+                'transaction_type': transaction_type,
+                'description': row['description'],
+                'date': datetime.strptime(row['date'], '%Y-%m-%d'),
+                'category': row['category'],
+                'tag': row['tag'],
+                'user_id': self.user_id,
+                'account_id': self.account_id
+            }
+        except (KeyError, TypeError, ValueError, InvalidOperation, AttributeError):
+            return None
+
+    def _add_errors(self, lines):
+        self.errors += len(lines)
+        self.error_lines.extend(lines[:MAX_ERROR_LINES - len(self.error_lines)])
+
+    def _report_progress(self):
+        if self.progress:
+            self.progress(self.imported, self.errors)
+
+    def _write_chunk(self, chunk, chunk_lines):
+        """
+        Insert one chunk and its balance, snapshot and rollup changes in a single database
+        transaction; chunk_lines are the CSV line numbers of the chunk's rows.
+        """
+        balance_delta = sum(row['signed_amount'] for row in chunk)
+
+        try:
+            # Update the account row first: its row lock queues concurrent imports into the same
+            # account, which would otherwise deadlock upserting rollup and snapshot rows
+            Account.query.filter_by(id=self.account_id).update(
+                {Account.balance: Account.balance + balance_delta,
+                 Account.data_version: Account.data_version + 1},
+                synchronize_session=False
+            )
+            # Bulk inserts skip the mapper events that add new category and tag names
+            ensure_names(db.session.connection(), {row['category'] for row in chunk}, {row['tag'] for row in chunk})
+            db.session.execute(db.insert(Transaction), chunk)
+            DailyRollup.add_rows(chunk)
+            AccountBalanceSnapshot.apply(self.user_id, self.account_id,
+                                         [(row['date'], row['signed_amount']) for row in chunk])
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            if len(chunk) > 1:
+                logger.warning(f"Retrying chunk of {len(chunk)} transactions row by row: {str(e)}")
+                for row, line in zip(chunk, chunk_lines):
+                    self._write_chunk([row], [line])
+            else:
+                logger.error(f"Error importing transaction on line {chunk_lines[0]}: {str(e)}")
+                self._add_errors(chunk_lines)
+            return
+
+        self.imported += len(chunk)
+        for row in chunk:
+            self._categories.add(row['category'])
+            if self._first_date is None or row['date'] < self._first_date:
+                self._first_date = row['date']
+            if self._last_date is None or row['date'] > self._last_date:
+                self._last_date = row['date']
+
+    def _invalidate_budgets(self):
+        """Touch every budget the imported transactions fall into, once for the whole import"""
+        if not self.imported:
+            return
+
+        Budget.query.filter(
+            Budget.user_id == self.user_id,
+            Budget.category.in_(self._categories),
+            Budget.start_date <= self._last_date,
+            Budget.end_date >= self._first_date
+        ).update({Budget.updated_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.models import db
+from app.models.user import User
+from app.utils.metrics import count_cache_lookup
+
+
+class UserCache:
+    """
+    Per-process LRU of user rows for the login user loader, so most authenticated
+    requests skip the users query. Entries expire after ttl seconds and are evicted
+    whenever this process updates or deletes the user. Other processes keep their
+    copy until it expires, except that sessions carry the user's session version and
+    an entry loaded after a password change rejects sessions with an older one.
+    """
+
+    def __init__(self, max_size, ttl, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_app(cls):
+        if 'user_cache' not in current_app.extensions:
+            current_app.extensions['user_cache'] = cls(current_app.config['USER_CACHE_SIZE'],
+                                                       current_app.config['USER_CACHE_TTL'])
+        return current_app.extensions['user_cache']
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, user_id):
+        """Get the cached column values of a user, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires <= self.clock():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return values
+
+    def put(self, user):
+        if not self.enabled:
+            return
+        values = {attr.key: getattr(user, attr.key) for attr in db.inspect(User).column_attrs}
+        with self._lock:
+            self._entries[user.id] = (self.clock() + self.ttl, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, session_id):
+        """
+        The login manager's user loader: get the user of a session id made by User.get_id,
+        or None if the user is gone or the session predates a password change.
+        """
+        user_id, _, version = session_id.partition(':')
+        values = self.get(user_id)
+        if self.enabled:
+            count_cache_lookup('user', hit=values is not None)
+        if values is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            self.put(user)
+        else:
+            user = self.attach(values)
+
+        # Sessions from before version stamps were added count as version 0
+        if str(user.session_version) != (version or '0'):
+            return None
+        return user
+
+    @staticmethod
+    def attach(values):
+        """Add a cached user to the request's session as if it was just loaded, without a query"""
+        user = User()
+        for key, value in values.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def discard_cached_user(mapper, connection, target):
+    if has_app_context():
+        UserCache.from_app().discard(target.id)
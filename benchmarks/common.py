@@ -0,0 +1,111 @@
+"""
+Shared helpers for the benchmark scripts: app setup and seeding synthetic transactions.
+"""
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fixed UUIDs, so the rows also load with COMPACT_IDS
+USER_ID = '00000000-0000-7000-8000-000000000001'
+ACCOUNT_ID = '00000000-0000-7000-8000-000000000002'
+
+
+def make_app(database_uri, **settings):
+    """Create the app on the given database; settings override config values by name"""
+    from app import create_app
+    from app.config import Config
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri
+
+    for name, value in settings.items():
+        setattr(BenchmarkConfig, name, value)
+    app = create_app(BenchmarkConfig)
+    # Benchmarks run single-threaded, so their process can keep one context pushed
+    app.app_context().push()
+    return app
+
+
+def seed(database_uri, rows, compact_ids=False, new_id=None, **settings):
+    from app.models import db, generate_id, User, Account, Transaction
+    from app.models.transaction import sign_amount
+
+    new_id = new_id or generate_id
+    make_app(database_uri, COMPACT_IDS=compact_ids, **settings)
+    db.drop_all()
+    db.create_all()
+    db.session.execute(db.insert(User), [{'id': USER_ID, 'username': 'benchmark',
+                                          'email': 'benchmark@example.com', 'password_hash': 'x'}])
+    db.session.execute(db.insert(Account), [{'id': ACCOUNT_ID, 'name': 'Business', 'account_type': 'bank',
+                                             'currency': 'USD', 'balance': 0, 'user_id': USER_ID}])
+
+    # Spread rows over every preset category and tag
+    from app.models import Category
+    labels = [(category, tag) for category, details in Category.CATEGORY_TAGS.items()
+              for tag in details['Subcategories']]
+
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(rows):
+        transaction_type = 'income' if i % 5 == 0 else 'expense'
+        batch.append({
+            'id': new_id(),
+            'signed_amount': sign_amount(10 + i % 500, transaction_type),
+            'transaction_type': transaction_type,
+            'description': f'Benchmark transaction {i}',
+            'date': start + timedelta(minutes=i % 525_600),
+            'category': labels[i % len(labels)][0],
+            'tag': labels[i % len(labels)][1],
+            'user_id': USER_ID,
+            'account_id': ACCOUNT_ID
+        })
+        if len(batch) == 50_000:
+            db.session.execute(db.insert(Transaction), batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(Transaction), batch)
+    db.session.commit()
+
+
+def export_query(start_date=datetime(2024, 1, 1), end_date=datetime(2025, 1, 1), format='xlsx'):
+    """The benchmark user's transactions and export filters, as the export job builds them"""
+    from app.models import Transaction
+    from app.utils.filters import ExportFilters
+
+    filters = ExportFilters(USER_ID, start_date=start_date, end_date=end_date,
+                            account_id=ACCOUNT_ID, format=format)
+    transactions = filters.build_query(Transaction.query.filter_by(user_id=USER_ID)) \
+        .order_by(Transaction.date.desc())
+    return transactions, filters
+
+
+def run_measured(function, queue):
+    """Call function and report (seconds, peak RSS MB, RSS growth MB) on the queue"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is reported in kilobytes on Linux
+    queue.put((elapsed, peak / 1024, (peak - baseline) / 1024))
+
+
+def measure(context, target, *args):
+    """Run target(*args, queue) in a fresh process and return what it reports"""
+    queue = context.Queue()
+    process = context.Process(target=target, args=args + (queue,))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def seed_in_process(context, database_uri, rows):
+    process = context.Process(target=seed, args=(database_uri, rows))
+    process.start()
+    process.join()
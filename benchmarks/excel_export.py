@@ -0,0 +1,85 @@
+"""
+Compare the legacy pandas Excel export with the streaming xlsxwriter export.
+
+Each run happens in a fresh process so peak RSS is measured per export:
+
+    python benchmarks/excel_export.py                  # 10k, 100k and 1M rows
+    python benchmarks/excel_export.py --rows 10000 50000
+
+Rows are seeded into a temporary SQLite database (or --database-uri) once per size.
+The legacy export needs pandas, which the app no longer depends on: `pip install pandas`.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+
+from common import make_app, export_query, run_measured, measure, seed_in_process
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+
+def legacy_export(transactions, filters):
+    """The pre-streaming export: load every row, build a DataFrame, write it with pandas"""
+    import pandas as pd
+
+    transactions = transactions.all()
+    data = [{
+        'Date': t.date.strftime('%Y-%m-%d'),
+        'Category': t.category,
+        'Tag': t.tag,
+        'Description': t.description,
+        'Amount': float(t.amount),
+        'Type': t.transaction_type.capitalize()
+    } for t in transactions]
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        pd.DataFrame([{'Transactions': len(data)}]).to_excel(writer, sheet_name='Summary', index=False)
+        pd.DataFrame(data).to_excel(writer, sheet_name='Transactions', index=False)
+        sheet = writer.sheets['Transactions']
+        sheet.autofilter(0, 0, len(data), 5)
+    return output
+
+
+def streaming_export(transactions, filters, path):
+    from app.utils.report_generator import ReportGenerator
+
+    ReportGenerator(transactions, filters).generate_excel(path)
+
+
+def run(database_uri, implementation, queue):
+    make_app(database_uri)
+    transactions, filters = export_query()
+
+    def export():
+        with tempfile.TemporaryDirectory() as directory:
+            if implementation == 'pandas':
+                legacy_export(transactions, filters)
+            else:
+                streaming_export(transactions, filters, os.path.join(directory, 'report.xlsx'))
+
+    run_measured(export, queue)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--database-uri', help='Database to seed; defaults to a temporary SQLite file.')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'rows':>10} {'implementation':>15} {'seconds':>9} {'peak RSS MB':>12} {'growth MB':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        for rows in args.rows:
+            seed_in_process(context, database_uri, rows)
+            for implementation in ('pandas', 'streaming'):
+                elapsed, peak, growth = measure(context, run, database_uri, implementation)
+                print(f'{rows:>10} {implementation:>15} {elapsed:>9.2f} {peak:>12.1f} {growth:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
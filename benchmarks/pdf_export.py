@@ -0,0 +1,92 @@
+"""
+Compare the legacy single-table PDF statement with the paginated renderer.
+
+Each run happens in a fresh process so peak RSS is measured per export:
+
+    python benchmarks/pdf_export.py                    # 1k, 10k and 50k rows
+    python benchmarks/pdf_export.py --rows 1000 5000
+
+Rows are seeded into a temporary SQLite database (or --database-uri) once per size.
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+
+from common import make_app, export_query, run_measured, measure, seed_in_process
+
+DEFAULT_ROWS = [1_000, 10_000, 50_000]
+
+
+def legacy_export(transactions, filters):
+    """The pre-pagination renderer: one table for every row with a style command per row"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+    data = [['Date', 'Category', 'Tag', 'Description', 'Amount', 'Type']]
+    for t in transactions.all():
+        data.append([t.date.strftime('%Y-%m-%d'), t.category, t.tag, t.description,
+                     f'USD {float(t.amount):,.2f}', t.transaction_type.capitalize()])
+
+    style = [
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#DEE2E6')),
+    ]
+    for i, row in enumerate(data[1:], 1):
+        color = colors.HexColor('#4CAF50') if row[-1] == 'Income' else colors.HexColor('#F44336')
+        style.append(('TEXTCOLOR', (-2, i), (-2, i), color))
+        if i % 2 == 0:
+            style.append(('BACKGROUND', (0, i), (-1, i), colors.HexColor('#f8f9fa')))
+
+    table = Table(data, colWidths=[1 * inch, 1.5 * inch, 1 * inch, 2 * inch, 1.2 * inch, 1 * inch])
+    table.setStyle(TableStyle(style))
+
+    output = io.BytesIO()
+    SimpleDocTemplate(output, pagesize=A4).build([table])
+    return output
+
+
+def paginated_export(transactions, filters, path):
+    from app.utils.report_generator import ReportGenerator
+
+    ReportGenerator(transactions, filters).generate_pdf(path)
+
+
+def run(database_uri, implementation, queue):
+    make_app(database_uri)
+    transactions, filters = export_query(format='pdf')
+
+    def export():
+        with tempfile.TemporaryDirectory() as directory:
+            if implementation == 'single table':
+                legacy_export(transactions, filters)
+            else:
+                paginated_export(transactions, filters, os.path.join(directory, 'report.pdf'))
+
+    run_measured(export, queue)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--database-uri', help='Database to seed; defaults to a temporary SQLite file.')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'rows':>10} {'implementation':>15} {'seconds':>9} {'peak RSS MB':>12} {'growth MB':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        for rows in args.rows:
+            seed_in_process(context, database_uri, rows)
+            for implementation in ('single table', 'paginated'):
+                elapsed, peak, growth = measure(context, run, database_uri, implementation)
+                print(f'{rows:>10} {implementation:>15} {elapsed:>9.2f} {peak:>12.1f} {growth:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
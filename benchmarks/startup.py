@@ -0,0 +1,76 @@
+"""
+Measure how long a fresh web worker takes to start: importing the app package, running
+create_app, and serving its first request. Each run is a new interpreter started with
+`python -X importtime`, whose report also gives the slowest imports:
+
+    python benchmarks/startup.py             # 5 runs
+    python benchmarks/startup.py --runs 10 --slowest 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import json, time
+started = time.perf_counter()
+import app
+from app.config import Config
+imported = time.perf_counter()
+flask_app = app.create_app(Config)
+created = time.perf_counter()
+response = flask_app.test_client().get('/auth/login')
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({'import': imported - started, 'create_app': created - imported,
+                  'first request': served - created, 'total': served - started}))
+"""
+
+
+def run_worker(database_uri):
+    """Start one worker process; returns (timings, {module: cumulative import seconds})"""
+    env = dict(os.environ, DATABASE_URI=database_uri, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', WORKER],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, module = line[len('import time:'):].split('|')
+            imports[module.strip()] = int(cumulative) / 1e6
+    return json.loads(result.stdout.splitlines()[-1]), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--slowest', type=int, default=10, help='Number of slowest packages to list.')
+    parser.add_argument('--database-uri', help='Database to use instead of a temporary SQLite file.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_uri = args.database_uri or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        runs = [run_worker(database_uri) for _ in range(args.runs)]
+
+    print(f"{'phase':>14} {'median s':>9} {'min s':>7}")
+    for phase in runs[0][0]:
+        values = [timings[phase] for timings, _ in runs]
+        print(f'{phase:>14} {statistics.median(values):>9.3f} {min(values):>7.3f}')
+
+    # Packages rather than each of their submodules
+    _, imports = runs[-1]
+    top_level = sorted(((seconds, module) for module, seconds in imports.items() if '.' not in module),
+                       reverse=True)
+    print(f"\n{'slowest packages':>24} {'cumulative s':>13}")
+    for seconds, module in top_level[:args.slowest]:
+        print(f'{module:>24} {seconds:>13.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for production: `gunicorn -c gunicorn.conf.py wsgi:app` (see Procfile).
+
+Requests mostly wait on the database, so each worker process serves several requests
+at once on threads (gthread). WEB_CONCURRENCY, WEB_THREADS and GUNICORN_WORKER_CLASS
+override the defaults; WEB_THREADS also sizes each process's database connection pool.
+
+With METRICS enabled, workers write their metrics to PROMETHEUS_MULTIPROC_DIR and
+/metrics reports the sum over all of them.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS') or 'gthread'
+# Exported before the app is loaded, so its pool gets one connection per thread
+threads = int(os.environ.setdefault('WEB_THREADS', '4'))
+
+# Load the app once in the master; workers share its memory copy-on-write
+preload_app = True
+
+# Recycle workers now and then so slow leaks cannot grow unbounded; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = 100
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Heartbeat files on tmpfs, so a slow disk cannot get workers killed as unresponsive
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+
+# Must be set before the app and prometheus_client are loaded
+if os.environ.get('METRICS', '').lower() in ('1', 'true'):
+    metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                        os.path.join(worker_tmp_dir or tempfile.gettempdir(), 'moneyminder-metrics'))
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """Start the metrics from zero rather than adding up the files of a previous run"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own"""
+    from app.models import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Remove the exited worker's files kept only while it lives, as prometheus_client asks"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,53 @@
+"""add daily_rollups table
+
+Revision ID: 1aabdb3e6e12
+Revises: ed4457103d43
+Create Date: 2026-10-18 11:04:27.731906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1aabdb3e6e12'
+down_revision = 'ed4457103d43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'daily_rollups',
+        sa.Column('user_id', sa.String(length=50), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('account_id', sa.String(length=50), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=False),
+        sa.Column('tag', sa.String(length=100), nullable=False),
+        sa.Column('transaction_type', sa.String(length=20), nullable=False),
+        sa.Column('total_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('transaction_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'account_id', 'category', 'tag', 'transaction_type'),
+        if_not_exists=True
+    )
+
+    # Backfill from existing transactions; `flask rollups rebuild` does the same on demand.
+    # The table may already hold rows when db.create_all() created it first.
+    op.execute('DELETE FROM daily_rollups')
+    # Tables created by db.create_all() after a9e4c61f0d27 store category and tag ids instead
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('transactions')]
+    if 'category' not in columns:
+        return
+    op.execute("""
+        INSERT INTO daily_rollups (user_id, day, account_id, category, tag, transaction_type,
+                                   total_amount, transaction_count)
+        SELECT user_id, date(date), account_id, category, tag, transaction_type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY user_id, date(date), account_id, category, tag, transaction_type
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_rollups')
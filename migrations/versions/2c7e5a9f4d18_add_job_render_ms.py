@@ -0,0 +1,28 @@
+"""add jobs.render_ms
+
+Revision ID: 2c7e5a9f4d18
+Revises: 6d2c9e4b1f83
+Create Date: 2026-10-21 14:05:38.270611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7e5a9f4d18'
+down_revision = '6d2c9e4b1f83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # `flask schema create` may already have created the column
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('jobs')]
+    if 'render_ms' not in columns:
+        op.add_column('jobs', sa.Column('render_ms', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('render_ms')
@@ -0,0 +1,28 @@
+"""add accounts.data_version
+
+Revision ID: 4b8e1d6c2a95
+Revises: 7c2f4e9a1b30
+Create Date: 2026-10-18 15:02:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e1d6c2a95'
+down_revision = '7c2f4e9a1b30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the column on a fresh database
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('accounts')]
+    if 'data_version' not in columns:
+        op.add_column('accounts', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('accounts') as batch_op:
+        batch_op.drop_column('data_version')
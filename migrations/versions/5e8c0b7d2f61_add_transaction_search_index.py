@@ -0,0 +1,62 @@
+"""add full-text search index on transaction descriptions
+
+Revision ID: 5e8c0b7d2f61
+Revises: 9d3a5f7e0c14
+Create Date: 2026-10-18 17:02:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8c0b7d2f61'
+down_revision = '9d3a5f7e0c14'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+           description, content='transactions', content_rowid='rowid', prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    # Index the rows that existed before the triggers
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS transactions_fts_insert',
+    'DROP TRIGGER IF EXISTS transactions_fts_delete',
+    'DROP TRIGGER IF EXISTS transactions_fts_update',
+    'DROP TABLE IF EXISTS transactions_fts',
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX IF NOT EXISTS ix_transactions_description_fts ON transactions "
+                   "USING gin (to_tsvector('simple', coalesce(description, '')))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_transactions_description_fts')
@@ -0,0 +1,40 @@
+"""widen categories and tags ids, and the columns referencing them, to integer
+
+Revision ID: 6d2c9e4b1f83
+Revises: 8b1f5d3c7e20
+Create Date: 2026-10-20 10:12:44.503918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d2c9e4b1f83'
+down_revision = '8b1f5d3c7e20'
+branch_labels = None
+depends_on = None
+
+LOOKUP_TABLES = ('categories', 'tags')
+REFERENCING_COLUMNS = {'transactions': ('category_id', 'tag_id'), 'budgets': ('category_id', 'tag_id')}
+
+
+def _alter_ids(type_name):
+    # SQLite gives SMALLINT and INTEGER columns the same storage, so only Postgres needs altering
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in LOOKUP_TABLES:
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN id TYPE {type_name}')
+        # The sequence keeps the smallint limit of its SMALLSERIAL column until altered too
+        op.execute(f'ALTER SEQUENCE {table}_id_seq AS {type_name}')
+    for table, columns in REFERENCING_COLUMNS.items():
+        alterations = ', '.join(f'ALTER COLUMN {column} TYPE {type_name}' for column in columns)
+        op.execute(f'ALTER TABLE {table} {alterations}')
+
+
+def upgrade():
+    _alter_ids('integer')
+
+
+def downgrade():
+    _alter_ids('smallint')
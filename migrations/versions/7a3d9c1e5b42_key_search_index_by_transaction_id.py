@@ -0,0 +1,85 @@
+"""key the SQLite search index by transaction id instead of rowid
+
+Revision ID: 7a3d9c1e5b42
+Revises: 2c7e5a9f4d18
+Create Date: 2026-10-21 16:48:09.532174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d9c1e5b42'
+down_revision = '2c7e5a9f4d18'
+branch_labels = None
+depends_on = None
+
+
+DROP_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS transactions_fts_insert',
+    'DROP TRIGGER IF EXISTS transactions_fts_delete',
+    'DROP TRIGGER IF EXISTS transactions_fts_update',
+]
+
+DELETE_OLD = """
+       INSERT INTO transactions_fts (transactions_fts, rowid, transaction_id, description)
+       SELECT 'delete', id, transaction_id, description FROM transactions_fts_source
+       WHERE transaction_id = old.id;
+       DELETE FROM transactions_fts_source WHERE transaction_id = old.id;"""
+INSERT_NEW = """
+       INSERT INTO transactions_fts_source (transaction_id, description) VALUES (new.id, new.description);
+       INSERT INTO transactions_fts (rowid, transaction_id, description)
+       SELECT id, transaction_id, description FROM transactions_fts_source WHERE transaction_id = new.id;"""
+
+ID_KEYED = [
+    """CREATE TABLE transactions_fts_source (
+           id INTEGER PRIMARY KEY, transaction_id UNIQUE NOT NULL, description TEXT)""",
+    """CREATE VIRTUAL TABLE transactions_fts USING fts5(
+           transaction_id UNINDEXED, description,
+           content='transactions_fts_source', content_rowid='id', prefix='2 3')""",
+    f"""CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN{INSERT_NEW}
+       END""",
+    f"""CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN{DELETE_OLD}
+       END""",
+    f"""CREATE TRIGGER transactions_fts_update AFTER UPDATE OF id, description ON transactions
+       BEGIN{DELETE_OLD}{INSERT_NEW}
+       END""",
+    'INSERT INTO transactions_fts_source (transaction_id, description) SELECT id, description FROM transactions',
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+ROWID_KEYED = [
+    """CREATE VIRTUAL TABLE transactions_fts USING fts5(
+           description, content='transactions', content_rowid='rowid', prefix='2 3')""",
+    """CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    """CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+       END""",
+    """CREATE TRIGGER transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    # Postgres searches an expression index on transactions, which has no rowids to go stale
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DROP_TRIGGERS + ['DROP TABLE IF EXISTS transactions_fts',
+                                      'DROP TABLE IF EXISTS transactions_fts_source'] + ID_KEYED:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in DROP_TRIGGERS + ['DROP TABLE IF EXISTS transactions_fts',
+                                      'DROP TABLE IF EXISTS transactions_fts_source'] + ROWID_KEYED:
+        op.execute(statement)
@@ -0,0 +1,30 @@
+"""store transaction amounts signed, expenses negative
+
+Revision ID: 8b1f5d3c7e20
+Revises: f3a8d2c61b47
+Create Date: 2026-10-19 14:06:52.390617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f5d3c7e20'
+down_revision = 'f3a8d2c61b47'
+branch_labels = None
+depends_on = None
+
+
+def _negate_expenses():
+    """Flip the sign of expense amounts and rollup totals; balances and snapshots are unchanged"""
+    op.execute("UPDATE transactions SET amount = -amount WHERE transaction_type = 'expense'")
+    op.execute("UPDATE daily_rollups SET total_amount = -total_amount WHERE transaction_type = 'expense'")
+
+
+def upgrade():
+    _negate_expenses()
+
+
+def downgrade():
+    _negate_expenses()
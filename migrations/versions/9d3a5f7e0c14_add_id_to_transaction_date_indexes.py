@@ -0,0 +1,30 @@
+"""add id to the transaction date indexes for keyset pagination
+
+Revision ID: 9d3a5f7e0c14
+Revises: 4b8e1d6c2a95
+Create Date: 2026-10-18 16:11:05.524930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3a5f7e0c14'
+down_revision = '4b8e1d6c2a95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index('ix_transactions_user_date', table_name='transactions', if_exists=True)
+    op.drop_index('ix_transactions_account_date', table_name='transactions', if_exists=True)
+    op.create_index('ix_transactions_user_date', 'transactions', ['user_id', 'date', 'id'])
+    op.create_index('ix_transactions_account_date', 'transactions', ['account_id', 'date', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_date', table_name='transactions')
+    op.drop_index('ix_transactions_account_date', table_name='transactions')
+    op.create_index('ix_transactions_user_date', 'transactions', ['user_id', 'date'])
+    op.create_index('ix_transactions_account_date', 'transactions', ['account_id', 'date'])
@@ -0,0 +1,140 @@
+"""store transaction and budget categories and tags as lookup table ids
+
+Revision ID: a9e4c61f0d27
+Revises: c7d2e9f14a38
+Create Date: 2026-10-18 19:48:05.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.category import Category
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9e4c61f0d27'
+down_revision = 'c7d2e9f14a38'
+branch_labels = None
+depends_on = None
+
+# table -> [(name column, id column, lookup table, nullable)]
+LOOKUP_COLUMNS = {
+    'transactions': [('category', 'category_id', 'categories', False), ('tag', 'tag_id', 'tags', False)],
+    'budgets': [('category', 'category_id', 'categories', False), ('tag', 'tag_id', 'tags', True)],
+}
+
+# Rebuilding a SQLite table drops its triggers and renumbers its rowids,
+# so the search triggers from 5e8c0b7d2f61 are recreated and the index rebuilt
+SQLITE_SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+
+def _create_lookup_table(name):
+    return op.create_table(
+        name,
+        sa.Column('id', sa.SmallInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+        if_not_exists=True
+    )
+
+
+def _seed(table, names):
+    """Insert presets first, then every other name in use, skipping names already present"""
+    existing = set(op.get_bind().execute(sa.select(table.c.name)).scalars())
+    rows = [{'name': name} for name in dict.fromkeys(names) if name is not None and name not in existing]
+    if rows:
+        op.bulk_insert(table, rows)
+
+
+def _names_in_use(column, needs_conversion):
+    tables = [table for table in LOOKUP_COLUMNS if needs_conversion[table]]
+    if not tables:
+        return []
+    union = ' UNION '.join(f'SELECT {column} FROM {table}' for table in tables)
+    return sorted(name for name in op.get_bind().execute(sa.text(union)).scalars() if name is not None)
+
+
+def _swap_columns(table, to_ids):
+    """Fill the new columns from the old ones through the lookup tables, then drop the old columns"""
+    bind = op.get_bind()
+    columns = LOOKUP_COLUMNS[table]
+
+    for name, id_column, lookup, _ in columns:
+        if to_ids:
+            op.add_column(table, sa.Column(id_column, sa.SmallInteger(), nullable=True))
+            op.execute(f'UPDATE {table} SET {id_column} = '
+                       f'(SELECT id FROM {lookup} WHERE {lookup}.name = {table}.{name})')
+        else:
+            op.add_column(table, sa.Column(name, sa.String(length=100), nullable=True))
+            op.execute(f'UPDATE {table} SET {name} = '
+                       f'(SELECT name FROM {lookup} WHERE {lookup}.id = {table}.{id_column})')
+
+    if table == 'transactions':
+        op.drop_index('ix_transactions_user_category_tag_date', table_name='transactions')
+
+    if bind.dialect.name == 'postgresql':
+        for name, id_column, lookup, nullable in columns:
+            new, old = (id_column, name) if to_ids else (name, id_column)
+            op.drop_column(table, old)
+            if not nullable:
+                op.alter_column(table, new, nullable=False)
+            if to_ids:
+                op.create_foreign_key(f'{table}_{id_column}_fkey', table, lookup, [id_column], ['id'])
+    else:
+        with op.batch_alter_table(table, recreate='always') as batch_op:
+            for name, id_column, lookup, nullable in columns:
+                new, old = (id_column, name) if to_ids else (name, id_column)
+                batch_op.drop_column(old)
+                if not nullable:
+                    batch_op.alter_column(new, existing_type=sa.SmallInteger() if to_ids else sa.String(length=100),
+                                          nullable=False)
+                if to_ids:
+                    batch_op.create_foreign_key(f'{table}_{id_column}_fkey', lookup, [id_column], ['id'])
+
+    if table == 'transactions':
+        op.create_index('ix_transactions_user_category_tag_date', 'transactions',
+                        ['user_id', 'category_id' if to_ids else 'category', 'tag_id' if to_ids else 'tag', 'date'])
+        if bind.dialect.name == 'sqlite' and sa.inspect(bind).has_table('transactions_fts'):
+            for statement in SQLITE_SEARCH_TRIGGERS:
+                op.execute(statement)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # db.create_all() already creates the id columns on a fresh database
+    needs_conversion = {
+        table: 'category' in [column['name'] for column in inspector.get_columns(table)]
+        for table in LOOKUP_COLUMNS
+    }
+
+    categories = _create_lookup_table('categories')
+    tags = _create_lookup_table('tags')
+    preset_tags = [tag for details in Category.CATEGORY_TAGS.values() for tag in details['Subcategories']]
+    _seed(categories, list(Category.PRESET_CATEGORIES) + _names_in_use('category', needs_conversion))
+    _seed(tags, preset_tags + _names_in_use('tag', needs_conversion))
+
+    for table in LOOKUP_COLUMNS:
+        if needs_conversion[table]:
+            _swap_columns(table, to_ids=True)
+
+
+def downgrade():
+    for table in LOOKUP_COLUMNS:
+        _swap_columns(table, to_ids=False)
+    op.drop_table('tags')
+    op.drop_table('categories')
@@ -0,0 +1,62 @@
+"""add account opening balances and daily balance snapshots
+
+Revision ID: b3f61a2d8e47
+Revises: 5e8c0b7d2f61
+Create Date: 2026-10-18 18:20:13.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f61a2d8e47'
+down_revision = '5e8c0b7d2f61'
+branch_labels = None
+depends_on = None
+
+NET_AMOUNT = "CASE transaction_type WHEN 'income' THEN amount WHEN 'expense' THEN -amount ELSE 0 END"
+
+
+def upgrade():
+    # db.create_all() may already have created the column on a fresh database
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('accounts')]
+    if 'opening_balance' not in columns:
+        op.add_column('accounts', sa.Column('opening_balance', sa.Numeric(precision=10, scale=2),
+                                            nullable=False, server_default='0'))
+
+    # The balance before any transaction is the current balance minus every transaction's effect
+    op.execute(f"""
+        UPDATE accounts SET opening_balance = balance - COALESCE(
+            (SELECT SUM({NET_AMOUNT}) FROM transactions WHERE transactions.account_id = accounts.id), 0)
+    """)
+
+    op.create_table(
+        'account_balance_snapshots',
+        sa.Column('account_id', sa.String(length=50), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['accounts.id']),
+        sa.PrimaryKeyConstraint('account_id', 'day'),
+        if_not_exists=True
+    )
+
+    # Backfill from existing transactions; `flask balances rebuild-snapshots` does the same on demand
+    op.execute('DELETE FROM account_balance_snapshots')
+    op.execute(f"""
+        INSERT INTO account_balance_snapshots (account_id, day, balance)
+        SELECT changes.account_id, changes.day,
+               accounts.opening_balance + SUM(changes.net) OVER (PARTITION BY changes.account_id ORDER BY changes.day)
+        FROM (
+            SELECT account_id, date(date) AS day, SUM({NET_AMOUNT}) AS net
+            FROM transactions
+            GROUP BY account_id, date(date)
+        ) AS changes
+        JOIN accounts ON accounts.id = changes.account_id
+    """)
+
+
+def downgrade():
+    op.drop_table('account_balance_snapshots')
+    with op.batch_alter_table('accounts') as batch_op:
+        batch_op.drop_column('opening_balance')
@@ -0,0 +1,129 @@
+"""store amounts as integer minor units
+
+Revision ID: c7d2e9f14a38
+Revises: b3f61a2d8e47
+Create Date: 2026-10-18 19:02:41.271530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e9f14a38'
+down_revision = 'b3f61a2d8e47'
+branch_labels = None
+depends_on = None
+
+# table -> [(column, previous precision)]
+AMOUNT_COLUMNS = {
+    'transactions': [('amount', 10)],
+    'budgets': [('amount', 10)],
+    'accounts': [('balance', 10), ('opening_balance', 10)],
+    'daily_rollups': [('total_amount', 14)],
+    'account_balance_snapshots': [('balance', 14)],
+}
+
+# Rebuilding a SQLite table drops its triggers and renumbers its rowids,
+# so the search triggers from 5e8c0b7d2f61 are recreated and the index rebuilt
+SQLITE_SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+           INSERT INTO transactions_fts (transactions_fts, rowid, description)
+           VALUES ('delete', old.rowid, old.description);
+           INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+       END""",
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+]
+
+NET_AMOUNT = "CASE transaction_type WHEN 'income' THEN amount WHEN 'expense' THEN -amount ELSE 0 END"
+
+
+def _is_integer(inspector, table, column):
+    for info in inspector.get_columns(table):
+        if info['name'] == column:
+            return isinstance(info['type'], sa.Integer)
+    return False
+
+
+def _convert(table, columns, to_minor_units):
+    """Rewrite the values, then change the column types"""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for column, precision in columns:
+            if to_minor_units:
+                op.alter_column(table, column, type_=sa.BigInteger(),
+                                postgresql_using=f'round({column} * 100)::bigint')
+            else:
+                op.alter_column(table, column, type_=sa.Numeric(precision=precision, scale=2),
+                                postgresql_using=f'round({column} / 100.0, 2)')
+        return
+
+    for column, _ in columns:
+        if to_minor_units:
+            op.execute(f'UPDATE {table} SET {column} = CAST(ROUND({column} * 100) AS INTEGER)')
+        else:
+            op.execute(f'UPDATE {table} SET {column} = ROUND({column} / 100.0, 2)')
+    with op.batch_alter_table(table, recreate='always') as batch_op:
+        for column, precision in columns:
+            batch_op.alter_column(column, type_=sa.BigInteger() if to_minor_units
+                                  else sa.Numeric(precision=precision, scale=2))
+
+    if table == 'transactions' and sa.inspect(bind).has_table('transactions_fts'):
+        for statement in SQLITE_SEARCH_TRIGGERS:
+            op.execute(statement)
+
+
+def _rebuild_totals():
+    """
+    Recompute the rollups and snapshots from the converted transactions. When db.create_all()
+    created their tables before 1aabdb3e6e12 and b3f61a2d8e47 ran, those filled the BIGINT
+    columns with amounts in major units, which the conversion above leaves as they are.
+    """
+    op.execute('DELETE FROM account_balance_snapshots')
+    op.execute(f"""
+        INSERT INTO account_balance_snapshots (account_id, day, balance)
+        SELECT changes.account_id, changes.day,
+               accounts.opening_balance + SUM(changes.net) OVER (PARTITION BY changes.account_id ORDER BY changes.day)
+        FROM (
+            SELECT account_id, date(date) AS day, SUM({NET_AMOUNT}) AS net
+            FROM transactions
+            GROUP BY account_id, date(date)
+        ) AS changes
+        JOIN accounts ON accounts.id = changes.account_id
+    """)
+
+    op.execute('DELETE FROM daily_rollups')
+    # Tables created by db.create_all() after a9e4c61f0d27 store category and tag ids instead
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('transactions')]
+    if 'category' not in columns:
+        return
+    op.execute("""
+        INSERT INTO daily_rollups (user_id, day, account_id, category, tag, transaction_type,
+                                   total_amount, transaction_count)
+        SELECT user_id, date(date), account_id, category, tag, transaction_type, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY user_id, date(date), account_id, category, tag, transaction_type
+    """)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in AMOUNT_COLUMNS.items():
+        # db.create_all() already creates BIGINT columns on a fresh database
+        columns = [(column, precision) for column, precision in columns
+                   if not _is_integer(inspector, table, column)]
+        if columns:
+            _convert(table, columns, to_minor_units=True)
+    _rebuild_totals()
+
+
+def downgrade():
+    for table, columns in AMOUNT_COLUMNS.items():
+        _convert(table, columns, to_minor_units=False)
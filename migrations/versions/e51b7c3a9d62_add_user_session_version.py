@@ -0,0 +1,28 @@
+"""add users.session_version
+
+Revision ID: e51b7c3a9d62
+Revises: a9e4c61f0d27
+Create Date: 2026-10-18 21:14:36.402817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e51b7c3a9d62'
+down_revision = 'a9e4c61f0d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created the column on a fresh database
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')]
+    if 'session_version' not in columns:
+        op.add_column('users', sa.Column('session_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('session_version')
@@ -0,0 +1,38 @@
+"""add composite indexes on transactions and budgets
+
+Revision ID: ed4457103d43
+Revises:
+Create Date: 2026-10-18 09:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed4457103d43'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables may already carry these indexes when they were created by db.create_all()
+    op.create_index('ix_transactions_user_date', 'transactions',
+                    ['user_id', 'date'], if_not_exists=True)
+    # Tables created by db.create_all() after a9e4c61f0d27 index category and tag ids instead
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('transactions')]
+    if 'category' in columns:
+        op.create_index('ix_transactions_user_category_tag_date', 'transactions',
+                        ['user_id', 'category', 'tag', 'date'], if_not_exists=True)
+    op.create_index('ix_transactions_account_date', 'transactions',
+                    ['account_id', 'date'], if_not_exists=True)
+    op.create_index('ix_budgets_user_period', 'budgets',
+                    ['user_id', 'start_date', 'end_date'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_budgets_user_period', table_name='budgets', if_exists=True)
+    op.drop_index('ix_transactions_account_date', table_name='transactions', if_exists=True)
+    op.drop_index('ix_transactions_user_category_tag_date', table_name='transactions', if_exists=True)
+    op.drop_index('ix_transactions_user_date', table_name='transactions', if_exists=True)
@@ -0,0 +1,31 @@
+"""add jobs.heartbeat_at and jobs.attempts
+
+Revision ID: f3a8d2c61b47
+Revises: e51b7c3a9d62
+Create Date: 2026-10-19 09:42:17.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d2c61b47'
+down_revision = 'e51b7c3a9d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # `flask schema create` may already have created the columns
+    columns = [column['name'] for column in sa.inspect(op.get_bind()).get_columns('jobs')]
+    if 'heartbeat_at' not in columns:
+        op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+    if 'attempts' not in columns:
+        op.add_column('jobs', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs') as batch_op:
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('heartbeat_at')